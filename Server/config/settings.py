@@ -29,6 +29,8 @@ class Config:
     INFLUX_DATABASE: str = os.getenv('INFLUX_DATABASE', 'pm25gps')
     INFLUX_USERNAME: Optional[str] = os.getenv('INFLUX_USERNAME')
     INFLUX_PASSWORD: Optional[str] = os.getenv('INFLUX_PASSWORD')
+    # Queries and writes slower than this are written to the slow query log
+    INFLUX_SLOW_QUERY_SECONDS: float = float(os.getenv('INFLUX_SLOW_QUERY_SECONDS', '1.0'))
 
     # File Paths
     GEOJSON_OUTPUT_PATH: str = os.getenv('GEOJSON_OUTPUT_PATH', '/var/www/html/gj/pm25gps.geojson')
@@ -39,6 +41,109 @@ class Config:
     DATA_RETENTION_HOURS: int = int(os.getenv('DATA_RETENTION_HOURS', '720'))
     GEOJSON_UPDATE_INTERVAL: int = int(os.getenv('GEOJSON_UPDATE_INTERVAL', '60'))
     CSV_UPDATE_INTERVAL: int = int(os.getenv('CSV_UPDATE_INTERVAL', '300'))
+    GEOJSON_STREAM_CHUNK_HOURS: int = int(os.getenv('GEOJSON_STREAM_CHUNK_HOURS', '6'))
+    GEOJSON_STREAM_CHUNK_FEATURES: int = int(os.getenv('GEOJSON_STREAM_CHUNK_FEATURES', '500'))
+    GEOJSON_PRECOMPRESS: bool = os.getenv('GEOJSON_PRECOMPRESS', 'true').lower() == 'true'
+    GEOJSON_BROTLI_QUALITY: int = int(os.getenv('GEOJSON_BROTLI_QUALITY', '9'))
+    CHANGE_FEED_MAX_ENTRIES: int = int(os.getenv('CHANGE_FEED_MAX_ENTRIES', '10000'))
+    CHANGE_FEED_MAX_BATCH: int = int(os.getenv('CHANGE_FEED_MAX_BATCH', '1000'))
+
+    # Live Push (SSE/WebSocket)
+    PUSH_MAX_SUBSCRIBERS: int = int(os.getenv('PUSH_MAX_SUBSCRIBERS', '100'))
+    PUSH_BUFFER_SIZE: int = int(os.getenv('PUSH_BUFFER_SIZE', '256'))
+    PUSH_KEEPALIVE_SECONDS: int = int(os.getenv('PUSH_KEEPALIVE_SECONDS', '15'))
+
+    # API Server
+    ENABLE_API: bool = os.getenv('ENABLE_API', 'true').lower() == 'true'
+    API_HOST: str = os.getenv('API_HOST', '0.0.0.0')
+    API_PORT: int = int(os.getenv('API_PORT', '5000'))
+    API_SERVER: str = os.getenv('API_SERVER', 'auto')
+    API_WORKERS: int = int(os.getenv('API_WORKERS', '1'))
+    API_THREADS: int = int(os.getenv('API_THREADS', '4'))
+    # With ENABLE_API=false, the collector still serves the change feed and
+    # live push (which only it has) on this port; 0 disables
+    LIVE_API_PORT: int = int(os.getenv('LIVE_API_PORT', '0'))
+
+    # Response cache for hot API routes
+    RESPONSE_CACHE_TTL: int = int(os.getenv('RESPONSE_CACHE_TTL', '60'))
+    RESPONSE_CACHE_STALE_TTL: int = int(os.getenv('RESPONSE_CACHE_STALE_TTL', '60'))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+    # Maximum points returned by the device series endpoint
+    SERIES_MAX_POINTS: int = int(os.getenv('SERIES_MAX_POINTS', '5000'))
+
+    # Data export jobs
+    EXPORT_PATH: str = os.getenv('EXPORT_PATH', '/var/lib/pm25/exports/')
+    EXPORT_MAX_WORKERS: int = int(os.getenv('EXPORT_MAX_WORKERS', '2'))
+    EXPORT_MAX_PENDING: int = int(os.getenv('EXPORT_MAX_PENDING', '10'))
+    EXPORT_RESULT_TTL: int = int(os.getenv('EXPORT_RESULT_TTL', '3600'))
+    EXPORT_SYNC_TIMEOUT: int = int(os.getenv('EXPORT_SYNC_TIMEOUT', '10'))
+
+    # Shared snapshots of data products for API worker processes
+    SNAPSHOT_PATH: str = os.getenv('SNAPSHOT_PATH', '/var/lib/pm25/snapshots/')
+    SNAPSHOT_INTERVAL: int = int(os.getenv('SNAPSHOT_INTERVAL', '5'))
+    # Only needed with standalone API workers, so on by default when the
+    # collector runs no API itself
+    PUBLISH_SNAPSHOTS: bool = os.getenv('PUBLISH_SNAPSHOTS', str(not ENABLE_API)).lower() == 'true'
+
+    # Quantile sketches for percentile statistics (hours kept, relative error)
+    QUANTILE_RETENTION_HOURS: int = int(os.getenv('QUANTILE_RETENTION_HOURS', '168'))
+    QUANTILE_ACCURACY: float = float(os.getenv('QUANTILE_ACCURACY', '0.01'))
+
+    # Hours of hourly averages kept for the NowCast/AQI of devices and features
+    NOWCAST_HISTORY_HOURS: int = int(os.getenv('NOWCAST_HISTORY_HOURS', '168'))
+
+    # Alert notifications (email and webhooks, delivered in the background)
+    ENABLE_EMAIL_ALERTS: bool = os.getenv('ENABLE_EMAIL_ALERTS', 'false').lower() == 'true'
+    SMTP_HOST: str = os.getenv('SMTP_HOST', '')
+    SMTP_PORT: int = int(os.getenv('SMTP_PORT', '587'))
+    SMTP_USERNAME: str = os.getenv('SMTP_USERNAME', '')
+    SMTP_PASSWORD: str = os.getenv('SMTP_PASSWORD', '')
+    SMTP_FROM: str = os.getenv('SMTP_FROM', 'pm25-ghostbuster@thalay.eu')
+    SMTP_STARTTLS: bool = os.getenv('SMTP_STARTTLS', 'true').lower() == 'true'
+    SMTP_IDLE_SECONDS: float = float(os.getenv('SMTP_IDLE_SECONDS', '60'))
+    ALERT_EMAIL: str = os.getenv('ALERT_EMAIL', '')  # Comma-separated recipients
+    ALERT_WEBHOOK_URLS: str = os.getenv('ALERT_WEBHOOK_URLS', '')  # Comma-separated URLs
+    NOTIFY_DIGEST_SECONDS: float = float(os.getenv('NOTIFY_DIGEST_SECONDS', '30'))
+    NOTIFY_QUEUE_SIZE: int = int(os.getenv('NOTIFY_QUEUE_SIZE', '1000'))
+    NOTIFY_MAX_ATTEMPTS: int = int(os.getenv('NOTIFY_MAX_ATTEMPTS', '5'))
+    NOTIFY_RETRY_BACKOFF: float = float(os.getenv('NOTIFY_RETRY_BACKOFF', '2'))
+    NOTIFY_TIMEOUT: float = float(os.getenv('NOTIFY_TIMEOUT', '10'))
+    MAP_URL: str = os.getenv('MAP_URL', 'https://map.thalay.eu')
+
+    # Alert on the mean of a rolling window (5m, 1h or 24h) or the NowCast
+    # (nowcast) instead of raw readings
+    ALERT_WINDOW: str = os.getenv('ALERT_WINDOW', '')
+
+    # Geofence zones: GeoJSON polygons (empty disables), default window and
+    # PM2.5 mean above which a zone alerts, and readings needed in the window
+    GEOFENCE_ZONES_PATH: str = os.getenv('GEOFENCE_ZONES_PATH', '')
+    GEOFENCE_WINDOW_MINUTES: float = float(os.getenv('GEOFENCE_WINDOW_MINUTES', '15'))
+    GEOFENCE_ALERT_PM25: float = float(os.getenv('GEOFENCE_ALERT_PM25', '55.4'))
+    GEOFENCE_MIN_READINGS: int = int(os.getenv('GEOFENCE_MIN_READINGS', '3'))
+
+    # Districts: GeoJSON boundaries (empty disables), hours of hourly
+    # aggregates kept, and the choropleth written next to the GeoJSON output
+    DISTRICTS_PATH: str = os.getenv('DISTRICTS_PATH', '')
+    DISTRICT_HISTORY_HOURS: int = int(os.getenv('DISTRICT_HISTORY_HOURS', '168'))
+    DISTRICT_CHOROPLETH_HOURS: int = int(os.getenv('DISTRICT_CHOROPLETH_HOURS', '24'))
+    DISTRICT_GEOJSON_PATH: str = (os.getenv('DISTRICT_GEOJSON_PATH')
+                                  or os.path.join(os.path.dirname(GEOJSON_OUTPUT_PATH), 'pm25districts.geojson'))
+
+    # Persistent alert history (empty path keeps alerts in memory only)
+    ALERT_DB_PATH: str = os.getenv('ALERT_DB_PATH', '/var/lib/pm25/alerts.db')
+    ALERT_HISTORY_DAYS: int = int(os.getenv('ALERT_HISTORY_DAYS', '90'))
+
+    # On-demand profiling (empty token disables request profiling and memory snapshots)
+    PROFILING_TOKEN: str = os.getenv('PROFILING_TOKEN', '')
+    PROFILE_SAMPLE_INTERVAL: float = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))
+    PROFILE_GEOJSON_FRACTION: float = float(os.getenv('PROFILE_GEOJSON_FRACTION', '0'))
+
+    # Fraction of ingested measurements timed per pipeline stage (0 disables)
+    INGEST_TIMING_SAMPLE_RATE: float = float(os.getenv('INGEST_TIMING_SAMPLE_RATE', '0.1'))
+
+    # JSON library: orjson, ujson, json or auto (fastest installed)
+    JSON_CODEC: str = os.getenv('JSON_CODEC', 'auto')
 
     # Timezone
     DEFAULT_TIMEZONE: str = os.getenv('DEFAULT_TIMEZONE', 'Asia/Bangkok')
@@ -50,6 +155,11 @@ class Config:
     # Application Settings
     DEBUG: bool = os.getenv('DEBUG', 'false').lower() == 'true'
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT: str = os.getenv('LOG_FORMAT', 'text')  # text or json
+    LOG_ASYNC: bool = os.getenv('LOG_ASYNC', 'true').lower() == 'true'
+    LOG_QUEUE_SIZE: int = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    # Minimum seconds between per-measurement log lines (0 logs every measurement)
+    LOG_SAMPLE_INTERVAL: float = float(os.getenv('LOG_SAMPLE_INTERVAL', '10'))
 
     @classmethod
     def validate(cls) -> bool:
@@ -81,7 +191,9 @@ class Config:
         directories = [
             os.path.dirname(cls.GEOJSON_OUTPUT_PATH),
             os.path.dirname(cls.CSV_OUTPUT_PATH),
-            cls.LOG_PATH
+            cls.LOG_PATH,
+            cls.SNAPSHOT_PATH,
+            cls.EXPORT_PATH
         ]
 
         for directory in directories:
@@ -93,7 +93,9 @@ module.exports = {
       env: {
         NODE_ENV: 'production',
         PYTHONPATH: '.',
-        API_PORT: '5001'  // Different port if running separately
+        API_PORT: '5001',  // Different port if running separately
+        API_SERVER: 'gunicorn',  // Pre-fork workers sharing collector snapshots
+        API_WORKERS: '4'
       },
 
       // Logging
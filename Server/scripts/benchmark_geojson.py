@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+PM2.5 Ghostbuster - GeoJSON Encoding Benchmark
+Compares per-point feature building with the columnar encoder
+
+Runs on synthetic InfluxDB rows, so no database is needed:
+
+    python scripts/benchmark_geojson.py --points 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.timezone_utils import tz_manager
+from src.utils.geojson_columnar import encode_features
+
+
+def make_points(count: int, devices: int = 40):
+    """
+    Synthetic rows shaped like SELECT * FROM "air_quality" results
+
+    Half of the devices are fixed-location stations that repeat their
+    coordinates; the others move and report GPS positions and speed. PM2.5
+    has three decimals, so rounding to two hits ties such as 281.745.
+    """
+    rng = random.Random(42)
+    end = datetime.utcnow().replace(microsecond=0)
+    stations = {d: (round(13.7 + rng.uniform(-0.2, 0.2), 6), round(100.5 + rng.uniform(-0.2, 0.2), 6))
+                for d in range(devices // 2)}
+    points = []
+
+    for i in range(count):
+        device = i % devices
+        timestamp = end - timedelta(seconds=i * 2, microseconds=rng.randrange(1000000))
+
+        if device in stations:
+            latitude, longitude = stations[device]
+            speed = None
+        else:
+            latitude = round(13.7 + rng.uniform(-0.2, 0.2), 6)
+            longitude = round(100.5 + rng.uniform(-0.2, 0.2), 6)
+            speed = rng.choice([0.0, float(rng.randrange(1, 60))])
+
+        points.append({
+            'time': timestamp.isoformat() + 'Z',
+            'altitude': rng.choice([None, float(rng.randrange(0, 50))]),
+            'device_id': f"device{device:02d}",
+            'latitude': latitude,
+            'longitude': longitude,
+            'pm25': rng.randrange(1000, 300000) / 1000,
+            'speed': speed
+        })
+
+    return points
+
+
+def legacy_feature(point, formatted_time):
+    """Per-point feature construction as done before the columnar encoder"""
+    properties = {
+        "device_id": point.get("device_id", "unknown"),
+        "pm25": round(float(point.get("pm25", 0)), 2),
+        "time": formatted_time
+    }
+
+    if point.get("speed"):
+        properties["speed"] = round(float(point["speed"]), 1)
+
+    for key, value in point.items():
+        if key not in ["device_id", "pm25", "latitude", "longitude", "time", "speed"]:
+            properties[key] = value
+
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [
+                round(float(point.get("longitude", 0)), 6),
+                round(float(point.get("latitude", 0)), 6)
+            ]
+        },
+        "properties": properties
+    }
+
+
+def run_legacy(points):
+    # Times are converted in one batch for both encoders, so only the
+    # feature encoding is compared
+    times = tz_manager.format_utc_batch([point.get('time') for point in points])
+    features = []
+    for point, formatted_time in zip(points, times):
+        try:
+            features.append(json.dumps(legacy_feature(point, formatted_time), ensure_ascii=False,
+                                       separators=(',', ':')))
+        except Exception:
+            continue
+    return features
+
+
+def run_columnar(points):
+    times = tz_manager.format_utc_batch([point.get('time') for point in points])
+    return encode_features(points, times)
+
+
+def best_of(func, points, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(points)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark GeoJSON feature encoding')
+    parser.add_argument('--points', type=int, default=100000, help='Number of data points')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per encoder (best is reported)')
+    args = parser.parse_args()
+
+    points = make_points(args.points)
+
+    legacy_time, legacy = best_of(run_legacy, points, args.repeat)
+    columnar_time, columnar = best_of(run_columnar, points, args.repeat)
+
+    fallbacks = sum(1 for feature in columnar if feature is None)
+    mismatches = sum(1 for a, b in zip(legacy, columnar)
+                     if b is not None and json.loads(a) != json.loads(b))
+
+    print(f"Points:     {args.points}")
+    print(f"Per-point:  {legacy_time:.3f}s ({legacy_time / args.points * 1e6:.2f} us/point)")
+    print(f"Columnar:   {columnar_time:.3f}s ({columnar_time / args.points * 1e6:.2f} us/point)")
+    print(f"Speedup:    {legacy_time / columnar_time:.1f}x")
+    print(f"Fallbacks:  {fallbacks}")
+    print(f"Mismatches: {mismatches}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
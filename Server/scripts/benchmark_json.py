@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+PM2.5 Ghostbuster - JSON Codec Benchmark
+Times each JSON hot path with every installed JSON library
+
+Runs on synthetic data, so no broker or database is needed:
+
+    python scripts/benchmark_json.py
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from src.utils.json_codec import JSONCodec, BACKENDS, _available
+from src.services.api_service import CodecJSONProvider
+
+
+def make_payloads(count: int):
+    """MQTT payloads as published by the device firmware"""
+    rng = random.Random(42)
+    start = int(time.time())
+    return [
+        (f'{{"_type":"location","tid":"d{i % 40:02d}","pm25":{rng.randrange(1, 150)},'
+         f'"lat":{13.7 + rng.uniform(-0.2, 0.2):.6f},"lon":{100.5 + rng.uniform(-0.2, 0.2):.6f},'
+         f'"tst":{start + i},"batt":{rng.randrange(20, 100)},"vel":{rng.randrange(0, 60)}}}').encode('utf-8')
+        for i in range(count)
+    ]
+
+
+def make_points(count: int):
+    """Rows shaped like InfluxDB query results, as exported and served by the API"""
+    rng = random.Random(7)
+    end = datetime.utcnow().replace(microsecond=0)
+    return [{
+        'time': (end - timedelta(seconds=i * 2)).isoformat() + 'Z',
+        'device_id': f"device{i % 40:02d}",
+        'latitude': round(13.7 + rng.uniform(-0.2, 0.2), 6),
+        'longitude': round(100.5 + rng.uniform(-0.2, 0.2), 6),
+        'pm25': float(rng.randrange(1, 150)),
+        'speed': rng.choice([None, float(rng.randrange(0, 60))])
+    } for i in range(count)]
+
+
+def make_features(points):
+    """GeoJSON feature dictionaries as built per point"""
+    return [{
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [point['longitude'], point['latitude']]},
+        'properties': {'device_id': point['device_id'], 'pm25': point['pm25'], 'time': point['time']}
+    } for point in points]
+
+
+def best_of(func, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def benchmark_paths(codec: JSONCodec, payloads, points, features, repeat: int):
+    """Time every hot path with one codec"""
+    stdlib = codec.backend == 'json'
+
+    def mqtt_parse():
+        # The standard library path also pays for the separate decode
+        if stdlib:
+            for payload in payloads:
+                codec.loads(payload.decode('utf-8'))
+        else:
+            for payload in payloads:
+                codec.loads(payload)
+
+    app = Flask(__name__)
+    app.json = DefaultJSONProvider(app) if stdlib else CodecJSONProvider(app)
+    devices = points[:500]
+
+    def api_response():
+        with app.app_context():
+            for _ in range(20):
+                app.json.response(devices)
+
+    def geojson_features():
+        for feature in features:
+            codec.dumps(feature)
+
+    snapshot = {'published_at': time.time(), 'payload': points}
+
+    def snapshot_roundtrip():
+        codec.loads(codec.dumps_bytes(snapshot))
+
+    def export_lines():
+        for point in points:
+            codec.dumps(point)
+
+    return {
+        'MQTT payload parse': best_of(mqtt_parse, repeat),
+        'API jsonify (500 devices x20)': best_of(api_response, repeat),
+        'GeoJSON feature encode': best_of(geojson_features, repeat),
+        'Snapshot publish + load': best_of(snapshot_roundtrip, repeat),
+        'Export JSON rows': best_of(export_lines, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON hot paths per JSON library')
+    parser.add_argument('--count', type=int, default=50000, help='Messages/points per path')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per path (best is reported)')
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.count)
+    points = make_points(args.count)
+    features = make_features(points)
+
+    backends = [backend for backend in BACKENDS if _available(backend)]
+    results = {backend: benchmark_paths(JSONCodec(backend), payloads, points, features, args.repeat)
+               for backend in backends}
+
+    print(f"{'Path':32}" + ''.join(f"{backend:>18}" for backend in backends))
+    for path, baseline in results['json'].items():
+        cells = []
+        for backend in backends:
+            elapsed = results[backend][path]
+            cells.append(f"{elapsed * 1000:9.1f}ms {baseline / elapsed:5.1f}x")
+        print(f"{path:32}" + ''.join(f"{cell:>18}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
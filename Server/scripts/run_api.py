@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 """
 PM2.5 Ghostbuster - Standalone API Server
-For running the API server independently
+For running the API server independently of the data collector
+
+Supports a pre-fork multi-worker mode (gunicorn), a multi-threaded mode
+(waitress) and the Flask development server. Workers serve data products
+from the snapshots published by the data collector.
 
 Enhanced for v2.1.0 by Claude Code Assistant
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -13,17 +18,104 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from flask import Flask
+
 from config.settings import config
 from src.utils.logger import get_logger
 from src.services.influx_service import InfluxService
 from src.services.geojson_service import GeoJSONService
 from src.services.alert_service import AlertService
 from src.services.api_service import APIService
+from src.services.snapshot_service import SnapshotService
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn is optional and POSIX-only
+    BaseApplication = None
+
+try:
+    import waitress
+except ImportError:  # waitress is optional
+    waitress = None
+
+
+def create_app() -> Flask:
+    """
+    Create the API application
+
+    Called once per worker process, so every worker owns its own InfluxDB
+    client and snapshot cache.
+    """
+    influx_service = InfluxService()
+    geojson_service = GeoJSONService(influx_service)
+    alert_service = AlertService()
+    snapshot_service = SnapshotService()
+
+    api_service = APIService(influx_service, geojson_service, alert_service,
+                             snapshot_service=snapshot_service)
+    return api_service.get_app()
+
+
+if BaseApplication is not None:
+    class GunicornApplication(BaseApplication):
+        """Embedded gunicorn application creating the app in each worker"""
+
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return create_app()
+
+
+def resolve_server(requested: str) -> str:
+    """
+    Resolve the server implementation to use
+
+    Args:
+        requested: 'auto', 'gunicorn', 'waitress' or 'flask'
+
+    Returns:
+        Available server implementation
+    """
+    available = {
+        'gunicorn': BaseApplication is not None,
+        'waitress': waitress is not None,
+        'flask': True
+    }
+
+    if requested == 'auto':
+        return next(name for name, ok in available.items() if ok)
+
+    if not available.get(requested):
+        raise ValueError(f"API server '{requested}' is not installed")
+
+    return requested
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments (defaults come from configuration)"""
+    parser = argparse.ArgumentParser(description='PM2.5 Ghostbuster standalone API server')
+    parser.add_argument('--host', default=config.API_HOST, help='Host to bind to')
+    parser.add_argument('--port', type=int, default=config.API_PORT, help='Port to bind to')
+    parser.add_argument('--server', default=config.API_SERVER,
+                        choices=['auto', 'gunicorn', 'waitress', 'flask'],
+                        help='Server implementation')
+    parser.add_argument('--workers', type=int, default=config.API_WORKERS,
+                        help='Worker processes (gunicorn)')
+    parser.add_argument('--threads', type=int, default=config.API_THREADS,
+                        help='Threads per worker')
+    return parser.parse_args()
 
 
 def main():
     """Main entry point for standalone API server"""
     logger = get_logger('api_server')
+    args = parse_args()
 
     try:
         # Validate configuration
@@ -31,26 +123,30 @@ def main():
             logger.error("Invalid configuration. Please check your .env file.")
             sys.exit(1)
 
-        # Initialize services
-        influx_service = InfluxService()
-        geojson_service = GeoJSONService(influx_service)
-        alert_service = AlertService()
-
-        # Create API service
-        api_service = APIService(influx_service, geojson_service, alert_service)
-
-        # Get configuration
-        api_port = getattr(config, 'API_PORT', 5001)
-        api_host = getattr(config, 'API_HOST', '0.0.0.0')
+        server = resolve_server(args.server)
 
         logger.info("Starting PM2.5 Ghostbuster API Server")
         logger.info(f"Version: 2.1.0")
         logger.info(f"Enhanced by Claude Code Assistant")
-        logger.info(f"Server: {api_host}:{api_port}")
+        logger.info(f"Server: {args.host}:{args.port} ({server}, "
+                    f"{args.workers} workers x {args.threads} threads)")
         logger.info(f"Debug mode: {config.DEBUG}")
 
-        # Run the API server
-        api_service.run(host=api_host, port=api_port, debug=config.DEBUG)
+        if server == 'gunicorn':
+            GunicornApplication({
+                'bind': f"{args.host}:{args.port}",
+                'workers': args.workers,
+                'threads': args.threads,
+                'worker_class': 'gthread',
+                'preload_app': False,  # Create InfluxDB clients after fork
+                'timeout': 120
+            }).run()
+        elif server == 'waitress':
+            if args.workers > 1:
+                logger.warning("waitress runs a single process; using threads only")
+            waitress.serve(create_app(), host=args.host, port=args.port, threads=args.threads)
+        else:
+            create_app().run(host=args.host, port=args.port, debug=config.DEBUG, threaded=True)
 
     except KeyboardInterrupt:
         logger.info("Shutting down API server...")
@@ -60,4 +156,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
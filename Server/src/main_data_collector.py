@@ -5,22 +5,40 @@ Enhanced version with alerts, API, and advanced monitoring
 Enhanced for v2.1.0 by Claude Code Assistant
 """
 
+import calendar
+import math
+import random
 import sys
 import time
 import threading
+from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from config.settings import config
-from src.utils.logger import get_logger
+from src.utils.logger import get_logger, SampledLog
+from src.utils.data_version import data_version
+from src.utils.metrics import metrics
+from src.utils.ingest_timing import ingest_timing
+from src.utils.profiling import profile_block
 from src.services.mqtt_service import MQTTService
-from src.services.influx_service import InfluxService
+from src.services.influx_service import InfluxService, query_caller
 from src.services.geojson_service import GeoJSONService
 from src.services.alert_service import AlertService
 from src.services.api_service import APIService
+from src.services.change_feed import ChangeFeed
+from src.services.push_service import PushService
+from src.services.snapshot_service import SnapshotService
+from src.services.rolling_stats import RollingStats
+from src.services.quantile_stats import QuantileStats
+from src.services.nowcast_service import NowCastService
+from src.services.geofence_service import GeofenceService
+from src.services.district_service import DistrictService
 from src.models.air_quality import AirQualityMeasurement
 
 
@@ -30,12 +48,27 @@ class PM25DataCollector:
     def __init__(self):
         """Initialize the enhanced data collector"""
         self.logger = get_logger('data_collector')
+        self._stored_log = SampledLog(self.logger, 'stored_measurement')
 
         # Initialize services
         self.influx_service = InfluxService()
-        self.geojson_service = GeoJSONService(self.influx_service)
-        self.alert_service = AlertService()
-        self.api_service = APIService(self.influx_service, self.geojson_service, self.alert_service)
+        self.change_feed = ChangeFeed()
+        self.nowcast_service = NowCastService()
+        self.geojson_service = GeoJSONService(self.influx_service, self.change_feed, self.nowcast_service)
+        self.quantile_stats = QuantileStats()
+        self.rolling_stats = RollingStats(self.quantile_stats)
+        self.geofence_service = GeofenceService()
+        self.district_service = DistrictService()
+        self.alert_service = AlertService(rolling_stats=self.rolling_stats,
+                                          nowcast_service=self.nowcast_service)
+        self.push_service = PushService()
+        self.snapshot_service = SnapshotService()
+        self.api_service = APIService(self.influx_service, self.geojson_service, self.alert_service,
+                                      self.change_feed, self.push_service,
+                                      rolling_stats=self.rolling_stats,
+                                      quantile_stats=self.quantile_stats,
+                                      geofence_service=self.geofence_service,
+                                      district_service=self.district_service)
         self.mqtt_service = MQTTService(self._process_measurement)
 
         self.running = False
@@ -49,6 +82,11 @@ class PM25DataCollector:
         # Setup alert notifications
         self.alert_service.add_notification_callback(self._handle_alert_notification)
 
+        # This process sees every ingest, so the API may answer conditional requests
+        data_version.start_tracking()
+
+        metrics.register_collector(self._collect_metrics)
+
     def _process_measurement(self, measurement: AirQualityMeasurement) -> None:
         """
         Enhanced measurement processing with alerts and statistics
@@ -56,22 +94,48 @@ class PM25DataCollector:
         Args:
             measurement: Air quality measurement from MQTT
         """
+        trace = ingest_timing.current()
+
         try:
             # Update statistics
             self.stats['messages_processed'] += 1
             self.stats['last_measurement_time'] = time.time()
 
-            # Store in InfluxDB
-            success = self.influx_service.write_measurement(measurement)
+            # Store in InfluxDB, tagged with its district
+            self.district_service.tag(measurement)
+            with query_caller('ingest'):
+                success = self.influx_service.write_measurement(measurement)
+            if trace:
+                trace.mark('write')
 
             if success:
-                self.logger.info(f"Stored measurement: {measurement}")
+                data_version.bump()
+                self.nowcast_service.add_measurement(measurement)
+                feature = self.geojson_service.measurement_to_feature(measurement)
+                self.change_feed.append(feature)
+                self.push_service.publish_measurement(feature)
+                self._stored_log.log("Stored measurement: %s", measurement)
+                if trace:
+                    trace.mark('publish')
+
+                # Update rolling aggregates before alerts, which may use window means
+                self.rolling_stats.add_measurement(measurement)
+                self.quantile_stats.add_measurement(measurement)
+                self.district_service.add_measurement(measurement)
+                zone_states = self.geofence_service.add_measurement(measurement)
 
                 # Process for alerts
                 alert = self.alert_service.process_measurement(measurement)
                 if alert:
-                    self.stats['alerts_generated'] += 1
-                    self.logger.warning(f"Alert generated: {alert.message}")
+                    self._publish_alert(alert)
+                if zone_states:
+                    for alert in self.alert_service.process_zone_states(zone_states, measurement.timestamp):
+                        self._publish_alert(alert)
+                if trace:
+                    trace.mark('alerts')
+
+                if trace:
+                    ingest_timing.finish(measurement.timestamp)
 
             else:
                 self.logger.error(f"Failed to store measurement: {measurement}")
@@ -79,6 +143,32 @@ class PM25DataCollector:
         except Exception as e:
             self.logger.error(f"Error processing measurement: {e}")
 
+    def _publish_alert(self, alert) -> None:
+        """Count a generated alert and push it to live subscribers"""
+        self.stats['alerts_generated'] += 1
+        self.push_service.publish_alert(alert.to_dict())
+        self.logger.warning(f"Alert generated: {alert.message}")
+
+    def _collect_metrics(self):
+        """Ingest statistics for the metrics scrape"""
+        families = [
+            ('pm25_messages_processed_total', 'counter', 'MQTT measurements processed',
+             [({}, self.stats['messages_processed'])]),
+            ('pm25_alerts_generated_total', 'counter', 'Alerts generated from measurements',
+             [({}, self.stats['alerts_generated'])]),
+            ('pm25_uptime_seconds', 'gauge', 'Data collector uptime',
+             [({}, time.time() - self.stats['start_time'])]),
+            ('pm25_push_subscribers', 'gauge', 'Connected live push subscribers',
+             [({}, self.push_service.subscriber_count())])
+        ]
+
+        if self.stats['last_measurement_time']:
+            families.append(('pm25_last_measurement_timestamp_seconds', 'gauge',
+                             'UNIX time of the last processed measurement',
+                             [({}, self.stats['last_measurement_time'])]))
+
+        return families
+
     def _handle_alert_notification(self, alert) -> None:
         """
         Handle alert notifications
@@ -87,7 +177,7 @@ class PM25DataCollector:
             alert: Alert instance
         """
         self.logger.warning(f"NOTIFICATION: {alert.level.value.upper()} alert for device {alert.device_id}")
-        # Additional notification logic can be added here (e.g., webhook calls)
+        # Email and webhooks are sent by the alert service's notification dispatcher
 
     def _generate_geojson_periodically(self) -> None:
         """Generate GeoJSON files periodically"""
@@ -101,12 +191,21 @@ class PM25DataCollector:
                 if current_time - last_update >= config.GEOJSON_UPDATE_INTERVAL:
                     self.logger.info("Generating GeoJSON file...")
 
-                    success = self.geojson_service.save_geojson_file()
+                    profiled = random.random() < config.PROFILE_GEOJSON_FRACTION
+
+                    with query_caller('geojson_job'), profile_block('geojson', profiled):
+                        success = self.geojson_service.save_geojson_file()
+
+                        if success:
+                            self.logger.info("GeoJSON file updated successfully")
+                        else:
+                            self.logger.error("Failed to update GeoJSON file")
 
-                    if success:
-                        self.logger.info("GeoJSON file updated successfully")
-                    else:
-                        self.logger.error("Failed to update GeoJSON file")
+                        if config.PUBLISH_SNAPSHOTS:
+                            self._publish_data_snapshots()
+
+                        if self.district_service.enabled:
+                            self.district_service.save_choropleth()
 
                     last_update = current_time
 
@@ -116,6 +215,128 @@ class PM25DataCollector:
                 self.logger.error(f"Error in GeoJSON generation loop: {e}")
                 time.sleep(30)  # Wait longer on error
 
+    def _publish_data_snapshots(self) -> None:
+        """Publish summary, device, district and quantile snapshots for standalone API workers"""
+        # Taken before reading, so a snapshot never claims newer data than it has
+        version = data_version.current()
+        if self.district_service.enabled:
+            self.snapshot_service.publish('districts', self.district_service.snapshot(), version)
+        if self.quantile_stats.ready:
+            # Workers merge these for summaries and device stats of any window
+            self.snapshot_service.publish('quantiles', self.quantile_stats.to_state(), version)
+
+        data_points = self.influx_service.query_recent_data(24)
+        if data_points is None:
+            return
+
+        if self.quantile_stats.ready:
+            summary = self.quantile_stats.summary(24)
+        else:
+            summary = self.geojson_service.get_summary_stats(data_points)
+        if summary is not None:
+            self.snapshot_service.publish('summary', summary, version)
+
+        devices = self.geojson_service.get_device_list(data_points)
+        self.snapshot_service.publish('devices', devices, version)
+
+    def _warm_up_statistics(self) -> None:
+        """Load stored data into the rolling aggregates, quantile sketches, NowCast and districts"""
+        hours = max(24, self.quantile_stats.retention_hours, self.nowcast_service.history_hours)
+        now = time.time()
+        # Each aggregate only takes the readings inside its own history
+        nowcast_cutoff = now - self.nowcast_service.history_hours * 3600
+        district_cutoff = now - self.district_service.history_hours * 3600 if self.district_service.enabled \
+            else math.inf
+        zone_cutoff = now - max((zone.window_seconds for zone in self.geofence_service.zones), default=0)
+        count = 0
+        # NowCast and district readings are buffered per chunk and added with
+        # the vectorized load_history, so the buffers stay bounded
+        nowcast_rows = ([], [], [])
+        district_rows = ([], [], [], [])
+
+        def flush() -> None:
+            if nowcast_rows[0]:
+                self.nowcast_service.load_history(
+                    nowcast_rows[0], np.array(nowcast_rows[1]), np.array(nowcast_rows[2]))
+            if district_rows[0]:
+                self.district_service.load_history(*district_rows)
+            for rows in nowcast_rows + district_rows:
+                rows.clear()
+
+        try:
+            # Readings are added as the slices stream in, so only one slice is held in memory
+            with query_caller('stats_warm_up'):
+                for point in self.influx_service.iter_recent_data(hours):
+                    device_id, pm25 = point.get('device_id'), point.get('pm25')
+                    if not device_id or pm25 is None:
+                        continue
+                    pm25 = float(pm25)
+                    # RFC3339 UTC times; whole seconds are enough for the bucket widths
+                    timestamp = calendar.timegm(datetime.fromisoformat(point['time'][:19]).timetuple())
+                    self.rolling_stats.add(device_id, pm25, timestamp)
+                    self.quantile_stats.add(device_id, pm25, timestamp)
+                    if timestamp >= nowcast_cutoff:
+                        nowcast_rows[0].append(device_id)
+                        nowcast_rows[1].append(timestamp)
+                        nowcast_rows[2].append(pm25)
+                    count += 1
+
+                    latitude, longitude = point.get('latitude'), point.get('longitude')
+                    if latitude is not None and longitude is not None:
+                        if timestamp >= zone_cutoff:
+                            self.geofence_service.add(latitude, longitude, pm25, timestamp)
+                        if timestamp >= district_cutoff:
+                            district_rows[0].append(float(latitude))
+                            district_rows[1].append(float(longitude))
+                            district_rows[2].append(timestamp)
+                            district_rows[3].append(pm25)
+
+                    if count % config.GEOJSON_STREAM_CHUNK_FEATURES == 0:
+                        flush()
+                flush()
+        except Exception as e:
+            self.logger.error(f"Failed to load recent data, statistics fall back to InfluxDB: {e}")
+            return
+
+        self.rolling_stats.ready = True
+        self.quantile_stats.ready = True
+        self.logger.info(f"Statistics warmed up from {count} data points of the last {hours} hours")
+
+    def _publish_state_snapshots_periodically(self) -> None:
+        """Re-evaluate zones, sync alert acknowledgements and publish snapshots for standalone API workers"""
+        while self.running:
+            try:
+                if self.geofence_service.enabled:
+                    # Also clears alerts of zones that readings stopped passing through
+                    for alert in self.alert_service.process_zone_states(self.geofence_service.states()):
+                        self._publish_alert(alert)
+
+                # Acknowledgements made through standalone API workers
+                self.alert_service.sync_acknowledgements()
+
+                if config.PUBLISH_SNAPSHOTS:
+                    version = data_version.current()
+                    etag, last_modified = version
+                    self.snapshot_service.publish('version', {
+                        'etag': etag,
+                        'last_modified': last_modified
+                    })
+                    self.snapshot_service.publish('ingest', ingest_timing.get_summary())
+                    if self.rolling_stats.ready:
+                        self.snapshot_service.publish('rolling', self.rolling_stats.snapshot())
+                    if self.geofence_service.enabled:
+                        self.snapshot_service.publish('zones', self.geofence_service.zone_stats())
+                    self.snapshot_service.publish('alerts', {
+                        'active': [alert.to_dict() for alert in self.alert_service.get_active_alerts()],
+                        'summary': self.alert_service.get_alert_summary()
+                    }, version)
+
+                time.sleep(config.SNAPSHOT_INTERVAL)
+
+            except Exception as e:
+                self.logger.error(f"Error in snapshot publishing loop: {e}")
+                time.sleep(30)  # Wait longer on error
+
     def _log_statistics_periodically(self) -> None:
         """Log system statistics periodically"""
         while self.running:
@@ -130,6 +351,10 @@ class PM25DataCollector:
                                f"Alerts: {self.stats['alerts_generated']}, "
                                f"Active Alerts: {len(self.alert_service.get_active_alerts())}")
 
+                timing = ingest_timing.format_summary()
+                if timing:
+                    self.logger.info(f"Ingest timing: {timing}")
+
                 # Log alert summary
                 alert_summary = self.alert_service.get_alert_summary()
                 if alert_summary['active_alerts'] > 0:
@@ -156,6 +381,9 @@ class PM25DataCollector:
             self.logger.error("Failed to connect to InfluxDB")
             return
 
+        # Fill the in-memory statistics before live measurements arrive
+        self._warm_up_statistics()
+
         # Connect to MQTT broker
         if not self.mqtt_service.connect():
             self.logger.error("Failed to connect to MQTT broker")
@@ -168,16 +396,31 @@ class PM25DataCollector:
             geojson_thread = threading.Thread(target=self._generate_geojson_periodically, daemon=True)
             geojson_thread.start()
 
-            # Start API server in background if enabled
-            api_enabled = getattr(config, 'ENABLE_API', True)
-            if api_enabled:
-                api_port = getattr(config, 'API_PORT', 5000)
+            # Re-evaluate zones and publish shared snapshots for standalone API workers
+            snapshot_thread = threading.Thread(target=self._publish_state_snapshots_periodically, daemon=True)
+            snapshot_thread.start()
+
+            # Start API server in background if enabled. For production, set
+            # ENABLE_API=false and run scripts/run_api.py with multiple workers
+            # so the API is isolated from ingest.
+            if config.ENABLE_API:
+                api_port = config.API_PORT
                 api_thread = threading.Thread(
-                    target=lambda: self.api_service.run(port=api_port, debug=config.DEBUG),
+                    target=lambda: self.api_service.run(host=config.API_HOST, port=api_port, debug=config.DEBUG),
                     daemon=True
                 )
                 api_thread.start()
                 self.logger.info(f"API server started on port {api_port}")
+            elif config.LIVE_API_PORT:
+                # API workers have no change feed or push subscribers; serve
+                # those routes from here for the proxy to route to
+                live_thread = threading.Thread(
+                    target=lambda: self.api_service.run(host=config.API_HOST, port=config.LIVE_API_PORT,
+                                                        debug=False),
+                    daemon=True
+                )
+                live_thread.start()
+                self.logger.info(f"Live API (changes, stream, ws) started on port {config.LIVE_API_PORT}")
 
             # Start statistics logging thread
             stats_thread = threading.Thread(target=self._log_statistics_periodically, daemon=True)
@@ -205,6 +448,9 @@ class PM25DataCollector:
         if self.mqtt_service:
             self.mqtt_service.disconnect()
 
+        # Send pending alert digests before exiting
+        self.alert_service.dispatcher.stop()
+
     def health_check(self) -> bool:
         """
         Perform health check
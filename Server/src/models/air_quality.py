@@ -3,10 +3,11 @@ Air Quality Data Models
 Defines data structures for PM2.5 measurements
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
-import json
+from typing import Optional, Dict, Any, Union
+
+from src.utils.json_codec import json_codec
 
 
 @dataclass
@@ -20,6 +21,7 @@ class AirQualityMeasurement:
     timestamp: datetime
     speed: Optional[float] = None
     additional_data: Optional[Dict[str, Any]] = None
+    district: Optional[str] = None  # District ID assigned at ingest
 
     def to_influx_point(self) -> Dict[str, Any]:
         """
@@ -40,11 +42,13 @@ class AirQualityMeasurement:
         if self.additional_data:
             fields.update(self.additional_data)
 
+        tags = {"device_id": self.device_id}
+        if self.district is not None:
+            tags["district"] = self.district
+
         return {
             "measurement": "air_quality",
-            "tags": {
-                "device_id": self.device_id
-            },
+            "tags": tags,
             "time": self.timestamp,
             "fields": fields
         }
@@ -78,13 +82,13 @@ class AirQualityMeasurement:
         }
 
     @classmethod
-    def from_mqtt_payload(cls, device_id: str, payload: str) -> 'AirQualityMeasurement':
+    def from_mqtt_payload(cls, device_id: str, payload: Union[bytes, str]) -> 'AirQualityMeasurement':
         """
         Create measurement from MQTT payload
 
         Args:
             device_id: Device identifier
-            payload: JSON payload string
+            payload: JSON payload, raw UTF-8 bytes or string
 
         Returns:
             AirQualityMeasurement instance
@@ -93,13 +97,16 @@ class AirQualityMeasurement:
             ValueError: If payload is invalid
         """
         try:
-            data = json.loads(payload)
+            data = json_codec.loads(payload)
 
             # Handle different timestamp formats
             if 'tst' in data:
                 timestamp = datetime.utcfromtimestamp(data['tst'])
             elif 'timestamp' in data:
                 timestamp = datetime.fromisoformat(data['timestamp'])
+                if timestamp.tzinfo is not None:
+                    # Timestamps are naive UTC throughout, as for 'tst'
+                    timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
             else:
                 timestamp = datetime.utcnow()
 
@@ -114,7 +121,7 @@ class AirQualityMeasurement:
                                if k not in ['pm25', 'lat', 'lon', 'tst', 'timestamp', 'speed']}
             )
 
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
+        except (KeyError, ValueError) as e:  # Decode errors of every codec are ValueErrors
             raise ValueError(f"Invalid MQTT payload: {e}")
 
     def __str__(self) -> str:
@@ -6,18 +6,26 @@ Enhanced for v2.1.0 by Claude Code Assistant
 """
 
 import json
+import sqlite3
+import threading
+from bisect import bisect_right
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable
+from typing import Any, Deque, Dict, List, Optional, Callable, Sequence
 from dataclasses import dataclass, asdict
 from enum import Enum
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+
+import numpy as np
 
 from config.settings import config
 from src.utils.logger import get_logger
-from src.utils.timezone_utils import tz_manager
+from src.utils.data_version import data_version
 from src.models.air_quality import AirQualityMeasurement
+from src.services.alert_store import AlertStore, to_micros
+from src.services.notification_service import NotificationDispatcher
+from src.services.rolling_stats import RollingStats, WINDOWS
+from src.services.nowcast_service import NowCastService, nowcast_for_readings
+from src.services.geofence_service import ZoneState
 
 
 class AlertLevel(Enum):
@@ -50,10 +58,43 @@ class Alert:
     timestamp: datetime
     message: str
     acknowledged: bool = False
+    alert_id: Optional[int] = None
+
+    def to_dict(self) -> Dict:
+        """Convert to JSON-serializable dictionary"""
+        return {
+            'id': self.alert_id,
+            'device_id': self.device_id,
+            'level': self.level.value,
+            'pm25_value': self.pm25_value,
+            'location': self.location,
+            'timestamp': self.timestamp.isoformat(),
+            'message': self.message,
+            'acknowledged': self.acknowledged
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Alert':
+        """Create alert from a to_dict/AlertStore dictionary"""
+        return cls(
+            device_id=data['device_id'],
+            level=AlertLevel(data['level']),
+            pm25_value=data['pm25_value'],
+            location=data['location'],
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            message=data['message'],
+            acknowledged=data['acknowledged'],
+            alert_id=data.get('id')
+        )
 
 
 class AlertService:
-    """Service for managing PM2.5 alerts and notifications"""
+    """
+    Service for managing PM2.5 alerts and notifications
+
+    Measurements are evaluated on the ingest thread and zones on the
+    snapshot thread, so alert state is only changed and read under a lock.
+    """
 
     # WHO/EPA PM2.5 thresholds (μg/m³)
     THRESHOLDS = [
@@ -68,16 +109,86 @@ class AlertService:
                       "Air quality is hazardous")
     ]
 
-    def __init__(self):
-        """Initialize the alert service"""
+    def __init__(self, store: Optional[AlertStore] = None,
+                 dispatcher: Optional[NotificationDispatcher] = None,
+                 rolling_stats: Optional[RollingStats] = None,
+                 nowcast_service: Optional[NowCastService] = None):
+        """
+        Initialize the alert service
+
+        Args:
+            store: Persistent alert store (opened from config if None; an empty
+                   ALERT_DB_PATH keeps alerts in memory only)
+            dispatcher: Email/webhook notification dispatcher (configured from config if None)
+            rolling_stats: Per-device rolling aggregates, needed to alert on
+                           window means (ALERT_WINDOW)
+            nowcast_service: Per-device NowCast, needed to alert on the
+                             NowCast (ALERT_WINDOW=nowcast)
+        """
         self.logger = get_logger('alert_service')
+        # Guards active_alerts and alert_history; reentrant for notification callbacks
+        self._lock = threading.RLock()
         self.active_alerts: Dict[str, Alert] = {}
-        self.alert_history: List[Alert] = []
+        # Recent alerts, only kept when there is no store
+        self.alert_history: Deque[Alert] = deque(maxlen=1000)
+        self._next_alert_id = 1
         self.notification_callbacks: List[Callable[[Alert], None]] = []
 
+        self.store = store
+        if self.store is None and config.ALERT_DB_PATH:
+            try:
+                self.store = AlertStore()
+            except (OSError, sqlite3.Error) as e:
+                self.logger.error(f"Failed to open alert store, keeping alerts in memory: {e}")
+
+        if self.store:
+            self._load_active_alerts()
+
         # Load alert configuration
-        self.email_enabled = bool(config.SMTP_HOST if hasattr(config, 'SMTP_HOST') else None)
+        self.dispatcher = dispatcher or NotificationDispatcher()
         self.min_alert_level = getattr(config, 'MIN_ALERT_LEVEL', AlertLevel.UNHEALTHY.value)
+        self._build_threshold_index()
+
+        # Rolling window whose mean is compared to the thresholds, 'nowcast'
+        # for the EPA NowCast ('' for raw readings)
+        self.rolling_stats = rolling_stats
+        self.nowcast_service = nowcast_service
+        self.alert_window = config.ALERT_WINDOW
+        if self.alert_window and self.alert_window not in WINDOWS and self.alert_window != 'nowcast':
+            self.logger.error(f"Unknown ALERT_WINDOW {self.alert_window}, alerting on raw readings")
+            self.alert_window = ''
+
+    def _load_active_alerts(self) -> None:
+        """Restore active alerts from the store, so a restart does not re-fire them"""
+        try:
+            for data in self.store.load_active():
+                alert = Alert.from_dict(data)
+                self.active_alerts[alert.device_id] = alert
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.error(f"Failed to load active alerts: {e}")
+            return
+
+        if self.active_alerts:
+            self.logger.info(f"Restored {len(self.active_alerts)} active alerts")
+
+    def _build_threshold_index(self) -> None:
+        """
+        Precompute threshold bounds and level positions
+
+        Levels are compared by their position in THRESHOLDS. Call again after
+        changing THRESHOLDS or min_alert_level.
+        """
+        self._lower_bounds = [t.min_pm25 for t in self.THRESHOLDS]
+        self._upper_bounds = [t.max_pm25 for t in self.THRESHOLDS]
+        self._lower_array = np.array(self._lower_bounds, dtype=np.float64)
+        self._upper_array = np.array(self._upper_bounds, dtype=np.float64)
+        self._level_index = {t.level: i for i, t in enumerate(self.THRESHOLDS)}
+
+        # An unknown minimum level disables alerts
+        self._min_level_index = next((i for i, t in enumerate(self.THRESHOLDS)
+                                      if t.level.value == self.min_alert_level), len(self.THRESHOLDS))
+        if self._min_level_index == len(self.THRESHOLDS):
+            self.logger.error(f"Unknown MIN_ALERT_LEVEL {self.min_alert_level}, alerts are disabled")
 
     def add_notification_callback(self, callback: Callable[[Alert], None]) -> None:
         """Add a notification callback function"""
@@ -93,12 +204,22 @@ class AlertService:
         Returns:
             AlertThreshold for the PM2.5 level
         """
-        for threshold in self.THRESHOLDS:
-            if threshold.min_pm25 <= pm25_value <= threshold.max_pm25:
-                return threshold
+        return self.THRESHOLDS[self._level_position(pm25_value)]
+
+    def _level_position(self, pm25_value: float) -> int:
+        """Position in THRESHOLDS of the band containing the value"""
+        i = bisect_right(self._lower_bounds, pm25_value) - 1
+        if i >= 0 and pm25_value <= self._upper_bounds[i]:
+            return i
 
         # Default to hazardous for very high values
-        return self.THRESHOLDS[-1]
+        return len(self.THRESHOLDS) - 1
+
+    def _level_positions(self, pm25_values: np.ndarray) -> np.ndarray:
+        """Vectorized _level_position for an array of values"""
+        positions = np.searchsorted(self._lower_array, pm25_values, side='right') - 1
+        in_band = (positions >= 0) & (pm25_values <= self._upper_array[np.clip(positions, 0, None)])
+        return np.where(in_band, positions, len(self.THRESHOLDS) - 1)
 
     def process_measurement(self, measurement: AirQualityMeasurement) -> Optional[Alert]:
         """
@@ -111,53 +232,176 @@ class AlertService:
             Alert if threshold exceeded, None otherwise
         """
         try:
-            threshold = self.get_alert_level(measurement.pm25)
-
-            # Check if we should trigger an alert
-            should_alert = self._should_trigger_alert(measurement.device_id, threshold)
-
-            if should_alert:
-                alert = Alert(
-                    device_id=measurement.device_id,
-                    level=threshold.level,
-                    pm25_value=measurement.pm25,
-                    location={
-                        'latitude': measurement.latitude,
-                        'longitude': measurement.longitude
-                    },
-                    timestamp=measurement.timestamp,
-                    message=f"{threshold.message}. PM2.5: {measurement.pm25} μg/m³"
-                )
-
-                self._trigger_alert(alert)
-                return alert
-
-            # Clear alert if conditions improved
-            self._clear_alert_if_improved(measurement.device_id, threshold)
-            return None
+            window_mean = None
+            if self.alert_window == 'nowcast':
+                if self.nowcast_service is not None:
+                    window_mean = self.nowcast_service.current_nowcast(measurement.device_id)
+            elif self.alert_window and self.rolling_stats is not None:
+                window_mean = self.rolling_stats.window_mean(measurement.device_id, self.alert_window)
+            if window_mean is None:
+                return self._evaluate(measurement, self._level_position(measurement.pm25))
+
+            window_mean = round(window_mean, 1)
+            return self._evaluate(measurement, self._level_position(window_mean), pm25_value=window_mean)
 
         except Exception as e:
             self.logger.error(f"Error processing measurement for alerts: {e}")
             return None
 
-    def _should_trigger_alert(self, device_id: str, threshold: AlertThreshold) -> bool:
+    def process_measurements(self, measurements: Sequence[AirQualityMeasurement],
+                             notify: bool = True) -> List[Alert]:
+        """
+        Process a batch of measurements in order, e.g. to re-evaluate
+        history after a backfill or a threshold change
+
+        Levels are looked up for the whole batch at once. A measurement can
+        only change alert state when its level differs from the device's
+        previous measurement in the batch, or directly after such a change
+        (a cleared alert can re-trigger), so only those are evaluated.
+
+        With ALERT_WINDOW set, each measurement is judged by the mean of its
+        device's readings in the batch over the window ending at it, or by
+        the NowCast of its hour computed from the batch.
+
+        Args:
+            measurements: Measurements in time order
+            notify: Send notifications for triggered alerts
+
+        Returns:
+            Alerts triggered by the batch
+        """
+        alerts = []
+        if not measurements:
+            return alerts
+
+        try:
+            pm25_values = np.fromiter((m.pm25 for m in measurements), dtype=np.float64,
+                                      count=len(measurements))
+            _, devices = np.unique([m.device_id for m in measurements], return_inverse=True)
+            if self.alert_window:
+                pm25_values = np.round(self._window_means(measurements, devices.reshape(-1), pm25_values), 1)
+            positions = self._level_positions(pm25_values)
+
+            # Group by device, keeping time order within each device
+            order = np.argsort(devices.reshape(-1), kind='stable')
+            grouped_devices = devices.reshape(-1)[order]
+            grouped_positions = positions[order]
+
+            same_device = grouped_devices[1:] == grouped_devices[:-1]
+            changed = np.ones(len(order), dtype=bool)
+            changed[1:] = ~same_device | (grouped_positions[1:] != grouped_positions[:-1])
+            candidates = changed.copy()
+            candidates[1:] |= changed[:-1] & same_device
+
+            for i in np.sort(order[candidates]).tolist():
+                alert = self._evaluate(measurements[i], int(positions[i]), notify,
+                                       float(pm25_values[i]) if self.alert_window else None)
+                if alert:
+                    alerts.append(alert)
+
+        except Exception as e:
+            self.logger.error(f"Error processing measurement batch for alerts: {e}")
+
+        return alerts
+
+    def _window_means(self, measurements: Sequence[AirQualityMeasurement], devices: np.ndarray,
+                      pm25_values: np.ndarray) -> np.ndarray:
+        """
+        Mean of each device's values over ALERT_WINDOW ending at each
+        measurement, or the NowCast at its hour for ALERT_WINDOW=nowcast
+
+        Args:
+            measurements: Measurements of the batch
+            devices: Device code of each measurement
+            pm25_values: PM2.5 value of each measurement
+
+        Returns:
+            Window mean per measurement, in batch order
+        """
+        times = np.fromiter((to_micros(m.timestamp) / 1e6 for m in measurements), dtype=np.float64,
+                            count=len(measurements))
+        if self.alert_window == 'nowcast':
+            nowcasts = nowcast_for_readings(devices, times, pm25_values)
+            # Raw readings where the NowCast is not defined yet
+            return np.where(np.isnan(nowcasts), pm25_values, nowcasts)
+
+        span = WINDOWS[self.alert_window][0]
+
+        # Sort by device, then time; device codes are spaced further apart than any time
+        keys = devices * 1e10 + times
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        sums = np.concatenate(([0.0], np.cumsum(pm25_values[order])))
+
+        # Window of each measurement: same-device readings in (time - span, time]
+        ends = np.arange(1, len(order) + 1)
+        starts = np.searchsorted(sorted_keys, sorted_keys - span, side='right')
+        means = np.empty(len(order))
+        means[order] = (sums[ends] - sums[starts]) / (ends - starts)
+        return means
+
+    def _evaluate(self, measurement: AirQualityMeasurement, level_index: int,
+                  notify: bool = True, pm25_value: Optional[float] = None) -> Optional[Alert]:
+        """
+        Update alert state for a measurement at a known level
+
+        Args:
+            measurement: Air quality measurement
+            level_index: Position of the measurement's level in THRESHOLDS
+            notify: Send notifications if an alert is triggered
+            pm25_value: Value the level was determined from (the window mean
+                        with ALERT_WINDOW set, the measurement's PM2.5 if None)
+
+        Returns:
+            Alert if triggered, None otherwise
+        """
+        with self._lock:
+            return self._evaluate_locked(measurement, level_index, notify, pm25_value)
+
+    def _evaluate_locked(self, measurement: AirQualityMeasurement, level_index: int,
+                         notify: bool, pm25_value: Optional[float]) -> Optional[Alert]:
+        """_evaluate with the lock held"""
+        # Check if we should trigger an alert
+        if self._should_trigger_alert(measurement.device_id, level_index):
+            threshold = self.THRESHOLDS[level_index]
+            if pm25_value is None:
+                label, pm25_value = "PM2.5", measurement.pm25
+            elif self.alert_window == 'nowcast':
+                label = "PM2.5 NowCast"
+            else:
+                label = f"PM2.5 ({self.alert_window} mean)"
+            alert = Alert(
+                device_id=measurement.device_id,
+                level=threshold.level,
+                pm25_value=pm25_value,
+                location={
+                    'latitude': measurement.latitude,
+                    'longitude': measurement.longitude
+                },
+                timestamp=measurement.timestamp,
+                message=f"{threshold.message}. {label}: {pm25_value} μg/m³"
+            )
+
+            self._trigger_alert(alert, notify)
+            return alert
+
+        # Clear alert if conditions improved
+        self._clear_alert_if_improved(measurement.device_id, level_index)
+        return None
+
+    def _should_trigger_alert(self, device_id: str, current_level_index: int) -> bool:
         """
         Determine if an alert should be triggered
 
         Args:
             device_id: Device identifier
-            threshold: Alert threshold
+            current_level_index: Position of the current level in THRESHOLDS
 
         Returns:
             True if alert should be triggered
         """
-        min_level_index = next(i for i, t in enumerate(self.THRESHOLDS)
-                              if t.level.value == self.min_alert_level)
-        current_level_index = next(i for i, t in enumerate(self.THRESHOLDS)
-                                  if t.level == threshold.level)
-
         # Only alert if above minimum level
-        if current_level_index < min_level_index:
+        if current_level_index < self._min_level_index:
             return False
 
         # Check if this is a new alert or escalation
@@ -165,49 +409,118 @@ class AlertService:
         if not existing_alert:
             return True  # New alert
 
-        existing_level_index = next(i for i, t in enumerate(self.THRESHOLDS)
-                                   if t.level == existing_alert.level)
-
         # Alert if escalation (higher severity)
-        return current_level_index > existing_level_index
+        return current_level_index > self._level_index[existing_alert.level]
 
-    def _clear_alert_if_improved(self, device_id: str, threshold: AlertThreshold) -> None:
+    def _clear_alert_if_improved(self, device_id: str, current_level_index: int) -> None:
         """Clear active alert if conditions have improved"""
         existing_alert = self.active_alerts.get(device_id)
         if not existing_alert:
             return
 
         # If current level is better than alert level, clear the alert
-        existing_level_index = next(i for i, t in enumerate(self.THRESHOLDS)
-                                   if t.level == existing_alert.level)
-        current_level_index = next(i for i, t in enumerate(self.THRESHOLDS)
-                                  if t.level == threshold.level)
-
-        if current_level_index < existing_level_index:
+        if current_level_index < self._level_index[existing_alert.level]:
             self.logger.info(f"Clearing alert for device {device_id} - conditions improved")
-            del self.active_alerts[device_id]
+            self._clear_alert(device_id)
 
-    def _trigger_alert(self, alert: Alert) -> None:
+    def _clear_alert(self, device_id: str) -> None:
+        """Remove an active alert"""
+        del self.active_alerts[device_id]
+        data_version.bump()
+
+        if self.store:
+            try:
+                self.store.clear(device_id)
+            except sqlite3.Error as e:
+                self.logger.error(f"Failed to store cleared alert: {e}")
+
+    def process_zone_states(self, states: Sequence[ZoneState], timestamp: Optional[datetime] = None,
+                            notify: bool = True) -> List[Alert]:
+        """
+        Update zone alerts from geofence zone states
+
+        A zone alerts when the mean of its window exceeds its alert_pm25
+        with at least GEOFENCE_MIN_READINGS readings, and again when the
+        mean escalates to a higher level. The alert clears once the mean is
+        back at or below the limit or the window is empty. Zone alerts are
+        keyed zone:<zone_id> and do not depend on MIN_ALERT_LEVEL.
+
+        Args:
+            states: (zone, readings in window, window mean) per zone
+            timestamp: Time of the alerts (naive UTC, defaults to now)
+            notify: Send notifications for triggered alerts
+
+        Returns:
+            Alerts triggered
+        """
+        with self._lock:
+            return self._process_zone_states_locked(states, timestamp, notify)
+
+    def _process_zone_states_locked(self, states: Sequence[ZoneState], timestamp: Optional[datetime],
+                                    notify: bool) -> List[Alert]:
+        """process_zone_states with the lock held"""
+        alerts = []
+        for zone, count, mean in states:
+            key = zone.alert_key
+            existing_alert = self.active_alerts.get(key)
+            if not count or mean <= zone.alert_pm25:
+                if existing_alert:
+                    self.logger.info(f"Clearing alert for zone {zone.zone_id} - conditions improved")
+                    self._clear_alert(key)
+                continue
+            if count < config.GEOFENCE_MIN_READINGS:
+                continue
+
+            mean = round(mean, 1)
+            level_index = self._level_position(mean)
+            if existing_alert and level_index <= self._level_index[existing_alert.level]:
+                continue
+
+            threshold = self.THRESHOLDS[level_index]
+            minutes = f"{zone.window_seconds / 60:g}"
+            alert = Alert(
+                device_id=key,
+                level=threshold.level,
+                pm25_value=mean,
+                location=dict(zone.location),
+                timestamp=timestamp or datetime.utcnow(),
+                message=(f"{threshold.message} in zone {zone.name}. PM2.5 ({minutes} min mean): "
+                         f"{mean} μg/m³, limit {zone.alert_pm25:g} μg/m³")
+            )
+            self._trigger_alert(alert, notify)
+            alerts.append(alert)
+        return alerts
+
+    def _trigger_alert(self, alert: Alert, notify: bool = True) -> None:
         """
         Trigger an alert and send notifications
 
         Args:
             alert: Alert to trigger
+            notify: Send notifications for the alert
         """
         self.logger.warning(f"ALERT TRIGGERED: {alert.message} for device {alert.device_id}")
 
-        # Store active alert
-        self.active_alerts[alert.device_id] = alert
-
         # Add to history
-        self.alert_history.append(alert)
+        if self.store:
+            try:
+                alert.alert_id = self.store.add(
+                    alert.device_id, alert.level.value, alert.pm25_value, alert.location.get('latitude'),
+                    alert.location.get('longitude'), alert.timestamp, alert.message)
+            except sqlite3.Error as e:
+                self.logger.error(f"Failed to store alert: {e}")
+        else:
+            alert.alert_id = self._next_alert_id
+            self._next_alert_id += 1
+            self.alert_history.append(alert)
 
-        # Keep history manageable (last 1000 alerts)
-        if len(self.alert_history) > 1000:
-            self.alert_history = self.alert_history[-1000:]
+        # Store active alert
+        self.active_alerts[alert.device_id] = alert
+        data_version.bump()
 
         # Send notifications
-        self._send_notifications(alert)
+        if notify:
+            self._send_notifications(alert)
 
     def _send_notifications(self, alert: Alert) -> None:
         """
@@ -223,62 +536,14 @@ class AlertService:
             except Exception as e:
                 self.logger.error(f"Error in notification callback: {e}")
 
-        # Send email if configured
-        if self.email_enabled:
-            self._send_email_alert(alert)
-
-    def _send_email_alert(self, alert: Alert) -> None:
-        """
-        Send email alert (if configured)
-
-        Args:
-            alert: Alert to send via email
-        """
-        try:
-            if not hasattr(config, 'SMTP_HOST'):
-                return
-
-            msg = MIMEMultipart()
-            msg['From'] = getattr(config, 'SMTP_FROM', 'pm25-ghostbuster@thalay.eu')
-            msg['To'] = getattr(config, 'ALERT_EMAIL', '')
-            msg['Subject'] = f"PM2.5 Alert: {alert.level.value.upper()} - Device {alert.device_id}"
-
-            body = f"""
-PM2.5 Ghostbuster Alert
-
-Device: {alert.device_id}
-Alert Level: {alert.level.value.upper()}
-PM2.5 Value: {alert.pm25_value} μg/m³
-Location: {alert.location['latitude']:.6f}, {alert.location['longitude']:.6f}
-Time: {tz_manager.format_local_time(alert.timestamp)}
-
-Message: {alert.message}
-
-View live data: {getattr(config, 'MAP_URL', 'https://map.thalay.eu')}
-
----
-PM2.5 Ghostbuster Alert System
-"PM2.5 is like ghost. It exists even if it is invisible."
-            """
-
-            msg.attach(MIMEText(body, 'plain'))
-
-            server = smtplib.SMTP(config.SMTP_HOST, getattr(config, 'SMTP_PORT', 587))
-            server.starttls()
-            if hasattr(config, 'SMTP_USERNAME'):
-                server.login(config.SMTP_USERNAME, config.SMTP_PASSWORD)
-
-            server.send_message(msg)
-            server.quit()
-
-            self.logger.info(f"Email alert sent for device {alert.device_id}")
-
-        except Exception as e:
-            self.logger.error(f"Failed to send email alert: {e}")
+        # Email and webhooks are delivered by the background dispatcher
+        if self.dispatcher.enabled:
+            self.dispatcher.submit(alert)
 
     def get_active_alerts(self) -> List[Alert]:
         """Get list of active alerts"""
-        return list(self.active_alerts.values())
+        with self._lock:
+            return list(self.active_alerts.values())
 
     def get_alert_history(self, hours: int = 24) -> List[Alert]:
         """
@@ -291,24 +556,119 @@ PM2.5 Ghostbuster Alert System
             List of alerts within time period
         """
         cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        return [alert for alert in self.alert_history if alert.timestamp >= cutoff_time]
+        if self.store:
+            alerts, _ = self.store.query(cutoff_time, datetime.max)
+            return [Alert.from_dict(data) for data in alerts]
+        with self._lock:
+            return [alert for alert in self.alert_history if alert.timestamp >= cutoff_time]
+
+    def query_history(self, start_time: datetime, end_time: datetime, device_id: Optional[str] = None,
+                      level: Optional[str] = None, limit: int = 100,
+                      cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get a page of alert history, newest first
+
+        Args:
+            start_time: Start of time period (naive UTC)
+            end_time: End of time period (naive UTC)
+            device_id: Only alerts of this device
+            level: Only alerts of this level
+            limit: Maximum alerts per page
+            cursor: next_cursor of the previous page
+
+        Returns:
+            Dictionary with the alerts and the cursor of the next page (None on the last page)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        if self.store:
+            alerts, next_cursor = self.store.query(start_time, end_time, device_id, level, limit, cursor)
+            return {'alerts': alerts, 'next_cursor': next_cursor}
+
+        # In-memory history uses the same (timestamp, id) cursors
+        before = AlertStore.parse_cursor(cursor) if cursor else None
+        with self._lock:
+            matching = []
+            for alert in self.alert_history:
+                key = (to_micros(alert.timestamp), alert.alert_id)
+                if (start_time <= alert.timestamp <= end_time
+                        and (device_id is None or alert.device_id == device_id)
+                        and (level is None or alert.level.value == level)
+                        and (before is None or key < before)):
+                    matching.append((key, alert))
+            matching.sort(key=lambda item: item[0], reverse=True)
+
+            page = matching[:limit]
+            alerts = []
+            for _, alert in page:
+                data = alert.to_dict()
+                data['active'] = self.active_alerts.get(alert.device_id) is alert
+                data['cleared_at'] = None
+                alerts.append(data)
+
+        next_cursor = AlertStore.format_cursor(*page[-1][0]) if len(matching) > limit else None
+        return {'alerts': alerts, 'next_cursor': next_cursor}
 
     def acknowledge_alert(self, device_id: str) -> bool:
         """
         Acknowledge an active alert
 
+        With a store, the store decides whether the device has an active
+        alert: standalone API workers only load active alerts at startup,
+        and the data collector picks up their acknowledgements with
+        sync_acknowledgements.
+
         Args:
             device_id: Device with alert to acknowledge
 
         Returns:
             True if alert was acknowledged
         """
-        alert = self.active_alerts.get(device_id)
-        if alert:
-            alert.acknowledged = True
-            self.logger.info(f"Alert acknowledged for device {device_id}")
-            return True
-        return False
+        with self._lock:
+            alert = self.active_alerts.get(device_id)
+            acknowledged = alert is not None
+            if self.store:
+                try:
+                    acknowledged = self.store.acknowledge(device_id)
+                except sqlite3.Error as e:
+                    self.logger.error(f"Failed to store alert acknowledgement: {e}")
+
+            if not acknowledged:
+                return False
+
+            if alert:
+                alert.acknowledged = True
+            data_version.bump()
+        self.logger.info(f"Alert acknowledged for device {device_id}")
+        return True
+
+    def sync_acknowledgements(self) -> int:
+        """
+        Mark active alerts acknowledged in the store by other processes
+        (standalone API workers) as acknowledged
+
+        Returns:
+            Number of alerts newly marked acknowledged
+        """
+        if not self.store:
+            return 0
+
+        try:
+            acknowledged_ids = set(self.store.acknowledged_active_ids())
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to read alert acknowledgements: {e}")
+            return 0
+
+        changed = 0
+        with self._lock:
+            for alert in self.active_alerts.values():
+                if not alert.acknowledged and alert.alert_id in acknowledged_ids:
+                    alert.acknowledged = True
+                    changed += 1
+        if changed:
+            data_version.bump()
+        return changed
 
     def get_alert_summary(self) -> Dict:
         """
@@ -317,19 +677,27 @@ PM2.5 Ghostbuster Alert System
         Returns:
             Dictionary with alert statistics
         """
+        with self._lock:
+            active_alerts = dict(self.active_alerts)
+
         active_by_level = {}
-        for alert in self.active_alerts.values():
+        for alert in active_alerts.values():
             level = alert.level.value
             active_by_level[level] = active_by_level.get(level, 0) + 1
 
-        recent_alerts = self.get_alert_history(24)
+        if self.store:
+            alerts_last_24h, last_alert_time = self.store.count_since(datetime.utcnow() - timedelta(hours=24))
+        else:
+            recent_alerts = self.get_alert_history(24)
+            alerts_last_24h = len(recent_alerts)
+            last_alert_time = max([a.timestamp for a in recent_alerts], default=None)
 
         return {
-            'active_alerts': len(self.active_alerts),
+            'active_alerts': len(active_alerts),
             'active_by_level': active_by_level,
-            'alerts_last_24h': len(recent_alerts),
-            'devices_with_alerts': list(self.active_alerts.keys()),
-            'last_alert_time': max([a.timestamp for a in recent_alerts], default=None)
+            'alerts_last_24h': alerts_last_24h,
+            'devices_with_alerts': list(active_alerts.keys()),
+            'last_alert_time': last_alert_time
         }
 
     def export_alerts(self, start_time: datetime, end_time: datetime) -> List[Dict]:
@@ -343,9 +711,14 @@ PM2.5 Ghostbuster Alert System
         Returns:
             List of alert dictionaries
         """
-        alerts_in_period = [
-            alert for alert in self.alert_history
-            if start_time <= alert.timestamp <= end_time
-        ]
+        if self.store:
+            alerts, _ = self.store.query(start_time, end_time)
+            alerts_in_period = [Alert.from_dict(data) for data in reversed(alerts)]
+        else:
+            with self._lock:
+                alerts_in_period = [
+                    alert for alert in self.alert_history
+                    if start_time <= alert.timestamp <= end_time
+                ]
 
         return [asdict(alert) for alert in alerts_in_period]
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+PM2.5 Ghostbuster - Alert Store
+SQLite-backed alert history with time and device indexes
+"""
+
+import calendar
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import config
+from src.utils.logger import get_logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    device_id TEXT NOT NULL,
+    level TEXT NOT NULL,
+    pm25_value REAL NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    timestamp_us INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    acknowledged INTEGER NOT NULL DEFAULT 0,
+    active INTEGER NOT NULL DEFAULT 1,
+    cleared_at_us INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_time ON alerts (timestamp_us, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_device_time ON alerts (device_id, timestamp_us, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_active ON alerts (device_id) WHERE active = 1;
+"""
+
+COLUMNS = ('id, device_id, level, pm25_value, latitude, longitude, timestamp_us, '
+           'message, acknowledged, active, cleared_at_us')
+
+# Old alerts are pruned at most this often
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def to_micros(timestamp: datetime) -> int:
+    """Naive UTC (or offset-aware) datetime to integer microseconds since the epoch"""
+    return calendar.timegm(timestamp.utctimetuple()) * 1000000 + timestamp.microsecond
+
+
+def from_micros(micros: int) -> datetime:
+    """Integer microseconds since the epoch to naive UTC datetime"""
+    return datetime(1970, 1, 1) + timedelta(microseconds=micros)
+
+
+class AlertStore:
+    """
+    Persistent alert log
+
+    Every triggered alert is a row; the current alert of each device is
+    flagged active until it is superseded by an escalation or cleared. The
+    database runs in WAL mode, so API worker processes can query history
+    while the data collector writes. Connections are per thread and per
+    process.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, retention_days: Optional[int] = None):
+        """
+        Initialize the store and create the schema if needed
+
+        Args:
+            db_path: SQLite database file (defaults to config value)
+            retention_days: Days of history kept, 0 keeps everything (defaults to config value)
+        """
+        self.logger = get_logger('alert_store')
+        self.db_path = str(db_path or config.ALERT_DB_PATH)
+        self.retention_days = retention_days if retention_days is not None else config.ALERT_HISTORY_DAYS
+        self._local = threading.local()
+        self._last_prune = 0.0
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+        self.prune()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the calling thread, reopened after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """Alert row in the layout of Alert.to_dict"""
+        return {
+            'id': row['id'],
+            'device_id': row['device_id'],
+            'level': row['level'],
+            'pm25_value': row['pm25_value'],
+            'location': {'latitude': row['latitude'], 'longitude': row['longitude']},
+            'timestamp': from_micros(row['timestamp_us']).isoformat(),
+            'message': row['message'],
+            'acknowledged': bool(row['acknowledged']),
+            'active': bool(row['active']),
+            'cleared_at': from_micros(row['cleared_at_us']).isoformat() if row['cleared_at_us'] else None
+        }
+
+    def add(self, device_id: str, level: str, pm25_value: float, latitude: float, longitude: float,
+            timestamp: datetime, message: str) -> int:
+        """
+        Record a triggered alert as the device's active alert
+
+        Returns:
+            Row id of the alert
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute('UPDATE alerts SET active = 0 WHERE device_id = ? AND active = 1', (device_id,))
+            cursor = conn.execute(
+                'INSERT INTO alerts (device_id, level, pm25_value, latitude, longitude, timestamp_us, message) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (device_id, level, pm25_value, latitude, longitude, to_micros(timestamp), message))
+
+        if time.monotonic() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+            self.prune()
+        return cursor.lastrowid
+
+    def clear(self, device_id: str) -> None:
+        """Mark the device's active alert as cleared"""
+        conn = self._connection()
+        with conn:
+            conn.execute('UPDATE alerts SET active = 0, cleared_at_us = ? WHERE device_id = ? AND active = 1',
+                         (to_micros(datetime.utcnow()), device_id))
+
+    def acknowledge(self, device_id: str) -> bool:
+        """Acknowledge the device's active alert, returns False if there is none"""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute('UPDATE alerts SET acknowledged = 1 WHERE device_id = ? AND active = 1',
+                                  (device_id,))
+        return cursor.rowcount > 0
+
+    def acknowledged_active_ids(self) -> List[int]:
+        """IDs of active alerts that have been acknowledged"""
+        rows = self._connection().execute('SELECT id FROM alerts WHERE active = 1 AND acknowledged = 1').fetchall()
+        return [row[0] for row in rows]
+
+    def load_active(self) -> List[Dict[str, Any]]:
+        """Active alert of every device"""
+        rows = self._connection().execute(f'SELECT {COLUMNS} FROM alerts WHERE active = 1').fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def format_cursor(timestamp_us: int, alert_id: int) -> str:
+        """Page cursor pointing after the given alert"""
+        return f"{timestamp_us}.{alert_id}"
+
+    @staticmethod
+    def parse_cursor(cursor: str) -> Tuple[int, int]:
+        """(timestamp_us, id) of a page cursor, raises ValueError if invalid"""
+        try:
+            timestamp_us, alert_id = cursor.split('.', 1)
+            return int(timestamp_us), int(alert_id)
+        except (ValueError, AttributeError):
+            raise ValueError('Invalid cursor')
+
+    def query(self, start: datetime, end: datetime, device_id: Optional[str] = None,
+              level: Optional[str] = None, limit: Optional[int] = None,
+              cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Alerts in a time range, newest first
+
+        Pages are keyset-paginated on (timestamp, id), so each page is an
+        index range scan regardless of how deep it is.
+
+        Args:
+            start: Range start (naive UTC, inclusive)
+            end: Range end (naive UTC, inclusive)
+            device_id: Only alerts of this device
+            level: Only alerts of this level
+            limit: Maximum alerts returned, None for all
+            cursor: next_cursor of the previous page
+
+        Returns:
+            Tuple of (alert dictionaries, cursor of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        conditions = ['timestamp_us >= ?', 'timestamp_us <= ?']
+        params: List[Any] = [to_micros(start), to_micros(end)]
+
+        if device_id is not None:
+            conditions.append('device_id = ?')
+            params.append(device_id)
+        if level is not None:
+            conditions.append('level = ?')
+            params.append(level)
+        if cursor:
+            conditions.append('(timestamp_us, id) < (?, ?)')
+            params.extend(self.parse_cursor(cursor))
+
+        sql = f"SELECT {COLUMNS} FROM alerts WHERE {' AND '.join(conditions)} ORDER BY timestamp_us DESC, id DESC"
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit + 1)  # One extra row tells whether another page exists
+
+        rows = self._connection().execute(sql, params).fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.format_cursor(rows[-1]['timestamp_us'], rows[-1]['id'])
+
+        return [self._row_to_dict(row) for row in rows], next_cursor
+
+    def count_since(self, since: datetime) -> Tuple[int, Optional[datetime]]:
+        """
+        Number of alerts at or after a time and the latest alert time
+
+        Returns:
+            Tuple of (count, latest timestamp or None)
+        """
+        count, latest = self._connection().execute(
+            'SELECT COUNT(*), MAX(timestamp_us) FROM alerts WHERE timestamp_us >= ?',
+            (to_micros(since),)).fetchone()
+        return count, from_micros(latest) if latest is not None else None
+
+    def prune(self) -> int:
+        """Delete inactive alerts older than the retention period, returns rows deleted"""
+        self._last_prune = time.monotonic()
+        if self.retention_days <= 0:
+            return 0
+
+        cutoff = to_micros(datetime.utcnow() - timedelta(days=self.retention_days))
+        conn = self._connection()
+        with conn:
+            deleted = conn.execute('DELETE FROM alerts WHERE timestamp_us < ? AND active = 0',
+                                   (cutoff,)).rowcount
+        if deleted:
+            self.logger.info(f"Pruned {deleted} alerts older than {self.retention_days} days")
+        return deleted
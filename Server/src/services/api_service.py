@@ -5,18 +5,72 @@ Provides HTTP API endpoints for data access and system monitoring
 Enhanced for v2.1.0 by Claude Code Assistant
 """
 
+import hmac
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from flask import Flask, jsonify, request, Response
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Union
+from flask import Flask, jsonify, request, Response, stream_with_context, send_file, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import json
+import numpy as np
+
+try:
+    from flask_sock import Sock
+except ImportError:  # WebSocket push is optional
+    Sock = None
 
 from config.settings import config
 from src.utils.logger import get_logger
-from src.services.influx_service import InfluxService
+from src.services.influx_service import InfluxService, set_query_caller, reset_query_caller
 from src.services.geojson_service import GeoJSONService
 from src.services.alert_service import AlertService
+from src.services.change_feed import ChangeFeed
+from src.services.push_service import PushService, PushSubscriber
+from src.services.snapshot_service import SnapshotService
+from src.services.response_cache import ResponseCache, CachedResponse
+from src.services.export_service import ExportService, ExportJob, ExportQueueFullError
+from src.services.rolling_stats import RollingStats, WINDOWS, HOURS_WINDOWS
+from src.services.quantile_stats import QuantileStats
+from src.services.geofence_service import GeofenceService
+from src.services.district_service import DistrictService, summarize_districts
 from src.utils.timezone_utils import tz_manager
+from src.utils.data_version import data_version
+from src.utils.downsample import lttb, bucket_means
+from src.utils.metrics import metrics
+from src.utils.ingest_timing import ingest_timing
+from src.utils.profiling import SamplingProfiler, memory_tracker
+from src.utils.json_codec import json_codec
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by the shared JSON codec
+
+    Responses are encoded straight to bytes. Non-ASCII characters are
+    written as UTF-8 rather than escaped. Debug-mode indentation and
+    explicit json.dumps arguments fall back to the default provider.
+    """
+
+    ensure_ascii = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return json_codec.dumps(obj, sort_keys=self.sort_keys, default=self.default)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return json_codec.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        body = json_codec.dumps_bytes(obj, sort_keys=self.sort_keys, default=self.default)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
 
 
 class APIService:
@@ -24,18 +78,588 @@ class APIService:
 
     def __init__(self, influx_service: InfluxService = None,
                  geojson_service: GeoJSONService = None,
-                 alert_service: AlertService = None):
-        """Initialize API service"""
+                 alert_service: AlertService = None,
+                 change_feed: ChangeFeed = None,
+                 push_service: PushService = None,
+                 snapshot_service: SnapshotService = None,
+                 export_service: ExportService = None,
+                 rolling_stats: RollingStats = None,
+                 quantile_stats: QuantileStats = None,
+                 geofence_service: GeofenceService = None,
+                 district_service: DistrictService = None):
+        """
+        Initialize API service
+
+        When a snapshot service is given (standalone API workers), data
+        products published by the data collector are served from snapshots
+        instead of being recomputed per process. Rolling statistics, quantile
+        sketches, geofence zones and district aggregates are only passed in
+        by the data collector, which maintains them at ingest.
+        """
         self.logger = get_logger('api_service')
         self.app = Flask(__name__)
+        self.app.json = CodecJSONProvider(self.app)
         CORS(self.app)  # Enable CORS for web frontend
 
         # Services
         self.influx_service = influx_service or InfluxService()
         self.geojson_service = geojson_service or GeoJSONService(self.influx_service)
         self.alert_service = alert_service or AlertService()
+        self.change_feed = change_feed
+        self.push_service = push_service
+        self.snapshot_service = snapshot_service
+        self.response_cache = ResponseCache()
+        self.export_service = export_service or ExportService(self.influx_service)
+        self.rolling_stats = rolling_stats
+        self.quantile_stats = quantile_stats
+        self.geofence_service = geofence_service
+        self.district_service = district_service
+        # Published quantile state and the sketches rebuilt from it
+        self._published_quantiles = (None, None)
 
+        self._setup_metrics()
+        self._setup_profiling()
         self._setup_routes()
+        self._setup_push_routes()
+
+    @staticmethod
+    def _negotiate_encoding(available) -> Optional[str]:
+        """
+        Pick the best precompressed encoding accepted by the client
+
+        Args:
+            available: Encodings that have precompressed bytes
+
+        Returns:
+            Content-Encoding to use, or None for identity
+        """
+        for encoding in ('br', 'gzip'):
+            if encoding in available and request.accept_encodings[encoding] > 0:
+                return encoding
+        return None
+
+    @staticmethod
+    def _snapshot_max_age() -> float:
+        """Snapshots missing several publish cycles mean the collector is down"""
+        return 3 * max(config.GEOJSON_UPDATE_INTERVAL, config.SNAPSHOT_INTERVAL)
+
+    def _load_snapshot(self, name: str):
+        """Load a collector snapshot if this API runs as a standalone worker"""
+        if self.snapshot_service is None:
+            return None
+        return self.snapshot_service.load(name, max_age=self._snapshot_max_age())
+
+    def _rolling_device_stats(self, device_id: str) -> Optional[Dict[str, Dict]]:
+        """
+        Rolling window statistics of a device, from memory or the collector's snapshot
+
+        Returns:
+            Dictionary of window name -> stats (empty for devices without
+            readings in the last 24 hours), None if no rolling statistics are
+            available
+        """
+        if self.rolling_stats is not None and self.rolling_stats.ready:
+            return self.rolling_stats.device_stats(device_id) or {}
+
+        rolling = self._load_snapshot('rolling')
+        if rolling is not None:
+            return rolling.get(device_id, {})
+        return None
+
+    def _sketches(self, hours: int) -> Optional[QuantileStats]:
+        """
+        Quantile sketches answering a window of hours, from memory or the
+        collector's snapshot
+
+        Returns:
+            Quantile statistics, None if no sketches cover the window and
+            the raw data has to be read
+        """
+        if self.quantile_stats is not None and self.quantile_stats.ready:
+            sketches = self.quantile_stats
+        else:
+            sketches = self._snapshot_sketches()
+        if sketches is None or hours > sketches.retention_hours:
+            return None
+        return sketches
+
+    def _snapshot_sketches(self) -> Optional[QuantileStats]:
+        """Sketches of the collector's quantile snapshot, rebuilt only when it changes"""
+        state = self._load_snapshot('quantiles')
+        if state is None:
+            return None
+
+        published, sketches = self._published_quantiles
+        if state is not published:
+            try:
+                sketches = QuantileStats.from_state(state)
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.warning(f"Failed to load quantile snapshot: {e}")
+                return None
+            self._published_quantiles = (state, sketches)
+        return sketches
+
+    def _current_version(self, snapshot: Optional[str] = None) -> Optional[tuple]:
+        """
+        Get the data version of a response
+
+        Args:
+            snapshot: Collector snapshot the response is served from in API
+                      workers; its version is the one it was computed from,
+                      which lags the latest version between publish cycles
+
+        Returns:
+            Tuple of (entity tag, last modified UNIX time) or None if unknown
+        """
+        if data_version.tracking:
+            return data_version.current()
+
+        if self.snapshot_service is None:
+            return None
+
+        if snapshot is not None:
+            version = self.snapshot_service.load_version(snapshot, max_age=self._snapshot_max_age())
+            if version is not None:
+                return version
+
+        version = self._load_snapshot('version')
+        if version is not None:
+            return version['etag'], version['last_modified']
+        return None
+
+    @staticmethod
+    def _hours_arg(default: int = 24, maximum: int = 168) -> int:
+        """Read the hours query argument clamped to [1, maximum]"""
+        hours = request.args.get('hours', default, type=int)
+        return min(max(hours, 1), maximum)
+
+    def _cached(self, key_args: Optional[Callable[[], tuple]] = None) -> Callable:
+        """
+        Serve a route from the response cache
+
+        Args:
+            key_args: Returns the normalized query arguments the response
+                      depends on; all other arguments are ignored
+
+        Returns:
+            Route decorator
+        """
+        def decorator(view: Callable) -> Callable:
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if g.get('profiler') is not None:
+                    return view(*args, **kwargs)  # Profile the real work, not a cache hit
+
+                key = (request.path,) + (key_args() if key_args else ())
+                full_path = request.full_path
+                # Set by _conditional: the version to label the body with
+                conditional = 'data_version' in g
+                version_snapshot = g.get('version_snapshot')
+
+                def render(version: Optional[tuple]) -> CachedResponse:
+                    response = self.app.make_response(view(*args, **kwargs))
+                    if response.is_streamed:
+                        # Buffering would undo streaming; pass it through uncached
+                        return CachedResponse(body=b'', status=response.status_code, headers={},
+                                              streamed=response)
+                    headers = {name: value for name, value in response.headers.items()
+                               if name.lower() != 'content-length'}
+                    return CachedResponse(body=response.get_data(), status=response.status_code,
+                                          headers=headers, version=version)
+
+                def refresh() -> CachedResponse:
+                    # Background revalidation runs outside the original request
+                    with self.app.test_request_context(full_path):
+                        return render(self._current_version(version_snapshot) if conditional else None)
+
+                entry, cache_status = self.response_cache.get_or_compute(
+                    key, lambda: render(g.get('data_version')), refresh)
+                if entry.streamed is not None:
+                    return entry.streamed
+
+                # A cached body is as old as the version it was computed from
+                if conditional and entry.version is not None:
+                    g.data_version = entry.version
+                response = Response(entry.body, status=entry.status, headers=entry.headers)
+                response.headers['X-Cache'] = cache_status
+                return response
+
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _parse_export_params(params) -> tuple:
+        """
+        Validate export parameters
+
+        Args:
+            params: Mapping with start, end and optional format
+
+        Returns:
+            Tuple of (start time, end time, format) with naive UTC times
+
+        Raises:
+            ValueError: If parameters are missing or invalid
+        """
+        start_str = params.get('start')
+        end_str = params.get('end')
+        format_type = str(params.get('format', 'json')).lower()
+
+        if not start_str or not end_str:
+            raise ValueError('start and end parameters required')
+
+        if format_type not in ExportService.FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(ExportService.FORMATS)}")
+
+        # Parse dates
+        try:
+            start_time = datetime.fromisoformat(start_str.replace('Z', '+00:00'))
+            end_time = datetime.fromisoformat(end_str.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError('Invalid date format. Use ISO format.')
+
+        # InfluxQL times are rendered as naive UTC
+        if start_time.tzinfo:
+            start_time = tz_manager.local_to_utc(start_time).replace(tzinfo=None)
+        if end_time.tzinfo:
+            end_time = tz_manager.local_to_utc(end_time).replace(tzinfo=None)
+
+        if end_time <= start_time:
+            raise ValueError('end must be after start')
+
+        # Limit export period (max 30 days)
+        if end_time - start_time > timedelta(days=30):
+            raise ValueError('Export period cannot exceed 30 days')
+
+        return start_time, end_time, format_type
+
+    @staticmethod
+    def _parse_history_params(params) -> tuple:
+        """
+        Validate alert history parameters
+
+        Args:
+            params: Mapping with optional start, end (ISO) and hours
+
+        Returns:
+            Tuple of (start time, end time) as naive UTC, defaulting to the
+            last `hours` (24) hours
+
+        Raises:
+            ValueError: If parameters are invalid
+        """
+        try:
+            times = []
+            for name in ('start', 'end'):
+                value = params.get(name)
+                parsed = datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+                if parsed is not None and parsed.tzinfo:
+                    parsed = tz_manager.local_to_utc(parsed).replace(tzinfo=None)
+                times.append(parsed)
+        except ValueError:
+            raise ValueError('Invalid date format. Use ISO format.')
+
+        start_time, end_time = times
+        end_time = end_time or datetime.utcnow()
+        if start_time is None:
+            hours = params.get('hours', 24, type=int)
+            start_time = end_time - timedelta(hours=max(hours, 1))
+
+        if end_time <= start_time:
+            raise ValueError('end must be after start')
+
+        return start_time, end_time
+
+    @staticmethod
+    def _send_export(job: ExportJob) -> Response:
+        """Send the file of a finished export job"""
+        if job.status != 'done':
+            return jsonify({'error': job.error or 'Export failed'}), 500
+
+        mimetype = 'text/csv' if job.format == 'csv' else 'application/json'
+        return send_file(job.file_path, mimetype=mimetype, as_attachment=job.format == 'csv',
+                         download_name=job.filename)
+
+    @staticmethod
+    def _not_modified(etag: str, last_modified: float) -> bool:
+        """Whether the request's validators match a data version"""
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(etag)
+        if request.if_modified_since:
+            return int(last_modified) <= request.if_modified_since.timestamp()
+        return False
+
+    def _conditional(self, snapshot: Union[None, str, Callable[[], Optional[str]]] = None) -> Callable:
+        """
+        Wrap a data route with ETag/Last-Modified conditional GET handling
+
+        Unchanged data is answered with 304 before the route runs any query
+        or serialization. Only applies when the data version is known, either
+        tracked in this process or read from the collector's snapshots.
+
+        Args:
+            snapshot: Collector snapshot the route serves in API workers, or
+                      a callable returning it (None) for the current request.
+                      Routes reading InfluxDB directly use the latest version.
+
+        Returns:
+            Route decorator
+        """
+        def decorator(view: Callable) -> Callable:
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                snapshot_name = snapshot() if callable(snapshot) else snapshot
+                version = self._current_version(snapshot_name)
+                if version is None:
+                    return view(*args, **kwargs)
+
+                if self._not_modified(*version):
+                    response = Response(status=304)
+                else:
+                    # _cached replaces the version with that of a cached body
+                    g.data_version = version
+                    g.version_snapshot = snapshot_name
+                    response = self.app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+
+                    version = g.data_version
+                    if self._not_modified(*version):
+                        response = Response(status=304)
+
+                etag, last_modified = version
+                response.set_etag(etag, weak=True)
+                response.last_modified = datetime.utcfromtimestamp(int(last_modified))
+                return response
+
+            return wrapper
+        return decorator
+
+    def _subscribe_push(self) -> Optional[PushSubscriber]:
+        """
+        Subscribe to live events using the bbox/devices request filters
+
+        Raises:
+            ValueError: If the bbox parameter is malformed
+        """
+        bbox = None
+        bbox_str = request.args.get('bbox')
+        if bbox_str:
+            parts = [float(value) for value in bbox_str.split(',')]
+            if len(parts) != 4:
+                raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+            bbox = tuple(parts)
+
+        devices_str = request.args.get('devices')
+        device_ids = set(devices_str.split(',')) if devices_str else None
+
+        return self.push_service.subscribe(bbox, device_ids)
+
+    def _iter_sse(self, subscriber: PushSubscriber):
+        """Yield Server-Sent Events for a subscriber until the client disconnects"""
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                events = subscriber.drain(timeout=config.PUSH_KEEPALIVE_SECONDS)
+                if not events:
+                    yield ': keepalive\n\n'
+                    continue
+
+                yield ''.join(f"event: {event_type}\ndata: {json_codec.dumps(data)}\n\n"
+                              for event_type, data in events)
+        finally:
+            self.push_service.unsubscribe(subscriber)
+
+    def _setup_metrics(self):
+        """Setup per-route request metrics and the Prometheus /metrics endpoint"""
+        request_count = metrics.counter(
+            'pm25_http_requests_total', 'HTTP requests by route, method and status',
+            ('method', 'route', 'status'))
+        request_latency = metrics.histogram(
+            'pm25_http_request_duration_seconds',
+            'HTTP request latency by route (until the response starts for streamed bodies)',
+            ('method', 'route', 'status'))
+        in_flight = metrics.gauge(
+            'pm25_http_requests_in_flight', 'HTTP requests currently being handled', ('route',))
+
+        def route_label() -> str:
+            return request.url_rule.rule if request.url_rule else 'unmatched'
+
+        @self.app.before_request
+        def start_request_timer():
+            g.metrics_start = time.perf_counter()
+            g.metrics_route = route_label()
+            g.query_caller_token = set_query_caller(g.metrics_route)
+            in_flight.inc(g.metrics_route)
+
+        @self.app.after_request
+        def record_request_metrics(response):
+            start = g.get('metrics_start')
+            if start is not None:
+                labels = (request.method, g.metrics_route, str(response.status_code))
+                request_latency.observe(time.perf_counter() - start, *labels)
+                request_count.inc(*labels)
+            return response
+
+        @self.app.teardown_request
+        def end_request_timer(exc):
+            route = g.pop('metrics_route', None)
+            if route is not None:
+                in_flight.dec(route)
+
+            token = g.pop('query_caller_token', None)
+            if token is not None:
+                try:
+                    reset_query_caller(token)
+                except ValueError:
+                    pass  # Token from another context, e.g. a streamed response
+
+        metrics.register_collector(self._collect_alert_metrics)
+
+        @self.app.route('/metrics', methods=['GET'])
+        def prometheus_metrics():
+            """Prometheus metrics endpoint"""
+            return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    @staticmethod
+    def _is_admin() -> bool:
+        """Check the profiling token sent in the X-Profile-Token header or profile argument"""
+        if not config.PROFILING_TOKEN:
+            return False
+
+        token = request.headers.get('X-Profile-Token') or request.args.get('profile') or ''
+        return hmac.compare_digest(token.encode(), config.PROFILING_TOKEN.encode())
+
+    def _setup_profiling(self):
+        """Setup on-demand request profiling and the memory snapshot endpoint"""
+
+        @self.app.before_request
+        def start_request_profile():
+            if ('X-Profile-Token' in request.headers or 'profile' in request.args) and self._is_admin():
+                g.profiler = SamplingProfiler()
+                g.profiler.start()
+
+        @self.app.after_request
+        def finish_request_profile(response):
+            profiler = g.get('profiler')
+            if profiler is None:
+                return response
+
+            name = f"{request.method}{request.path}"
+
+            def write_profile():
+                profiler.stop()
+                try:
+                    path = profiler.write(name)
+                    self.logger.info(f"Profiled {name}: {profiler.sample_count} samples "
+                                     f"over {profiler.duration:.2f}s written to {path}")
+                except OSError as e:
+                    self.logger.error(f"Failed to write profile for {name}: {e}")
+
+            # Streamed bodies are generated after this hook, so stop when the response closes
+            response.call_on_close(write_profile)
+            response.headers['X-Profiled'] = 'true'
+            return response
+
+        @self.app.route('/api/v1/system/memory', methods=['GET', 'DELETE'])
+        def memory_snapshot():
+            """Take a tracemalloc snapshot (the first call starts tracing) or stop tracing"""
+            if not self._is_admin():
+                return jsonify({'error': 'Profiling token required'}), 403
+
+            try:
+                if request.method == 'DELETE':
+                    memory_tracker.stop()
+                    return jsonify({'tracing': False})
+
+                limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+                return jsonify(memory_tracker.snapshot(limit))
+
+            except Exception as e:
+                self.logger.error(f"Memory snapshot error: {e}")
+                return jsonify({'error': str(e)}), 500
+
+    def _collect_alert_metrics(self):
+        """Alert gauges for the metrics scrape"""
+        alerts_snapshot = self._load_snapshot('alerts')
+        if alerts_snapshot is not None:
+            summary = alerts_snapshot['summary']
+        else:
+            summary = self.alert_service.get_alert_summary()
+
+        return [
+            ('pm25_active_alerts', 'gauge', 'Active alerts by level',
+             [({'level': level}, count) for level, count in summary['active_by_level'].items()]),
+            ('pm25_alerts_last_24h', 'gauge', 'Alerts triggered in the last 24 hours',
+             [({}, summary['alerts_last_24h'])])
+        ]
+
+    def _setup_push_routes(self):
+        """Setup live push routes (SSE and, if flask-sock is installed, WebSocket)"""
+
+        @self.app.route('/api/v1/stream', methods=['GET'])
+        def stream_events():
+            """Stream live measurements and alerts as Server-Sent Events"""
+            try:
+                if self.push_service is None:
+                    return jsonify({'error': 'Live push not available'}), 503
+
+                try:
+                    subscriber = self._subscribe_push()
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+
+                if subscriber is None:
+                    return jsonify({'error': 'Too many subscribers'}), 503
+
+                return Response(
+                    self._iter_sse(subscriber),
+                    mimetype='text/event-stream',
+                    headers={
+                        'Cache-Control': 'no-cache',
+                        'X-Accel-Buffering': 'no'  # Disable nginx proxy buffering
+                    }
+                )
+
+            except Exception as e:
+                self.logger.error(f"Event stream error: {e}")
+                return jsonify({'error': str(e)}), 500
+
+        if Sock is None:
+            return
+
+        sock = Sock(self.app)
+
+        @sock.route('/api/v1/ws')
+        def websocket_events(ws):
+            """Push live measurements and alerts over a WebSocket"""
+            if self.push_service is None:
+                ws.close(reason=1011, message='Live push not available')
+                return
+
+            try:
+                subscriber = self._subscribe_push()
+            except ValueError as e:
+                ws.close(reason=1008, message=str(e))
+                return
+
+            if subscriber is None:
+                ws.close(reason=1013, message='Too many subscribers')
+                return
+
+            try:
+                while ws.connected:
+                    events = subscriber.drain(timeout=config.PUSH_KEEPALIVE_SECONDS)
+                    if not events:
+                        # Sending fails once the client has gone, which frees
+                        # the thread and subscriber slot even without events
+                        ws.send('{"event":"keepalive"}')
+                        continue
+
+                    for event_type, data in events:
+                        ws.send(json_codec.dumps({'event': event_type, 'data': data}))
+            finally:
+                self.push_service.unsubscribe(subscriber)
 
     def _setup_routes(self):
         """Setup API routes"""
@@ -66,18 +690,19 @@ class APIService:
                 return jsonify({'status': 'error', 'message': str(e)}), 500
 
         @self.app.route('/api/v1/data/current', methods=['GET'])
+        @self._conditional()
         def get_current_data():
             """Get current GeoJSON data"""
             try:
-                hours = request.args.get('hours', 24, type=int)
-                hours = min(max(hours, 1), 168)  # Limit between 1 and 168 hours
+                hours = self._hours_arg()  # Limit between 1 and 168 hours
 
-                geojson_data = self.geojson_service.generate_geojson(hours)
-                if geojson_data is None:
+                chunks = self.geojson_service.stream_geojson(hours)
+                if chunks is None:
                     return jsonify({'error': 'Failed to generate data'}), 500
 
+                # Stream features to the client as they are read from InfluxDB
                 return Response(
-                    json.dumps(geojson_data),
+                    stream_with_context(chunks),
                     mimetype='application/geo+json',
                     headers={'Cache-Control': 'max-age=60'}  # Cache for 1 minute
                 )
@@ -86,11 +711,72 @@ class APIService:
                 self.logger.error(f"Current data error: {e}")
                 return jsonify({'error': str(e)}), 500
 
+        @self.app.route('/api/v1/data/geojson', methods=['GET'])
+        def get_published_geojson():
+            """Get the published GeoJSON file with precompressed encodings"""
+            try:
+                artifact = self.geojson_service.get_published_artifact()
+                if artifact is None:
+                    return jsonify({'error': 'No GeoJSON file published yet'}), 404
+
+                encoding = self._negotiate_encoding(artifact.encodings)
+                etag = f"{artifact.etag}-{encoding}" if encoding else artifact.etag
+                if request.if_none_match.contains(etag):
+                    return Response(status=304, headers={'ETag': f'"{etag}"', 'Vary': 'Accept-Encoding'})
+
+                headers = {
+                    'Cache-Control': 'max-age=60',
+                    'Vary': 'Accept-Encoding'
+                }
+
+                if encoding:
+                    headers['Content-Encoding'] = encoding
+                    headers['ETag'] = f'"{etag}"'
+                    return Response(artifact.encodings[encoding],
+                                    mimetype='application/geo+json', headers=headers)
+
+                response = send_file(artifact.path, mimetype='application/geo+json', conditional=False)
+                response.headers.update(headers)
+                response.headers['ETag'] = f'"{etag}"'
+                return response
+
+            except Exception as e:
+                self.logger.error(f"Published GeoJSON error: {e}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/v1/data/changes', methods=['GET'])
+        def get_data_changes():
+            """Get measurements ingested after a cursor"""
+            try:
+                if self.change_feed is None:
+                    return jsonify({'error': 'Change feed not available'}), 503
+
+                limit = request.args.get('limit', config.CHANGE_FEED_MAX_BATCH, type=int)
+                limit = min(max(limit, 1), config.CHANGE_FEED_MAX_BATCH)
+
+                changes = self.change_feed.changes_since(request.args.get('since'), limit)
+                return jsonify(changes)
+
+            except Exception as e:
+                self.logger.error(f"Data changes error: {e}")
+                return jsonify({'error': str(e)}), 500
+
         @self.app.route('/api/v1/data/summary', methods=['GET'])
+        @self._conditional(lambda: 'quantiles' if self._sketches(self._hours_arg()) is not None
+                           else 'summary' if self._hours_arg() == 24 else None)
+        @self._cached(lambda: (self._hours_arg(),))
         def get_data_summary():
             """Get data summary statistics"""
             try:
-                summary = self.geojson_service.get_summary_stats()
+                hours = self._hours_arg()
+                sketches = self._sketches(hours)
+                if sketches is not None:
+                    summary = sketches.summary(hours)
+                else:
+                    summary = self._load_snapshot('summary') if hours == 24 else None
+                    if summary is None:
+                        summary = self.geojson_service.get_summary_stats(
+                            self.influx_service.query_recent_data(hours) or [])
                 if summary is None:
                     return jsonify({'error': 'No data available'}), 404
 
@@ -100,36 +786,44 @@ class APIService:
                 self.logger.error(f"Summary data error: {e}")
                 return jsonify({'error': str(e)}), 500
 
+        @self.app.route('/api/v1/data/districts', methods=['GET'])
+        @self._conditional('districts')
+        @self._cached(lambda: (self._hours_arg(maximum=config.DISTRICT_HISTORY_HOURS),
+                               request.args.get('hourly', 'false').lower() == 'true'))
+        def get_district_data():
+            """Get PM2.5 statistics per district"""
+            try:
+                hours = self._hours_arg(maximum=config.DISTRICT_HISTORY_HOURS)
+                hourly = request.args.get('hourly', 'false').lower() == 'true'
+
+                if self.district_service is not None and self.district_service.enabled:
+                    snapshot = self.district_service.snapshot()
+                else:
+                    snapshot = self._load_snapshot('districts')
+                if snapshot is None:
+                    if config.DISTRICTS_PATH:
+                        return jsonify({'error': 'District statistics not available'}), 503
+                    return jsonify({'error': 'No districts configured'}), 404
+
+                return jsonify({
+                    'hours': hours,
+                    'districts': summarize_districts(snapshot, hours, hourly)
+                })
+
+            except Exception as e:
+                self.logger.error(f"District data error: {e}")
+                return jsonify({'error': str(e)}), 500
+
         @self.app.route('/api/v1/devices', methods=['GET'])
+        @self._conditional('devices')
         def get_devices():
             """Get list of active devices"""
             try:
-                data_points = self.influx_service.query_recent_data(24)
-                if not data_points:
-                    return jsonify([])
-
-                devices = {}
-                for point in data_points:
-                    device_id = point.get('device_id')
-                    if device_id and device_id not in devices:
-                        devices[device_id] = {
-                            'device_id': device_id,
-                            'last_seen': point.get('time'),
-                            'location': {
-                                'latitude': point.get('latitude'),
-                                'longitude': point.get('longitude')
-                            }
-                        }
-                    elif device_id:
-                        # Update with more recent data if available
-                        if point.get('time') > devices[device_id]['last_seen']:
-                            devices[device_id]['last_seen'] = point.get('time')
-                            devices[device_id]['location'] = {
-                                'latitude': point.get('latitude'),
-                                'longitude': point.get('longitude')
-                            }
-
-                return jsonify(list(devices.values()))
+                devices = self._load_snapshot('devices')
+                if devices is None:
+                    devices = self.geojson_service.get_device_list()
+
+                return jsonify(devices or [])
 
             except Exception as e:
                 self.logger.error(f"Devices endpoint error: {e}")
@@ -139,10 +833,28 @@ class APIService:
         def get_device_stats(device_id: str):
             """Get statistics for specific device"""
             try:
-                hours = request.args.get('hours', 24, type=int)
-                hours = min(max(hours, 1), 168)
+                hours = self._hours_arg()
+                window = request.args.get('window')
+                if window is not None and window not in WINDOWS:
+                    return jsonify({'error': f"window must be one of: {', '.join(WINDOWS)}"}), 400
+
+                # Rolling windows are answered from memory without querying InfluxDB
+                window = window or HOURS_WINDOWS.get(hours)
+                if window:
+                    windows = self._rolling_device_stats(device_id)
+                    if windows is not None:
+                        if not windows or not windows[window]['count']:
+                            return jsonify({'error': 'Device not found or no data'}), 404
+                        return jsonify(dict(windows[window], window=window, windows=windows))
+                    if 'window' in request.args:
+                        return jsonify({'error': 'Rolling statistics not available'}), 503
 
-                stats = self.influx_service.get_device_stats(device_id, hours)
+                # Other windows from the quantile sketches, or InfluxDB until they are available
+                sketches = self._sketches(hours)
+                if sketches is not None:
+                    stats = sketches.device_stats(device_id, hours)
+                else:
+                    stats = self.influx_service.get_device_stats(device_id, hours)
                 if stats is None:
                     return jsonify({'error': 'Device not found or no data'}), 404
 
@@ -152,23 +864,71 @@ class APIService:
                 self.logger.error(f"Device stats error: {e}")
                 return jsonify({'error': str(e)}), 500
 
+        @self.app.route('/api/v1/devices/<device_id>/series', methods=['GET'])
+        @self._conditional()
+        def get_device_series(device_id: str):
+            """Get a downsampled PM2.5 time series for a device"""
+            try:
+                hours = self._hours_arg(maximum=config.DATA_RETENTION_HOURS)
+                points = request.args.get('points', 500, type=int)
+                points = min(max(points, 3), config.SERIES_MAX_POINTS)
+                method = request.args.get('method', 'lttb').lower()
+
+                if method not in ('lttb', 'mean'):
+                    return jsonify({'error': 'method must be lttb or mean'}), 400
+
+                series = self.influx_service.query_device_series(device_id, hours)
+                if series is None:
+                    return jsonify({'error': 'Failed to query device series'}), 500
+
+                times, values = series
+                if not times:
+                    return jsonify({'error': 'Device not found or no data'}), 404
+
+                x = np.asarray(times, dtype=np.int64)
+                y = np.asarray(values, dtype=np.float64)
+                downsample = lttb if method == 'lttb' else bucket_means
+                x_out, y_out = downsample(x, y, points)
+
+                return jsonify({
+                    'device_id': device_id,
+                    'hours': hours,
+                    'method': method,
+                    'raw_points': len(times),
+                    'points': [[int(t), round(float(v), 2)] for t, v in zip(x_out, y_out)]
+                })
+
+            except Exception as e:
+                self.logger.error(f"Device series error: {e}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/v1/zones', methods=['GET'])
+        def get_zones():
+            """Get rolling statistics of the geofence zones"""
+            try:
+                if self.geofence_service is not None:
+                    return jsonify(self.geofence_service.zone_stats())
+
+                zones = self._load_snapshot('zones')
+                if zones is None and self.snapshot_service is not None and config.GEOFENCE_ZONES_PATH:
+                    return jsonify({'error': 'Zone statistics not available'}), 503
+                return jsonify(zones or [])
+
+            except Exception as e:
+                self.logger.error(f"Zones endpoint error: {e}")
+                return jsonify({'error': str(e)}), 500
+
         @self.app.route('/api/v1/alerts', methods=['GET'])
+        @self._conditional('alerts')
         def get_alerts():
             """Get active alerts"""
             try:
+                alerts_snapshot = self._load_snapshot('alerts')
+                if alerts_snapshot is not None:
+                    return jsonify(alerts_snapshot['active'])
+
                 active_alerts = self.alert_service.get_active_alerts()
-                alerts_data = []
-
-                for alert in active_alerts:
-                    alerts_data.append({
-                        'device_id': alert.device_id,
-                        'level': alert.level.value,
-                        'pm25_value': alert.pm25_value,
-                        'location': alert.location,
-                        'timestamp': alert.timestamp.isoformat(),
-                        'message': alert.message,
-                        'acknowledged': alert.acknowledged
-                    })
+                alerts_data = [alert.to_dict() for alert in active_alerts]
 
                 return jsonify(alerts_data)
 
@@ -177,9 +937,14 @@ class APIService:
                 return jsonify({'error': str(e)}), 500
 
         @self.app.route('/api/v1/alerts/summary', methods=['GET'])
+        @self._cached()
         def get_alert_summary():
             """Get alert summary statistics"""
             try:
+                alerts_snapshot = self._load_snapshot('alerts')
+                if alerts_snapshot is not None:
+                    return jsonify(alerts_snapshot['summary'])
+
                 summary = self.alert_service.get_alert_summary()
                 return jsonify(summary)
 
@@ -187,12 +952,35 @@ class APIService:
                 self.logger.error(f"Alert summary error: {e}")
                 return jsonify({'error': str(e)}), 500
 
+        @self.app.route('/api/v1/alerts/history', methods=['GET'])
+        def get_alert_history():
+            """Get a page of alert history, newest first"""
+            try:
+                start_time, end_time = self._parse_history_params(request.args)
+                limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+
+                page = self.alert_service.query_history(
+                    start_time, end_time,
+                    device_id=request.args.get('device_id') or None,
+                    level=request.args.get('level') or None,
+                    limit=limit,
+                    cursor=request.args.get('cursor') or None
+                )
+                return jsonify(page)
+
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                self.logger.error(f"Alert history error: {e}")
+                return jsonify({'error': str(e)}), 500
+
         @self.app.route('/api/v1/alerts/<device_id>/acknowledge', methods=['POST'])
         def acknowledge_alert(device_id: str):
             """Acknowledge an alert for a device"""
             try:
                 success = self.alert_service.acknowledge_alert(device_id)
                 if success:
+                    self.response_cache.invalidate(('/api/v1/alerts/summary',))
                     return jsonify({'message': 'Alert acknowledged'})
                 else:
                     return jsonify({'error': 'No active alert for device'}), 404
@@ -228,70 +1016,103 @@ class APIService:
                 self.logger.error(f"System info error: {e}")
                 return jsonify({'error': str(e)}), 500
 
+        @self.app.route('/api/v1/system/ingest', methods=['GET'])
+        def get_ingest_timing():
+            """Get sampled ingest pipeline stage latency and end-to-end lag"""
+            try:
+                ingest_snapshot = self._load_snapshot('ingest')
+                if ingest_snapshot is not None:
+                    return jsonify(ingest_snapshot)
+
+                return jsonify(ingest_timing.get_summary())
+
+            except Exception as e:
+                self.logger.error(f"Ingest timing error: {e}")
+                return jsonify({'error': str(e)}), 500
+
         @self.app.route('/api/v1/data/export', methods=['GET'])
         def export_data():
             """Export data for specified time period"""
             try:
-                # Get parameters
-                start_str = request.args.get('start')
-                end_str = request.args.get('end')
-                format_type = request.args.get('format', 'json').lower()
-
-                if not start_str or not end_str:
-                    return jsonify({'error': 'start and end parameters required'}), 400
+                try:
+                    start_time, end_time, format_type = self._parse_export_params(request.args)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
 
-                # Parse dates
+                # Runs in the bounded export pool; waits so existing clients
+                # still receive the file in the response
                 try:
-                    start_time = datetime.fromisoformat(start_str.replace('Z', '+00:00'))
-                    end_time = datetime.fromisoformat(end_str.replace('Z', '+00:00'))
-                except ValueError:
-                    return jsonify({'error': 'Invalid date format. Use ISO format.'}), 400
-
-                # Limit export period (max 30 days)
-                max_period = timedelta(days=30)
-                if end_time - start_time > max_period:
-                    return jsonify({'error': 'Export period cannot exceed 30 days'}), 400
-
-                # Get data
-                query = f'''
-                    SELECT * FROM "air_quality"
-                    WHERE time >= '{start_time.isoformat()}Z'
-                    AND time <= '{end_time.isoformat()}Z'
-                    ORDER BY time DESC
-                '''
-
-                result = self.influx_service.client.query(query)
-                data_points = list(result.get_points())
-
-                if format_type == 'csv':
-                    # Return CSV format
-                    import csv
-                    from io import StringIO
-
-                    output = StringIO()
-                    if data_points:
-                        writer = csv.DictWriter(output, fieldnames=data_points[0].keys())
-                        writer.writeheader()
-                        writer.writerows(data_points)
-
-                    return Response(
-                        output.getvalue(),
-                        mimetype='text/csv',
-                        headers={'Content-Disposition': f'attachment; filename=pm25_data_{start_str}_{end_str}.csv'}
-                    )
-                else:
-                    # Return JSON format
-                    return jsonify({
-                        'start_time': start_str,
-                        'end_time': end_str,
-                        'total_records': len(data_points),
-                        'data': data_points
-                    })
+                    job = self.export_service.submit(start_time, end_time, format_type)
+                except ExportQueueFullError as e:
+                    return jsonify({'error': str(e)}), 429
+
+                if not job.done_event.wait(config.EXPORT_SYNC_TIMEOUT):
+                    response = jsonify(job.to_dict())
+                    response.status_code = 202
+                    response.headers['Location'] = f"/api/v1/data/export/jobs/{job.job_id}"
+                    return response
+
+                return self._send_export(job)
 
             except Exception as e:
                 self.logger.error(f"Data export error: {e}")
                 return jsonify({'error': str(e)}), 500
 
+        @self.app.route('/api/v1/data/export/jobs', methods=['POST'])
+        def create_export_job():
+            """Create an asynchronous export job"""
+            try:
+                params = request.get_json(silent=True) or request.args
+                try:
+                    start_time, end_time, format_type = self._parse_export_params(params)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+
+                try:
+                    job = self.export_service.submit(start_time, end_time, format_type)
+                except ExportQueueFullError as e:
+                    return jsonify({'error': str(e)}), 429
+
+                response = jsonify(job.to_dict())
+                response.status_code = 202
+                response.headers['Location'] = f"/api/v1/data/export/jobs/{job.job_id}"
+                return response
+
+            except Exception as e:
+                self.logger.error(f"Export job creation error: {e}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/v1/data/export/jobs/<job_id>', methods=['GET'])
+        def get_export_job(job_id: str):
+            """Get export job status"""
+            try:
+                job = self.export_service.get_job(job_id)
+                if job is None:
+                    return jsonify({'error': 'Export job not found or expired'}), 404
+
+                return jsonify(job.to_dict())
+
+            except Exception as e:
+                self.logger.error(f"Export job status error: {e}")
+                return jsonify({'error': str(e)}), 500
+
+        @self.app.route('/api/v1/data/export/jobs/<job_id>/download', methods=['GET'])
+        def download_export_job(job_id: str):
+            """Download the result of a finished export job"""
+            try:
+                job = self.export_service.get_job(job_id)
+                if job is None:
+                    return jsonify({'error': 'Export job not found or expired'}), 404
+
+                if job.status != 'done':
+                    return jsonify(job.to_dict()), 409
+
+                return self._send_export(job)
+
+            except Exception as e:
+                self.logger.error(f"Export download error: {e}")
+                return jsonify({'error': str(e)}), 500
+
         @self.app.errorhandler(404)
         def not_found(error):
             return jsonify({'error': 'Endpoint not found'}), 404
@@ -0,0 +1,115 @@
+"""
+PM2.5 Ghostbuster - Change Feed
+Keeps recently ingested measurements for delta polling by map clients
+"""
+
+import threading
+import time
+from collections import deque
+from itertools import islice
+from datetime import timedelta
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from config.settings import config
+from src.utils.logger import get_logger
+from src.utils.timezone_utils import tz_manager
+
+
+class ChangeFeed:
+    """Bounded, sequence-numbered log of ingested GeoJSON features"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Initialize the change feed
+
+        Args:
+            max_entries: Maximum features kept for delta queries (defaults to config value)
+        """
+        self.logger = get_logger('change_feed')
+        self._lock = threading.Lock()
+        self._entries: Deque[Tuple[int, Dict[str, Any]]] = deque(
+            maxlen=max_entries or config.CHANGE_FEED_MAX_ENTRIES
+        )
+        self._seq = 0
+        # Cursors from a previous process must never match this one
+        self.epoch = int(time.time())
+
+    def _format_cursor(self, seq: int) -> str:
+        return f"{self.epoch:x}.{seq}"
+
+    def _parse_cursor(self, cursor: str) -> Optional[int]:
+        """Return the sequence number of a cursor issued by this feed, or None"""
+        try:
+            epoch, seq = cursor.split('.', 1)
+            if int(epoch, 16) != self.epoch:
+                return None
+            return int(seq)
+        except (ValueError, AttributeError):
+            return None
+
+    @property
+    def cursor(self) -> str:
+        """Cursor pointing at the latest ingested feature"""
+        with self._lock:
+            return self._format_cursor(self._seq)
+
+    def append(self, feature: Dict[str, Any]) -> int:
+        """
+        Record a newly ingested feature
+
+        Args:
+            feature: GeoJSON feature for the measurement
+
+        Returns:
+            Ingest sequence number assigned to the feature
+        """
+        with self._lock:
+            self._seq += 1
+            self._entries.append((self._seq, feature))
+            return self._seq
+
+    def changes_since(self, cursor: Optional[str], limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get features ingested after a cursor
+
+        Args:
+            cursor: Cursor returned by a previous call or embedded in the GeoJSON file
+            limit: Maximum number of features to return (defaults to config value)
+
+        Returns:
+            Dictionary with the new cursor, features, expiry boundary and whether
+            the client must reload the full data set instead
+        """
+        limit = limit or config.CHANGE_FEED_MAX_BATCH
+
+        # Features older than this local time have left the published window
+        expired_before = tz_manager.format_local_time(
+            tz_manager.now_utc() - timedelta(hours=config.DATA_RETENTION_HOURS)
+        )
+
+        with self._lock:
+            since = self._parse_cursor(cursor) if cursor else None
+            oldest = self._entries[0][0] if self._entries else self._seq + 1
+
+            # Unknown cursor, or the feed no longer holds everything after it
+            if since is None or since > self._seq or since < oldest - 1:
+                return {
+                    'cursor': self._format_cursor(self._seq),
+                    'reset': True,
+                    'features': [],
+                    'expired_before': expired_before,
+                    'more': False
+                }
+
+            # Entries are contiguous, so the start offset follows from the sequence
+            start = since - oldest + 1
+            batch = list(islice(self._entries, start, start + limit))
+            next_seq = batch[-1][0] if batch else since
+
+            return {
+                'cursor': self._format_cursor(next_seq),
+                'reset': False,
+                'features': [feature for _, feature in batch],
+                'expired_before': expired_before,
+                'more': next_seq < self._seq
+            }
@@ -0,0 +1,305 @@
+"""
+PM2.5 Ghostbuster - District Service
+Per-district hourly PM2.5 aggregates and the district choropleth GeoJSON
+"""
+
+import calendar
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import config
+from src.utils.logger import get_logger
+from src.utils.aqi import hourly_sums, pm25_to_aqi
+from src.utils.file_utils import atomic_write
+from src.utils.json_codec import json_codec
+from src.utils.spatial_index import PolygonIndex, read_polygon_features
+from src.models.air_quality import AirQualityMeasurement
+
+
+def _hour_string(hour: int) -> str:
+    """RFC3339 UTC start of an hour number (UNIX time // 3600)"""
+    return time.strftime('%Y-%m-%dT%H:00:00Z', time.gmtime(hour * 3600))
+
+
+def summarize_districts(snapshot: Dict[str, Any], hours: int, include_hourly: bool = False,
+                        now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Statistics of every district over the last hours
+
+    Args:
+        snapshot: DistrictService.snapshot() (possibly published by the collector)
+        hours: Hours to cover, the current hour included
+        include_hourly: Add each district's hourly series
+        now: Current UNIX time (defaults to now)
+
+    Returns:
+        Statistics per district in file order; districts without readings
+        have a count of 0 and None values
+    """
+    current_hour = int((now if now is not None else time.time()) // 3600)
+    first_hour = current_hour - hours + 1
+
+    results = []
+    for district in snapshot['districts']:
+        cells = [cell for cell in snapshot['hourly'].get(district['district_id'], ())
+                 if first_hour <= cell[0] <= current_hour]
+        count = sum(cell[2] for cell in cells)
+        mean = sum(cell[1] for cell in cells) / count if count else None
+        aqi, category = pm25_to_aqi(mean)
+        stats = {
+            'district_id': district['district_id'],
+            'name': district['name'],
+            'count': count,
+            'avg_pm25': round(mean, 2) if count else None,
+            'min_pm25': round(min(cell[3] for cell in cells), 2) if count else None,
+            'max_pm25': round(max(cell[4] for cell in cells), 2) if count else None,
+            'aqi': aqi,
+            'aqi_category': category
+        }
+        if include_hourly:
+            stats['hourly'] = [{
+                'hour': _hour_string(hour),
+                'count': hour_count,
+                'avg_pm25': round(total / hour_count, 2),
+                'min_pm25': round(low, 2),
+                'max_pm25': round(high, 2)
+            } for hour, total, hour_count, low, high in sorted(cells)]
+        results.append(stats)
+    return results
+
+
+class DistrictService:
+    """
+    Hourly PM2.5 count, mean, minimum and maximum per administrative district
+
+    District boundaries are the Polygon or MultiPolygon features of
+    DISTRICTS_PATH, indexed in a PolygonIndex. Ingested measurements are
+    tagged with the ID of the district containing them (stored as the
+    district tag in InfluxDB) and added to that district's current hour.
+    History and batches are assigned with the index's vectorized lookup.
+    Hourly aggregates are kept for DISTRICT_HISTORY_HOURS.
+    """
+
+    def __init__(self, districts_path: Optional[str] = None, history_hours: Optional[int] = None):
+        """
+        Load the district boundaries
+
+        Args:
+            districts_path: GeoJSON file of district polygons (defaults to
+                            config value; empty disables districts)
+            history_hours: Hours of hourly aggregates kept (defaults to config value)
+        """
+        self.logger = get_logger('district_service')
+        self.history_hours = history_hours or config.DISTRICT_HISTORY_HOURS
+        self._lock = threading.Lock()
+        self.districts: List[Dict[str, Any]] = []
+        self.index = PolygonIndex([])
+        # district ID -> hour number (UNIX time // 3600) -> [sum, count, min, max]
+        self._hours: Dict[str, Dict[int, List[float]]] = {}
+        self._next_prune = 0.0
+
+        districts_path = districts_path if districts_path is not None else config.DISTRICTS_PATH
+        if districts_path:
+            self.load(districts_path)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.districts)
+
+    def load(self, path: str) -> None:
+        """
+        Load district boundaries from a GeoJSON file
+
+        Features take their ID from the id property (or feature id) and
+        their name from name. Districts are expected not to overlap; a point
+        on a shared border goes to the first district in the file.
+        """
+        try:
+            features = read_polygon_features(path)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to load districts from {path}: {e}")
+            return
+
+        districts = []
+        for i, feature in enumerate(features):
+            district_id = str(feature.properties.get('id', feature.feature_id if feature.feature_id is not None
+                                                     else i))
+            districts.append({
+                'district_id': district_id,
+                'name': str(feature.properties.get('name', district_id)),
+                'geometry': feature.geometry
+            })
+
+        index = PolygonIndex([feature.rings for feature in features])
+        with self._lock:
+            self.districts, self.index = districts, index
+        self.logger.info(f"Loaded {len(districts)} districts from {path}")
+
+    def locate(self, latitude: float, longitude: float) -> Optional[str]:
+        """ID of the district containing a location, None outside all districts"""
+        shapes = self.index.locate(longitude, latitude)
+        return self.districts[shapes[0]]['district_id'] if shapes else None
+
+    def tag(self, measurement: AirQualityMeasurement) -> Optional[str]:
+        """Set the district of a measurement before it is stored"""
+        if self.districts:
+            measurement.district = self.locate(measurement.latitude, measurement.longitude)
+        return measurement.district
+
+    def add(self, district_id: str, pm25: float, timestamp: float) -> None:
+        """
+        Add a reading to a district's hourly aggregates
+
+        Args:
+            district_id: District identifier
+            pm25: PM2.5 value
+            timestamp: UNIX time of the reading (future times count as now)
+        """
+        if not math.isfinite(pm25) or pm25 < 0:
+            return
+        now = time.time()
+        hour = int(min(timestamp, now) // 3600)
+        if hour <= now // 3600 - self.history_hours:
+            return
+
+        with self._lock:
+            district_hours = self._hours.setdefault(district_id, {})
+            cell = district_hours.get(hour)
+            if cell is None:
+                district_hours[hour] = [pm25, 1, pm25, pm25]
+            else:
+                cell[0] += pm25
+                cell[1] += 1
+                if pm25 < cell[2]:
+                    cell[2] = pm25
+                if pm25 > cell[3]:
+                    cell[3] = pm25
+
+            if now >= self._next_prune:
+                self._prune(now)
+
+    def add_measurement(self, measurement: AirQualityMeasurement) -> None:
+        """Add an ingested measurement (tagged if it has no district yet)"""
+        district_id = measurement.district or self.tag(measurement)
+        if district_id is not None:
+            self.add(district_id, float(measurement.pm25),
+                     calendar.timegm(measurement.timestamp.utctimetuple()) + measurement.timestamp.microsecond / 1e6)
+
+    def load_history(self, latitudes: Sequence[float], longitudes: Sequence[float],
+                     timestamps: Sequence[float], values: Sequence[float]) -> None:
+        """
+        Assign stored readings to districts and add them, e.g. when warming up
+
+        Args:
+            latitudes: Latitude of each reading
+            longitudes: Longitude of each reading
+            timestamps: UNIX time of each reading
+            values: PM2.5 value of each reading
+        """
+        if not self.districts or not len(values):
+            return
+        shapes = self.index.locate_first_array(np.asarray(longitudes, dtype=np.float64),
+                                               np.asarray(latitudes, dtype=np.float64))
+        self._add_located(shapes, np.asarray(timestamps, dtype=np.float64), np.asarray(values, dtype=np.float64))
+
+    def _add_located(self, shapes: np.ndarray, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Aggregate readings per district and hour with NumPy and merge them"""
+        now = time.time()
+        keep = (shapes >= 0) & np.isfinite(values) & (values >= 0)
+        if not keep.any():
+            return
+
+        codes = shapes[keep]
+        values = values[keep]
+        hours = (np.minimum(timestamps[keep], now) // 3600).astype(np.int64)
+        first_hour = max(int(hours.min()), int(now // 3600) - self.history_hours + 1)
+        hour_count = int(hours.max()) - first_hour + 1
+        if hour_count <= 0:
+            return
+        series = len(self.districts)
+        sums, counts = hourly_sums(codes, hours, values, series, first_hour, hour_count)
+
+        inside = (hours >= first_hour)
+        cells = codes[inside] * hour_count + hours[inside] - first_hour
+        minimums = np.full(series * hour_count, np.inf)
+        maximums = np.full(series * hour_count, -np.inf)
+        np.minimum.at(minimums, cells, values[inside])
+        np.maximum.at(maximums, cells, values[inside])
+
+        rows, columns = np.nonzero(counts)
+        flat = rows * hour_count + columns
+        with self._lock:
+            for row, column, total, count, low, high in zip(
+                    rows.tolist(), columns.tolist(), sums[rows, columns].tolist(),
+                    counts[rows, columns].tolist(), minimums[flat].tolist(), maximums[flat].tolist()):
+                district_hours = self._hours.setdefault(self.districts[row]['district_id'], {})
+                cell = district_hours.get(first_hour + column)
+                if cell is None:
+                    district_hours[first_hour + column] = [total, count, low, high]
+                else:
+                    cell[0] += total
+                    cell[1] += count
+                    cell[2] = min(cell[2], low)
+                    cell[3] = max(cell[3], high)
+
+    def _prune(self, now: float) -> None:
+        """Drop hours past the history (lock held)"""
+        self._next_prune = now + 3600
+        cutoff = int(now // 3600) - self.history_hours
+        for district_hours in self._hours.values():
+            for hour in [hour for hour in district_hours if hour <= cutoff]:
+                del district_hours[hour]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Districts and their hourly aggregates, for summarize_districts and API workers"""
+        with self._lock:
+            hourly = {district_id: [[hour] + cell for hour, cell in district_hours.items()]
+                      for district_id, district_hours in self._hours.items()}
+        return {
+            'districts': [{'district_id': d['district_id'], 'name': d['name']} for d in self.districts],
+            'hourly': hourly
+        }
+
+    def district_stats(self, hours: int = 24, include_hourly: bool = False) -> List[Dict[str, Any]]:
+        """Statistics of every district over the last hours"""
+        return summarize_districts(self.snapshot(), hours, include_hourly)
+
+    def save_choropleth(self, file_path: Optional[str] = None, hours: Optional[int] = None) -> bool:
+        """
+        Publish the district polygons with their statistics as GeoJSON
+
+        Args:
+            file_path: Output file path (uses config default if None)
+            hours: Hours covered by the statistics (uses config default if None)
+
+        Returns:
+            True if successful
+        """
+        file_path = file_path or config.DISTRICT_GEOJSON_PATH
+        hours = hours or config.DISTRICT_CHOROPLETH_HOURS
+
+        try:
+            stats = self.district_stats(hours)
+            collection = {
+                'type': 'FeatureCollection',
+                'hours': hours,
+                'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'features': [{
+                    'type': 'Feature',
+                    'geometry': district['geometry'],
+                    'properties': district_stats
+                } for district, district_stats in zip(self.districts, stats)]
+            }
+            with atomic_write(file_path, 'wb') as f:
+                f.write(json_codec.dumps_bytes(collection))
+
+            self.logger.info(f"Saved district choropleth with {len(stats)} districts to: {file_path}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to save district choropleth: {e}")
+            return False
@@ -0,0 +1,339 @@
+"""
+PM2.5 Ghostbuster - Export Service
+Asynchronous data export jobs with bounded concurrency
+"""
+
+import csv
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import config
+from src.utils.logger import get_logger
+from src.utils.file_utils import atomic_write
+from src.utils.json_codec import json_codec
+from src.services.influx_service import InfluxService, query_caller
+
+
+# Job IDs are uuid4 hex strings, which also keeps lookups inside EXPORT_PATH
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+# Export results, job state and atomic_write temporaries, named after the job ID
+EXPORT_FILE_PATTERN = re.compile(r'\.?([0-9a-f]{32})\.(?:csv|json|job\.json)(?:\..+\.tmp)?')
+
+
+class ExportQueueFullError(Exception):
+    """Raised when too many export jobs are pending"""
+
+
+@dataclass
+class ExportJob:
+    """Export job state"""
+    job_id: str
+    start_time: datetime
+    end_time: datetime
+    format: str
+    status: str = 'queued'  # queued, running, done, failed
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    file_path: Optional[str] = None
+    total_records: int = 0
+    error: Optional[str] = None
+    done_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cache_key(self) -> Tuple[str, str, str]:
+        return (self.start_time.isoformat(), self.end_time.isoformat(), self.format)
+
+    @property
+    def filename(self) -> str:
+        """Download file name"""
+        return (f"pm25_data_{self.start_time.strftime('%Y%m%dT%H%M%SZ')}_"
+                f"{self.end_time.strftime('%Y%m%dT%H%M%SZ')}.{self.format}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to JSON-serializable dictionary"""
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'start_time': self.start_time.isoformat() + 'Z',
+            'end_time': self.end_time.isoformat() + 'Z',
+            'format': self.format,
+            'created_at': datetime.utcfromtimestamp(self.created_at).isoformat() + 'Z',
+            'finished_at': (datetime.utcfromtimestamp(self.finished_at).isoformat() + 'Z'
+                            if self.finished_at else None),
+            'total_records': self.total_records,
+            'error': self.error
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """Full job state as persisted for other API worker processes"""
+        return {
+            'job_id': self.job_id,
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.end_time.isoformat(),
+            'format': self.format,
+            'status': self.status,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'file_path': self.file_path,
+            'total_records': self.total_records,
+            'error': self.error
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'ExportJob':
+        """Create a job from a persisted state"""
+        job = cls(job_id=state['job_id'],
+                  start_time=datetime.fromisoformat(state['start_time']),
+                  end_time=datetime.fromisoformat(state['end_time']),
+                  format=state['format'],
+                  status=state['status'],
+                  created_at=state['created_at'],
+                  finished_at=state.get('finished_at'),
+                  file_path=state.get('file_path'),
+                  total_records=state.get('total_records', 0),
+                  error=state.get('error'))
+        if job.finished_at is not None:
+            job.done_event.set()
+        return job
+
+
+class ExportService:
+    """
+    Runs data exports in a bounded worker pool and caches their results
+
+    Job state is persisted as <job_id>.job.json next to the export files, so any
+    API worker process can report on and serve a job created by another.
+    Deduplication of identical jobs and the pending limit are per process.
+    Files left behind by a restarted worker are removed by an mtime sweep
+    of the directory once they are older than the result TTL.
+    """
+
+    FORMATS = ('json', 'csv')
+
+    def __init__(self, influx_service: Optional[InfluxService] = None,
+                 export_path: Optional[str] = None):
+        """
+        Initialize export service
+
+        Args:
+            influx_service: InfluxDB service instance
+            export_path: Directory for export files (defaults to config value)
+        """
+        self.logger = get_logger('export_service')
+        self.influx_service = influx_service or InfluxService()
+        self.export_path = Path(export_path or config.EXPORT_PATH)
+
+        self._executor = ThreadPoolExecutor(max_workers=config.EXPORT_MAX_WORKERS,
+                                            thread_name_prefix='export')
+        self._jobs: Dict[str, ExportJob] = {}
+        self._by_params: Dict[Tuple[str, str, str], str] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def submit(self, start_time: datetime, end_time: datetime, format_type: str) -> ExportJob:
+        """
+        Create an export job, reusing a queued, running or cached identical job
+
+        Args:
+            start_time: Export range start (naive UTC)
+            end_time: Export range end (naive UTC)
+            format_type: 'json' or 'csv'
+
+        Returns:
+            ExportJob for the parameters
+
+        Raises:
+            ExportQueueFullError: If too many jobs are pending
+        """
+        job = ExportJob(job_id=uuid.uuid4().hex, start_time=start_time,
+                        end_time=end_time, format=format_type)
+
+        with self._lock:
+            self._expire_jobs()
+            self._sweep_files()
+
+            existing_id = self._by_params.get(job.cache_key)
+            if existing_id and self._jobs[existing_id].status != 'failed':
+                return self._jobs[existing_id]
+
+            pending = sum(1 for j in self._jobs.values() if j.status in ('queued', 'running'))
+            if pending >= config.EXPORT_MAX_PENDING:
+                raise ExportQueueFullError("Too many export jobs pending, try again later")
+
+            self._jobs[job.job_id] = job
+            self._by_params[job.cache_key] = job.job_id
+
+        self._save_job(job)
+        self._executor.submit(self._run_job, job)
+        self.logger.info(f"Queued export job {job.job_id} ({format_type}, "
+                         f"{start_time.isoformat()}Z to {end_time.isoformat()}Z)")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ExportJob]:
+        """Get a job by ID, or None if unknown or expired"""
+        with self._lock:
+            self._expire_jobs()
+            self._sweep_files()
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+
+        # Created by another worker process
+        job = self._load_job(job_id)
+        if job is not None and job.finished_at is not None \
+                and job.finished_at < time.time() - config.EXPORT_RESULT_TTL:
+            self._remove_files(job)
+            return None
+        return job
+
+    def _state_path(self, job_id: str) -> Path:
+        return self.export_path / f"{job_id}.job.json"
+
+    def _save_job(self, job: ExportJob) -> None:
+        """Persist a job's state for other worker processes"""
+        try:
+            with atomic_write(self._state_path(job.job_id), 'wb') as f:
+                f.write(json_codec.dumps_bytes(job.to_state()))
+        except OSError as e:
+            self.logger.error(f"Failed to save export job {job.job_id}: {e}")
+
+    def _load_job(self, job_id: str) -> Optional[ExportJob]:
+        """Read a persisted job, or None if unknown"""
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        try:
+            with open(self._state_path(job_id), 'rb') as f:
+                return ExportJob.from_state(json_codec.loads(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"Failed to read export job {job_id}: {e}")
+            return None
+
+    def _remove_files(self, job: ExportJob) -> None:
+        """Delete a job's export file and state"""
+        for path in (job.file_path, self._state_path(job.job_id)):
+            if path:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def _expire_jobs(self) -> None:
+        """Drop finished jobs older than the result TTL and their files (lock held)"""
+        cutoff = time.time() - config.EXPORT_RESULT_TTL
+
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is None or job.finished_at >= cutoff:
+                continue
+
+            del self._jobs[job_id]
+            if self._by_params.get(job.cache_key) == job_id:
+                del self._by_params[job.cache_key]
+
+            self._remove_files(job)
+
+    def _sweep_files(self) -> None:
+        """
+        Delete export files not modified within the result TTL (lock held)
+
+        Catches the results, state and temporaries of jobs whose worker
+        process restarted before it expired them. Runs at most once per
+        sweep interval; jobs still pending in this process are kept.
+        """
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + min(config.EXPORT_RESULT_TTL, 300)
+        cutoff = now - config.EXPORT_RESULT_TTL
+
+        try:
+            entries = list(os.scandir(self.export_path))
+        except OSError as e:
+            self.logger.warning(f"Failed to scan export directory {self.export_path}: {e}")
+            return
+
+        removed = 0
+        for entry in entries:
+            match = EXPORT_FILE_PATTERN.fullmatch(entry.name)
+            if match is None or match.group(1) in self._jobs:
+                continue
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+        if removed:
+            self.logger.info(f"Removed {removed} expired export files")
+
+    def _run_job(self, job: ExportJob) -> None:
+        """Build the export file for a job (runs in the worker pool)"""
+        job.status = 'running'
+        self._save_job(job)
+        started = time.time()
+        file_path = self.export_path / f"{job.job_id}.{job.format}"
+
+        try:
+            points = self.influx_service.iter_data(job.start_time, job.end_time, positive_only=False)
+
+            with query_caller('export_job'), atomic_write(file_path, 'w', encoding='utf-8') as f:
+                if job.format == 'csv':
+                    job.total_records = self._write_csv(points, f)
+                else:
+                    job.total_records = self._write_json(job, points, f)
+
+            job.file_path = str(file_path)
+            job.status = 'done'
+            self.logger.info(f"Export job {job.job_id} finished: {job.total_records} records "
+                             f"in {time.time() - started:.1f}s")
+
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            self.logger.error(f"Export job {job.job_id} failed: {e}")
+
+        finally:
+            job.finished_at = time.time()
+            self._save_job(job)
+            job.done_event.set()
+
+    @staticmethod
+    def _write_csv(points, f) -> int:
+        """Stream points as CSV with columns taken from the first row"""
+        writer = None
+        count = 0
+
+        for point in points:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(point.keys()), extrasaction='ignore')
+                writer.writeheader()
+            writer.writerow(point)
+            count += 1
+
+        return count
+
+    @staticmethod
+    def _write_json(job: ExportJob, points, f) -> int:
+        """Stream points in the same JSON layout as the synchronous export"""
+        f.write('{"start_time":%s,"end_time":%s,"data":[' % (
+            json_codec.dumps(job.start_time.isoformat() + 'Z'), json_codec.dumps(job.end_time.isoformat() + 'Z')))
+
+        count = 0
+        for point in points:
+            if count:
+                f.write(',')
+            f.write(json_codec.dumps(point))
+            count += 1
+
+        f.write('],"total_records":%d}' % count)
+        return count
@@ -0,0 +1,160 @@
+"""
+PM2.5 Ghostbuster - Geofence Service
+Rolling PM2.5 aggregates per polygon zone, fed by whichever sensors pass through
+"""
+
+import calendar
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import config
+from src.utils.logger import get_logger
+from src.utils.rolling_window import RollingWindow
+from src.utils.spatial_index import PolygonIndex, read_polygon_features, ring_centroid
+from src.services.rolling_stats import format_window_stats
+from src.models.air_quality import AirQualityMeasurement
+
+
+@dataclass
+class Zone:
+    """Geofence zone loaded from a GeoJSON feature"""
+    zone_id: str
+    name: str
+    window_seconds: int
+    alert_pm25: float
+    location: Dict[str, float]
+
+    @property
+    def alert_key(self) -> str:
+        """Key of the zone's alerts, next to device IDs"""
+        return f"zone:{self.zone_id}"
+
+
+# (zone, readings in the window, window mean or None)
+ZoneState = Tuple[Zone, int, Optional[float]]
+
+
+class GeofenceService:
+    """
+    Rolling PM2.5 mean, minimum and maximum per geofence zone
+
+    Zones are Polygon or MultiPolygon features of GEOFENCE_ZONES_PATH,
+    indexed in a PolygonIndex so each measurement is assigned to the zones
+    containing it in about constant time. Every zone keeps a RollingWindow
+    over its own window (window_minutes property, GEOFENCE_WINDOW_MINUTES by
+    default); the resulting states feed zone alerts in AlertService.
+    """
+
+    def __init__(self, zones_path: Optional[str] = None):
+        """
+        Load the zones
+
+        Args:
+            zones_path: GeoJSON file of zone polygons (defaults to config
+                        value; empty disables geofencing)
+        """
+        self.logger = get_logger('geofence_service')
+        self._lock = threading.Lock()
+        self.zones: List[Zone] = []
+        self._windows: List[RollingWindow] = []
+        self.index = PolygonIndex([])
+
+        zones_path = zones_path if zones_path is not None else config.GEOFENCE_ZONES_PATH
+        if zones_path:
+            self.load(zones_path)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.zones)
+
+    def load(self, path: str) -> None:
+        """
+        Replace the zones with those of a GeoJSON file
+
+        Features take their ID from the id property (or feature id), their
+        name from name, and optionally alert_pm25 and window_minutes.
+        """
+        try:
+            features = read_polygon_features(path)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to load geofence zones from {path}: {e}")
+            return
+
+        zones, shapes = [], []
+        for i, (feature_id, properties, rings, _) in enumerate(features):
+            zone_id = str(properties.get('id', feature_id if feature_id is not None else i))
+            try:
+                window_minutes = float(properties.get('window_minutes') or config.GEOFENCE_WINDOW_MINUTES)
+                alert_pm25 = float(properties.get('alert_pm25') or config.GEOFENCE_ALERT_PM25)
+            except (TypeError, ValueError):
+                self.logger.error(f"Invalid window_minutes or alert_pm25 of zone {zone_id}, skipped")
+                continue
+            lon, lat = ring_centroid(rings[0])
+            zones.append(Zone(zone_id, str(properties.get('name', zone_id)), max(60, int(window_minutes * 60)),
+                              alert_pm25, {'latitude': round(lat, 6), 'longitude': round(lon, 6)}))
+            shapes.append(rings)
+
+        index = PolygonIndex(shapes)
+        # 60 buckets per window, at least 1 second wide
+        windows = [RollingWindow(zone.window_seconds, max(1, zone.window_seconds // 60)) for zone in zones]
+        with self._lock:
+            self.zones, self._windows, self.index = zones, windows, index
+        self.logger.info(f"Loaded {len(zones)} geofence zones from {path}")
+
+    def add(self, latitude: float, longitude: float, pm25: float, timestamp: float) -> List[ZoneState]:
+        """
+        Add a reading to the zones containing its location
+
+        Args:
+            latitude: Reading latitude
+            longitude: Reading longitude
+            pm25: PM2.5 value
+            timestamp: UNIX time of the reading (future times count as now)
+
+        Returns:
+            States of the zones the reading was added to
+        """
+        if not self.zones or not math.isfinite(pm25):
+            return []
+        now = time.time()
+        timestamp = min(timestamp, now)
+
+        states = []
+        with self._lock:
+            for i in self.index.locate(longitude, latitude):
+                window = self._windows[i]
+                window.add(pm25, timestamp)
+                count, mean, _, _ = window.stats(now)
+                states.append((self.zones[i], count, mean))
+        return states
+
+    def add_measurement(self, measurement: AirQualityMeasurement) -> List[ZoneState]:
+        """Add an ingested measurement (naive UTC timestamp)"""
+        return self.add(measurement.latitude, measurement.longitude, float(measurement.pm25),
+                        calendar.timegm(measurement.timestamp.utctimetuple()) + measurement.timestamp.microsecond / 1e6)
+
+    def states(self) -> List[ZoneState]:
+        """Current state of every zone, e.g. to clear alerts of zones nobody passes"""
+        now = time.time()
+        with self._lock:
+            return [(zone, *window.stats(now)[:2]) for zone, window in zip(self.zones, self._windows)]
+
+    def zone_stats(self) -> List[Dict[str, Any]]:
+        """Window statistics of every zone, for the API and its workers"""
+        now = time.time()
+        with self._lock:
+            stats = []
+            for zone, window in zip(self.zones, self._windows):
+                zone_stats = {
+                    'zone_id': zone.zone_id,
+                    'name': zone.name,
+                    'window_minutes': round(zone.window_seconds / 60, 2),
+                    'alert_pm25': zone.alert_pm25,
+                    'location': zone.location
+                }
+                zone_stats.update(format_window_stats(*window.stats(now)))
+                stats.append(zone_stats)
+        return stats
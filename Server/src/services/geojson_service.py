@@ -3,51 +3,215 @@ GeoJSON Service for PM2.5 Ghostbuster
 Generates GeoJSON files from air quality data
 """
 
-import json
-from pathlib import Path
-from typing import List, Dict, Any, Optional
-import geojson
+import calendar
+import os
+import threading
+import zlib
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:  # Brotli output is optional
+    brotli = None
 
 from config.settings import config
 from src.utils.logger import get_logger
 from src.utils.timezone_utils import tz_manager
+from src.utils.geojson_stream import GeoJSONStreamEncoder, Feature
+from src.utils.geojson_columnar import encode_features
+from src.utils.file_utils import atomic_write
+from src.utils.json_codec import json_codec
 from src.services.influx_service import InfluxService
+from src.services.change_feed import ChangeFeed
+from src.services.nowcast_service import NowCastService
+from src.models.air_quality import AirQualityMeasurement
+
+# File suffix for each precompressed Content-Encoding
+COMPRESSED_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz'
+}
+
+# Written after each publish: versions of the raw file and of the siblings
+# published with it, so siblings of another publish are never served
+MANIFEST_SUFFIX = '.manifest.json'
+
+
+@dataclass
+class GeoJSONArtifact:
+    """Published GeoJSON file with its precompressed variants"""
+    path: str
+    version: int
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def etag(self) -> str:
+        """Entity tag identifying this version of the artifact"""
+        return f"geojson-{self.version:x}"
+
+
+class _CompressedVariants:
+    """Incrementally builds gzip and Brotli variants of a byte stream"""
+
+    def __init__(self):
+        self._gzip = zlib.compressobj(level=6, wbits=31)
+        self._brotli = brotli.Compressor(quality=config.GEOJSON_BROTLI_QUALITY) if brotli else None
+        self._parts: Dict[str, List[bytes]] = {'gzip': []}
+        if self._brotli:
+            self._parts['br'] = []
+
+    def feed(self, data: bytes) -> None:
+        """Compress the next block of data"""
+        self._parts['gzip'].append(self._gzip.compress(data))
+        if self._brotli:
+            self._parts['br'].append(self._brotli.process(data))
+
+    def finish(self) -> Dict[str, bytes]:
+        """Flush the compressors and return the complete variants"""
+        self._parts['gzip'].append(self._gzip.flush())
+        if self._brotli:
+            self._parts['br'].append(self._brotli.finish())
+        return {encoding: b''.join(parts) for encoding, parts in self._parts.items()}
+
+
+def feature_id(device_id: Any, utc_micros: int) -> str:
+    """
+    Stable feature ID of a measurement: device and UTC time in microseconds
+
+    Published files, the change feed and live push use the same IDs, so map
+    clients can recognise a measurement they already show.
+    """
+    return f"{device_id}@{utc_micros}"
 
 
 class GeoJSONService:
     """Service for generating GeoJSON files from air quality data"""
 
-    def __init__(self, influx_service: Optional[InfluxService] = None):
+    def __init__(self, influx_service: Optional[InfluxService] = None,
+                 change_feed: Optional[ChangeFeed] = None,
+                 nowcast_service: Optional[NowCastService] = None):
         """
         Initialize GeoJSON service
 
         Args:
             influx_service: InfluxDB service instance
+            change_feed: Change feed whose cursor is embedded in published files
+            nowcast_service: Per-device NowCast added to features and devices
         """
         self.logger = get_logger('geojson_service')
         self.influx_service = influx_service or InfluxService()
+        self.change_feed = change_feed
+        self.nowcast_service = nowcast_service
+        self._artifact: Optional[GeoJSONArtifact] = None
+        self._artifact_lock = threading.Lock()
 
-    def _data_point_to_feature(self, point: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _format_times(data_points: List[Dict[str, Any]]) -> List[str]:
+        """
+        Convert the UTC times of data points to local display strings in one batch
+
+        Args:
+            data_points: InfluxDB data points
+
+        Returns:
+            Display times; the raw value if it cannot be converted, "Unknown" if missing
+        """
+        utc_times = [point.get('time') for point in data_points]
+        formatted = tz_manager.format_utc_batch(utc_times)
+        return [local if local is not None else (str(utc) if utc else "Unknown")
+                for utc, local in zip(utc_times, formatted)]
+
+    def _encode_point_features(self, data_points: List[Dict[str, Any]]) -> List[str]:
+        """
+        Encode a batch of data points as GeoJSON feature JSON text
+
+        Uses the columnar encoder and falls back to per-point conversion for
+        rows it cannot handle, preserving the input order.
+
+        Args:
+            data_points: InfluxDB data points of one query
+
+        Returns:
+            Feature JSON strings, skipping points that cannot be converted
+        """
+        self._add_nowcast(data_points)
+        times = self._format_times(data_points)
+        ids = self._feature_ids(data_points)
+        encoded = encode_features(data_points, times, ids)
+
+        features = []
+        for point, formatted_time, point_id, feature in zip(data_points, times, ids, encoded):
+            if feature is None:
+                try:
+                    feature = json_codec.dumps(self._data_point_to_feature(point, formatted_time, point_id))
+                except Exception as e:
+                    self.logger.warning(f"Failed to convert point to feature: {e}")
+                    continue
+            features.append(feature)
+
+        return features
+
+    @staticmethod
+    def _feature_ids(data_points: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Feature IDs of data points from their RFC3339 UTC times, parsed in one batch
+
+        Returns:
+            ID per point, None for points without a valid time
+        """
+        utc_times = [point.get('time') for point in data_points]
+        try:
+            micros = np.array([t[:-1] if t.endswith('Z') else t for t in utc_times],
+                              dtype='datetime64[us]').astype(np.int64).tolist()
+        except (AttributeError, TypeError, ValueError):
+            # Some time is missing or malformed; parse point by point
+            micros = []
+            for t in utc_times:
+                try:
+                    micros.append(int(np.datetime64(t[:-1] if t.endswith('Z') else t, 'us').astype(np.int64)))
+                except (AttributeError, TypeError, ValueError):
+                    micros.append(None)
+
+        return [None if value is None else feature_id(point.get('device_id', 'unknown'), value)
+                for point, value in zip(data_points, micros)]
+
+    def _add_nowcast(self, data_points: List[Dict[str, Any]]) -> None:
+        """Add the NowCast and AQI at each point's hour as point fields, computed per batch"""
+        if self.nowcast_service is None or not data_points:
+            return
+
+        try:
+            nowcasts, aqis = self.nowcast_service.point_values(
+                [point.get('device_id', 'unknown') for point in data_points],
+                [point['time'] for point in data_points])
+        except (KeyError, TypeError, ValueError) as e:
+            self.logger.warning(f"Failed to compute NowCast for points: {e}")
+            return
+
+        for point, value, aqi in zip(data_points, nowcasts, aqis):
+            point['nowcast'] = value
+            point['aqi'] = aqi
+
+    def _data_point_to_feature(self, point: Dict[str, Any], formatted_time: Optional[str] = None,
+                               point_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Convert InfluxDB data point to GeoJSON feature
 
         Args:
             point: InfluxDB data point
+            formatted_time: Local display time if already converted in a batch
+            point_id: Feature ID (omitted if None)
 
         Returns:
             GeoJSON feature dictionary
         """
         # Convert UTC time to Bangkok time for display
-        utc_time = point.get('time')
-        if utc_time:
-            try:
-                local_time = tz_manager.utc_to_local(utc_time)
-                formatted_time = local_time.strftime('%Y-%m-%d %H:%M:%S')
-            except Exception as e:
-                self.logger.warning(f"Time conversion error: {e}")
-                formatted_time = str(utc_time)
-        else:
-            formatted_time = "Unknown"
+        if formatted_time is None:
+            formatted_time = self._format_times([point])[0]
 
         properties = {
             "device_id": point.get("device_id", "unknown"),
@@ -64,17 +228,46 @@ class GeoJSONService:
             if key not in ["device_id", "pm25", "latitude", "longitude", "time", "speed"]:
                 properties[key] = value
 
-        return {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [
-                    round(float(point.get("longitude", 0)), 6),
-                    round(float(point.get("latitude", 0)), 6)
-                ]
-            },
-            "properties": properties
+        feature = {"type": "Feature"}
+        if point_id is not None:
+            feature["id"] = point_id
+        feature["geometry"] = {
+            "type": "Point",
+            "coordinates": [
+                round(float(point.get("longitude", 0)), 6),
+                round(float(point.get("latitude", 0)), 6)
+            ]
         }
+        feature["properties"] = properties
+        return feature
+
+    def measurement_to_feature(self, measurement: AirQualityMeasurement) -> Dict[str, Any]:
+        """
+        Convert a freshly ingested measurement to a GeoJSON feature
+
+        The feature matches the ones built from InfluxDB rows for the
+        published file, so clients can merge both sources.
+
+        Args:
+            measurement: Air quality measurement
+
+        Returns:
+            GeoJSON feature dictionary
+        """
+        influx_point = measurement.to_influx_point()
+        point = dict(influx_point['fields'])
+        point['device_id'] = measurement.device_id
+        point['time'] = measurement.timestamp.isoformat()
+        if measurement.district is not None:
+            point['district'] = measurement.district
+        if self.nowcast_service is not None:
+            current = self.nowcast_service.current(measurement.device_id)
+            point['nowcast'] = current['nowcast']
+            point['aqi'] = current['aqi']
+        timestamp = measurement.timestamp
+        point_id = feature_id(measurement.device_id,
+                              calendar.timegm(timestamp.utctimetuple()) * 1000000 + timestamp.microsecond)
+        return self._data_point_to_feature(point, point_id=point_id)
 
     def generate_geojson(self, hours: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
@@ -98,20 +291,15 @@ class GeoJSONService:
 
             if not data_points:
                 self.logger.warning("No data points found")
-                return geojson.FeatureCollection([])
+                return {'type': 'FeatureCollection', 'features': []}
 
-            # Convert to GeoJSON features
-            features = []
-            for point in data_points:
-                try:
-                    feature = self._data_point_to_feature(point)
-                    features.append(feature)
-                except Exception as e:
-                    self.logger.warning(f"Failed to convert point to feature: {e}")
-                    continue
+            # Convert to GeoJSON features; decoding the columnar JSON text is
+            # much cheaper than building the dictionaries point by point
+            features = json_codec.loads('[' + ','.join(self._encode_point_features(data_points)) + ']')
 
-            # Create FeatureCollection
-            feature_collection = geojson.FeatureCollection(features)
+            # Create FeatureCollection; plain dictionaries skip the per-feature
+            # object conversion and validation of geojson.FeatureCollection
+            feature_collection = {'type': 'FeatureCollection', 'features': features}
 
             self.logger.info(f"Generated GeoJSON with {len(features)} features from last {hours} hours")
             return feature_collection
@@ -120,13 +308,58 @@ class GeoJSONService:
             self.logger.error(f"Failed to generate GeoJSON: {e}")
             return None
 
+    def iter_features(self, hours: Optional[int] = None) -> Iterator[str]:
+        """
+        Iterate over GeoJSON features for recent air quality data
+
+        Args:
+            hours: Hours of data to include (defaults to config value)
+
+        Yields:
+            GeoJSON feature JSON text, newest first
+        """
+        hours = hours or config.DATA_RETENTION_HOURS
+        points = self.influx_service.iter_recent_data(hours)
+
+        # Encode per batch rather than per point
+        while True:
+            batch = list(islice(points, config.GEOJSON_STREAM_CHUNK_FEATURES))
+            if not batch:
+                break
+
+            yield from self._encode_point_features(batch)
+
+    def stream_geojson(self, hours: Optional[int] = None) -> Optional[Iterator[str]]:
+        """
+        Stream a GeoJSON FeatureCollection as JSON text chunks
+
+        Args:
+            hours: Hours of data to include (defaults to config value)
+
+        Returns:
+            Iterator of JSON text chunks or None if InfluxDB is unavailable
+        """
+        if not self.influx_service.client:
+            self.logger.error("InfluxDB client not connected")
+            return None
+
+        encoder = GeoJSONStreamEncoder()
+        return encoder.iter_encode(self.iter_features(hours))
+
     def save_geojson_file(self, geojson_data: Optional[Dict[str, Any]] = None,
                          file_path: Optional[str] = None) -> bool:
         """
-        Save GeoJSON data to file
+        Publish GeoJSON data to file
+
+        Features are streamed into a temporary file that atomically replaces
+        the published file, so readers never see a partial write. When
+        precompression is enabled, .gz and .br siblings are published as well
+        for nginx gzip_static/brotli_static, and kept in memory for the API.
+        A manifest written last records which sibling versions belong to the
+        raw file, for processes that load the artifact from disk.
 
         Args:
-            geojson_data: GeoJSON data (generates new if None)
+            geojson_data: GeoJSON data (streams new data if None)
             file_path: Output file path (uses config default if None)
 
         Returns:
@@ -135,39 +368,129 @@ class GeoJSONService:
         file_path = file_path or config.GEOJSON_OUTPUT_PATH
 
         try:
-            # Generate GeoJSON data if not provided
-            if geojson_data is None:
-                geojson_data = self.generate_geojson()
-
-            if geojson_data is None:
+            if geojson_data is not None:
+                features: Iterable[Feature] = geojson_data.get('features', [])
+            elif self.influx_service.client:
+                features = self.iter_features()
+            else:
                 self.logger.error("No GeoJSON data to save")
                 return False
 
-            # Ensure output directory exists
-            output_path = Path(file_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # Write to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(geojson_data, f, ensure_ascii=False, separators=(',', ':'))
-
-            feature_count = len(geojson_data.get('features', []))
-            self.logger.info(f"Saved GeoJSON file with {feature_count} features to: {file_path}")
+            # Take the cursor before querying, so deltas fetched with it
+            # overlap the file rather than leave a gap
+            foreign_members = {}
+            if geojson_data is None and self.change_feed:
+                foreign_members['cursor'] = self.change_feed.cursor
+
+            encoder = GeoJSONStreamEncoder(foreign_members=foreign_members)
+            variants = _CompressedVariants() if config.GEOJSON_PRECOMPRESS else None
+
+            with atomic_write(file_path, 'wb') as f:
+                for chunk in encoder.iter_encode(features):
+                    data = chunk.encode('utf-8')
+                    f.write(data)
+                    if variants:
+                        variants.feed(data)
+
+                # Publish compressed siblings before the raw file replaces the
+                # old one, so the raw file is never newer than its siblings
+                encodings = variants.finish() if variants else {}
+                for encoding, suffix in COMPRESSED_SUFFIXES.items():
+                    if encoding in encodings:
+                        with atomic_write(file_path + suffix, 'wb') as cf:
+                            cf.write(encodings[encoding])
+                    elif os.path.exists(file_path + suffix):
+                        # Never leave a stale sibling for nginx to serve
+                        os.unlink(file_path + suffix)
+
+            version = os.stat(file_path).st_mtime_ns
+            manifest = {
+                'version': version,
+                'encodings': {encoding: os.stat(file_path + COMPRESSED_SUFFIXES[encoding]).st_mtime_ns
+                              for encoding in encodings}
+            }
+            with atomic_write(file_path + MANIFEST_SUFFIX, 'wb') as mf:
+                mf.write(json_codec.dumps_bytes(manifest))
+
+            artifact = GeoJSONArtifact(
+                path=file_path,
+                version=version,
+                encodings=encodings
+            )
+            with self._artifact_lock:
+                self._artifact = artifact
+
+            self.logger.info(f"Saved GeoJSON file with {encoder.feature_count} features to: {file_path}")
             return True
 
         except Exception as e:
             self.logger.error(f"Failed to save GeoJSON file: {e}")
             return False
 
-    def get_summary_stats(self) -> Optional[Dict[str, Any]]:
+    def get_published_artifact(self, file_path: Optional[str] = None) -> Optional[GeoJSONArtifact]:
+        """
+        Get the most recently published GeoJSON artifact
+
+        The in-memory copy is reused while the file on disk is unchanged and
+        reloaded otherwise, so processes that do not publish (e.g. standalone
+        API workers) serve the same cached compressed bytes.
+
+        Args:
+            file_path: Published file path (uses config default if None)
+
+        Returns:
+            GeoJSONArtifact or None if nothing has been published
+        """
+        file_path = file_path or config.GEOJSON_OUTPUT_PATH
+
+        try:
+            version = os.stat(file_path).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._artifact_lock:
+            artifact = self._artifact
+            if artifact and artifact.path == file_path and artifact.version == version:
+                return artifact
+
+            # Only trust siblings the manifest lists for this raw file version;
+            # without a matching manifest the raw file is served uncompressed
+            try:
+                with open(file_path + MANIFEST_SUFFIX, 'rb') as f:
+                    manifest = json_codec.loads(f.read())
+            except (OSError, ValueError):
+                manifest = {}
+            sibling_versions = manifest.get('encodings', {}) if manifest.get('version') == version else {}
+
+            encodings = {}
+            for encoding, sibling_version in sibling_versions.items():
+                suffix = COMPRESSED_SUFFIXES.get(encoding)
+                try:
+                    if suffix and os.stat(file_path + suffix).st_mtime_ns == sibling_version:
+                        with open(file_path + suffix, 'rb') as f:
+                            data = f.read()
+                        # Replaced while reading: skip rather than serve a mix
+                        if os.stat(file_path + suffix).st_mtime_ns == sibling_version:
+                            encodings[encoding] = data
+                except OSError:
+                    continue
+
+            self._artifact = GeoJSONArtifact(path=file_path, version=version, encodings=encodings)
+            return self._artifact
+
+    def get_summary_stats(self, data_points: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
         """
         Get summary statistics for current data
 
+        Args:
+            data_points: Last 24 hours of data points (queried if None)
+
         Returns:
             Summary statistics or None if error
         """
         try:
-            data_points = self.influx_service.query_recent_data(24)  # Last 24 hours
+            if data_points is None:
+                data_points = self.influx_service.query_recent_data(24)  # Last 24 hours
 
             if not data_points:
                 return None
@@ -185,11 +508,60 @@ class GeoJSONService:
                 'avg_pm25': round(sum(pm25_values) / len(pm25_values), 2),
                 'min_pm25': round(min(pm25_values), 2),
                 'max_pm25': round(max(pm25_values), 2),
-                'device_list': list(device_ids)
             }
+            p50, p90, p99 = np.percentile(pm25_values, [50, 90, 99]).tolist()
+            stats.update({
+                'p50_pm25': round(p50, 2),
+                'p90_pm25': round(p90, 2),
+                'p99_pm25': round(p99, 2),
+                'device_list': list(device_ids)
+            })
 
             return stats
 
         except Exception as e:
             self.logger.error(f"Failed to generate summary stats: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def get_device_list(self, data_points: Optional[List[Dict[str, Any]]] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get active devices with their most recent location
+
+        Args:
+            data_points: Last 24 hours of data points (queried if None)
+
+        Returns:
+            List of device dictionaries or None if error
+        """
+        if data_points is None:
+            data_points = self.influx_service.query_recent_data(24)
+
+        if data_points is None:
+            return None
+
+        devices = {}
+        for point in data_points:
+            device_id = point.get('device_id')
+            if device_id and device_id not in devices:
+                devices[device_id] = {
+                    'device_id': device_id,
+                    'last_seen': point.get('time'),
+                    'location': {
+                        'latitude': point.get('latitude'),
+                        'longitude': point.get('longitude')
+                    }
+                }
+            elif device_id:
+                # Update with more recent data if available
+                if point.get('time') > devices[device_id]['last_seen']:
+                    devices[device_id]['last_seen'] = point.get('time')
+                    devices[device_id]['location'] = {
+                        'latitude': point.get('latitude'),
+                        'longitude': point.get('longitude')
+                    }
+
+        if self.nowcast_service is not None:
+            for device_id, device in devices.items():
+                device.update(self.nowcast_service.current(device_id))
+
+        return list(devices.values())
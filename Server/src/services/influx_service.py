@@ -3,15 +3,71 @@ InfluxDB Service for PM2.5 Ghostbuster
 Handles database operations for air quality data
 """
 
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from influxdb import InfluxDBClient
 from influxdb.exceptions import InfluxDBError
 
 from config.settings import config
 from src.utils.logger import get_logger
+from src.utils.metrics import metrics
 from src.models.air_quality import AirQualityMeasurement
 
+# Route or job on whose behalf queries run, used to label query metrics
+_query_caller: ContextVar[str] = ContextVar('influx_query_caller', default='unknown')
+
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 50000, 100000, 500000, 1000000)
+BYTE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760, 52428800, 104857600, 524288000)
+
+
+@contextmanager
+def query_caller(name: str):
+    """Label InfluxDB queries issued inside the block with a caller name"""
+    token = _query_caller.set(name)
+    try:
+        yield
+    finally:
+        _query_caller.reset(token)
+
+
+def set_query_caller(name: str):
+    """Set the caller label for the current context, returning a reset token"""
+    return _query_caller.set(name)
+
+
+def reset_query_caller(token) -> None:
+    """Restore the caller label set before set_query_caller"""
+    _query_caller.reset(token)
+
+
+class _InstrumentedClient(InfluxDBClient):
+    """InfluxDB client that records the size of each HTTP transfer"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._transfer = threading.local()
+
+    def request(self, url, method='GET', params=None, data=None, stream=False,
+                expected_response_code=200, headers=None):
+        response = super().request(url, method=method, params=params, data=data, stream=stream,
+                                   expected_response_code=expected_response_code, headers=headers)
+        if url == 'write':
+            self._transfer.bytes = len(data) if data else 0
+        elif not stream:
+            self._transfer.bytes = len(response.content)
+        return response
+
+    def take_transfer_bytes(self) -> int:
+        """Bytes sent (writes) or received (queries) by this thread's last request"""
+        size = getattr(self._transfer, 'bytes', 0)
+        self._transfer.bytes = 0
+        return size
+
 
 class InfluxService:
     """Service for interacting with InfluxDB"""
@@ -19,13 +75,26 @@ class InfluxService:
     def __init__(self):
         """Initialize InfluxDB service"""
         self.logger = get_logger('influx_service')
+        self.slow_query_logger = get_logger('influx_slow_queries')
         self.client = None
+
+        labels = ('operation', 'caller')
+        self._duration_histogram = metrics.histogram(
+            'pm25_influx_request_duration_seconds', 'InfluxDB query and write latency', labels)
+        self._rows_histogram = metrics.histogram(
+            'pm25_influx_rows', 'Rows returned by queries or points written', labels, buckets=ROW_BUCKETS)
+        self._bytes_histogram = metrics.histogram(
+            'pm25_influx_transfer_bytes', 'Response bytes of queries or request bytes of writes',
+            labels, buckets=BYTE_BUCKETS)
+        self._error_counter = metrics.counter(
+            'pm25_influx_errors_total', 'Failed InfluxDB queries and writes', labels)
+
         self._connect()
 
     def _connect(self) -> None:
         """Establish connection to InfluxDB"""
         try:
-            self.client = InfluxDBClient(
+            self.client = _InstrumentedClient(
                 host=config.INFLUX_HOST,
                 port=config.INFLUX_PORT,
                 username=config.INFLUX_USERNAME,
@@ -62,6 +131,79 @@ class InfluxService:
         except InfluxDBError as e:
             self.logger.error(f"Failed to ensure database exists: {e}")
 
+    @staticmethod
+    def _render_query(query: str, bind_params: Optional[Dict[str, Any]] = None) -> str:
+        """Render InfluxQL with bound parameters inlined, on one line"""
+        rendered = ' '.join(query.split())
+        for name, value in (bind_params or {}).items():
+            if isinstance(value, str):
+                literal = "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+            else:
+                literal = str(value)
+            rendered = re.sub(rf'\${re.escape(name)}\b', lambda _: literal, rendered)
+        return rendered
+
+    def _record(self, operation: str, started: float, rows: int,
+                query: Optional[str] = None, bind_params: Optional[Dict[str, Any]] = None) -> None:
+        """Record metrics for a finished request and log it if slow"""
+        duration = time.perf_counter() - started
+        caller = _query_caller.get()
+        transfer = self.client.take_transfer_bytes() if isinstance(self.client, _InstrumentedClient) else 0
+
+        self._duration_histogram.observe(duration, operation, caller)
+        self._rows_histogram.observe(rows, operation, caller)
+        self._bytes_histogram.observe(transfer, operation, caller)
+
+        if duration >= config.INFLUX_SLOW_QUERY_SECONDS:
+            statement = self._render_query(query, bind_params) if query else f'write {rows} points'
+            self.slow_query_logger.warning(
+                f"Slow InfluxDB {operation} for {caller}: {duration:.3f}s, {rows} rows, "
+                f"{transfer} bytes: {statement}")
+
+    def _query(self, operation: str, query: str, **kwargs):
+        """
+        Run an InfluxQL query with instrumentation
+
+        Args:
+            operation: Name of the service operation issuing the query
+            query: InfluxQL statement
+            **kwargs: Passed to InfluxDBClient.query
+
+        Returns:
+            ResultSet of the query
+        """
+        started = time.perf_counter()
+        try:
+            result = self.client.query(query, **kwargs)
+        except Exception:
+            self._error_counter.inc(operation, _query_caller.get())
+            raise
+
+        rows = sum(len(series.get('values', [])) for series in result.raw.get('series', []))
+        self._record(operation, started, rows, query, kwargs.get('bind_params'))
+        return result
+
+    def _write_points(self, operation: str, points: List[Dict[str, Any]]) -> bool:
+        """
+        Write points with instrumentation
+
+        Args:
+            operation: Name of the service operation issuing the write
+            points: Points to write
+
+        Returns:
+            Result of InfluxDBClient.write_points
+        """
+        started = time.perf_counter()
+        try:
+            result = self.client.write_points(points)
+        except Exception:
+            self._error_counter.inc(operation, _query_caller.get())
+            raise
+
+        self._record(operation, started, len(points))
+        return result
+
     def is_connected(self) -> bool:
         """Check if connected to InfluxDB"""
         if not self.client:
@@ -89,7 +231,7 @@ class InfluxService:
 
         try:
             point = measurement.to_influx_point()
-            result = self.client.write_points([point])
+            result = self._write_points('write_measurement', [point])
 
             if result:
                 self.logger.debug(f"Wrote measurement to InfluxDB: {measurement.device_id}")
@@ -121,7 +263,7 @@ class InfluxService:
 
         try:
             points = [m.to_influx_point() for m in measurements]
-            result = self.client.write_points(points)
+            result = self._write_points('write_measurements_batch', points)
 
             if result:
                 self.logger.info(f"Wrote {len(measurements)} measurements to InfluxDB")
@@ -162,7 +304,7 @@ class InfluxService:
                 ORDER BY time DESC
             '''
 
-            result = self.client.query(query)
+            result = self._query('query_recent_data', query)
             points = list(result.get_points())
 
             self.logger.info(f"Retrieved {len(points)} data points from last {hours} hours")
@@ -172,6 +314,128 @@ class InfluxService:
             self.logger.error(f"InfluxDB query error: {e}")
             return None
 
+    def iter_recent_data(self, hours: int = None,
+                         chunk_hours: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over recent air quality data in bounded time slices
+
+        Slices are queried newest first so points are yielded in the same
+        descending time order as query_recent_data, while only one slice is
+        held in memory at a time.
+
+        Args:
+            hours: Number of hours to look back (defaults to config value)
+            chunk_hours: Hours covered by each query slice (defaults to config value)
+
+        Yields:
+            Data points ordered by time descending
+
+        Raises:
+            InfluxDBError: If a slice query fails
+        """
+        hours = hours or config.DATA_RETENTION_HOURS
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(hours=hours)
+
+        yield from self.iter_data(start_time, end_time, chunk_hours)
+
+    def iter_data(self, start_time: datetime, end_time: datetime, chunk_hours: int = None,
+                  positive_only: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over air quality data in a time range in bounded time slices
+
+        Args:
+            start_time: Range start (naive UTC)
+            end_time: Range end, inclusive (naive UTC)
+            chunk_hours: Hours covered by each query slice (defaults to config value)
+            positive_only: Skip points without a positive PM2.5 value
+
+        Yields:
+            Data points ordered by time descending
+
+        Raises:
+            InfluxDBError: If a slice query fails
+        """
+        if not self.client:
+            self.logger.error("InfluxDB client not connected")
+            return
+
+        chunk = timedelta(hours=max(1, chunk_hours or config.GEOJSON_STREAM_CHUNK_HOURS))
+        pm25_filter = 'AND pm25 > 0' if positive_only else ''
+        slice_end = end_time
+        total = 0
+
+        while slice_end > start_time:
+            slice_start = max(slice_end - chunk, start_time)
+
+            # Upper bound is exclusive except for the newest slice so that
+            # boundary points are not yielded twice
+            end_op = '<=' if slice_end == end_time else '<'
+            query = f'''
+                SELECT * FROM "air_quality"
+                WHERE time >= '{slice_start.isoformat()}Z'
+                AND time {end_op} '{slice_end.isoformat()}Z'
+                {pm25_filter}
+                ORDER BY time DESC
+            '''
+
+            try:
+                result = self._query('iter_data', query)
+            except InfluxDBError as e:
+                self.logger.error(f"InfluxDB query error: {e}")
+                raise
+
+            for point in result.get_points():
+                total += 1
+                yield point
+
+            slice_end = slice_start
+
+        self.logger.info(f"Streamed {total} data points from {start_time.isoformat()}Z "
+                         f"to {end_time.isoformat()}Z")
+
+    def query_device_series(self, device_id: str, hours: int = 24) -> Optional[Tuple[List[int], List[float]]]:
+        """
+        Query the PM2.5 time series of a device
+
+        Args:
+            device_id: Device identifier
+            hours: Time window in hours
+
+        Returns:
+            Tuple of (epoch milliseconds, PM2.5 values) in ascending time
+            order, or None if error
+        """
+        if not self.client:
+            self.logger.error("InfluxDB client not connected")
+            return None
+
+        try:
+            start_time = datetime.utcnow() - timedelta(hours=hours)
+
+            query = f'''
+                SELECT pm25 FROM "air_quality"
+                WHERE time >= '{start_time.isoformat()}Z'
+                AND device_id = $device_id
+                AND pm25 > 0
+                ORDER BY time ASC
+            '''
+
+            result = self._query('query_device_series', query,
+                                 bind_params={'device_id': device_id}, epoch='ms')
+
+            times = []
+            values = []
+            for point in result.get_points():
+                times.append(point['time'])
+                values.append(point['pm25'])
+
+            return times, values
+
+        except InfluxDBError as e:
+            self.logger.error(f"InfluxDB series query error: {e}")
+            return None
+
     def get_device_stats(self, device_id: str, hours: int = 24) -> Optional[Dict[str, Any]]:
         """
         Get statistics for a specific device
@@ -193,13 +457,15 @@ class InfluxService:
 
             query = f'''
                 SELECT COUNT(pm25) as count, MEAN(pm25) as avg_pm25,
-                       MIN(pm25) as min_pm25, MAX(pm25) as max_pm25
+                       MIN(pm25) as min_pm25, MAX(pm25) as max_pm25,
+                       PERCENTILE(pm25, 50) as p50_pm25, PERCENTILE(pm25, 90) as p90_pm25,
+                       PERCENTILE(pm25, 99) as p99_pm25
                 FROM "air_quality"
                 WHERE time >= '{start_time.isoformat()}Z'
                 AND device_id = '{device_id}'
             '''
 
-            result = self.client.query(query)
+            result = self._query('get_device_stats', query)
             points = list(result.get_points())
 
             if points:
@@ -229,7 +495,7 @@ class InfluxService:
 
         try:
             query = f'DELETE FROM "air_quality" WHERE time < \'{cutoff_time.isoformat()}Z\''
-            self.client.query(query)
+            self._query('cleanup_old_data', query)
             self.logger.info(f"Cleaned up data older than {retention_hours} hours")
             return True
 
@@ -3,13 +3,14 @@ MQTT Service for PM2.5 Ghostbuster
 Handles MQTT connections and message processing
 """
 
-import json
+import logging
 from typing import Callable, Optional
 from threading import Event
 import paho.mqtt.client as mqtt
 
 from config.settings import config
-from src.utils.logger import get_logger
+from src.utils.logger import get_logger, SampledLog
+from src.utils.ingest_timing import ingest_timing
 from src.models.air_quality import AirQualityMeasurement
 
 
@@ -24,6 +25,7 @@ class MQTTService:
             message_callback: Callback function for processed messages
         """
         self.logger = get_logger('mqtt_service')
+        self._measurement_log = SampledLog(self.logger, 'processed_measurement')
         self.client = mqtt.Client()
         self.message_callback = message_callback
         self.connected = Event()
@@ -64,6 +66,8 @@ class MQTTService:
             userdata: User data
             message: MQTT message
         """
+        trace = ingest_timing.begin(message.timestamp)
+
         try:
             # Extract device ID from topic
             topic_parts = message.topic.split("/")
@@ -72,14 +76,16 @@ class MQTTService:
                 return
 
             device_id = topic_parts[1]
-            payload_str = message.payload.decode('utf-8')
-
-            self.logger.debug(f"Received message from {device_id}: {payload_str}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Received message from %s: %s", device_id,
+                                  message.payload.decode('utf-8', 'replace'))
 
-            # Parse message into AirQualityMeasurement
+            # Parse the payload bytes directly into AirQualityMeasurement
             try:
-                measurement = AirQualityMeasurement.from_mqtt_payload(device_id, payload_str)
-                self.logger.info(f"Processed measurement: {measurement}")
+                measurement = AirQualityMeasurement.from_mqtt_payload(device_id, message.payload)
+                if trace:
+                    trace.mark('parse')
+                self._measurement_log.log("Processed measurement: %s", measurement)
 
                 # Call the message callback if provided
                 if self.message_callback:
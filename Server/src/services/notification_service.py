@@ -0,0 +1,385 @@
+"""
+PM2.5 Ghostbuster - Notification Dispatcher
+Delivers alert emails and webhooks from a background thread
+"""
+
+import heapq
+import itertools
+import queue
+import smtplib
+import threading
+import time
+from dataclasses import dataclass
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import config
+from src.utils.logger import get_logger
+from src.utils.json_codec import json_codec
+from src.utils.metrics import metrics
+from src.utils.timezone_utils import tz_manager
+
+# Longest wait between delivery retries
+MAX_RETRY_DELAY = 300.0
+
+_STOP = object()
+
+
+def _split_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class _PermanentError(Exception):
+    """Delivery failure that retrying cannot fix"""
+
+
+@dataclass
+class Delivery:
+    """One email to a recipient (possibly a digest of several alerts) or one webhook call"""
+    channel: str      # 'email' or 'webhook'
+    target: str       # Recipient address or webhook URL
+    alerts: List[Any]
+    attempts: int = 0
+
+
+class SMTPSession:
+    """
+    SMTP connection kept open across messages
+
+    Connects, upgrades to TLS and logs in on first use, then reuses the
+    session until it has been idle for idle_timeout seconds or the server
+    drops it.
+    """
+
+    def __init__(self, host: str, port: int, username: str = '', password: str = '',
+                 starttls: bool = True, timeout: float = 10.0, idle_timeout: float = 60.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def send(self, msg) -> None:
+        """
+        Send a message, reconnecting once if the kept session was dropped
+
+        Raises:
+            smtplib.SMTPException, OSError: If the message cannot be sent
+        """
+        if self._server is not None:
+            try:
+                self._server.send_message(msg)
+                self._last_used = time.monotonic()
+                return
+            except (smtplib.SMTPServerDisconnected, OSError):
+                self.close()
+
+        self._server = self._connect()
+        self._server.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def idle_deadline(self) -> Optional[float]:
+        """Monotonic time the open session becomes idle, None if closed"""
+        return self._last_used + self.idle_timeout if self._server is not None else None
+
+    def close_if_idle(self, now: float) -> None:
+        deadline = self.idle_deadline()
+        if deadline is not None and now >= deadline:
+            self.close()
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+
+class NotificationDispatcher:
+    """
+    Background delivery of alert notifications
+
+    Alerts are queued without blocking measurement processing; a single
+    worker thread delivers them. Emails to each recipient are collected for
+    digest_seconds and sent as one message over a persistent SMTP session.
+    Webhooks are posted per alert over a pooled HTTP session. Failed
+    deliveries are retried with exponential backoff. When the queue is full,
+    new alerts are dropped and counted.
+    """
+
+    def __init__(self, smtp_host: Optional[str] = None, smtp_port: Optional[int] = None,
+                 recipients: Optional[Sequence[str]] = None,
+                 webhook_urls: Optional[Sequence[str]] = None,
+                 starttls: Optional[bool] = None, digest_seconds: Optional[float] = None,
+                 queue_size: Optional[int] = None, max_attempts: Optional[int] = None,
+                 retry_backoff: Optional[float] = None,
+                 http_session: Optional[requests.Session] = None):
+        """
+        Initialize dispatcher; arguments default to config values
+
+        Args:
+            smtp_host: SMTP server (email is disabled without it or without recipients)
+            smtp_port: SMTP port
+            recipients: Email recipients
+            webhook_urls: URLs that receive each alert as a JSON POST
+            starttls: Upgrade SMTP connections with STARTTLS
+            digest_seconds: Window for collecting alerts into one email, 0 sends each alert
+            queue_size: Maximum queued alerts
+            max_attempts: Delivery attempts before giving up
+            retry_backoff: Delay before the first retry, doubled on each further retry
+            http_session: Session for webhook calls
+        """
+        self.logger = get_logger('notification_service')
+
+        if recipients is None:
+            recipients = _split_list(config.ALERT_EMAIL) if config.ENABLE_EMAIL_ALERTS else []
+        self.recipients = list(recipients)
+        self.webhook_urls = list(webhook_urls if webhook_urls is not None
+                                 else _split_list(config.ALERT_WEBHOOK_URLS))
+        self.digest_seconds = digest_seconds if digest_seconds is not None else config.NOTIFY_DIGEST_SECONDS
+        self.max_attempts = max(1, max_attempts or config.NOTIFY_MAX_ATTEMPTS)
+        self.retry_backoff = retry_backoff if retry_backoff is not None else config.NOTIFY_RETRY_BACKOFF
+
+        smtp_host = smtp_host if smtp_host is not None else config.SMTP_HOST
+        self.smtp: Optional[SMTPSession] = None
+        if smtp_host and self.recipients:
+            self.smtp = SMTPSession(
+                smtp_host, smtp_port or config.SMTP_PORT, config.SMTP_USERNAME, config.SMTP_PASSWORD,
+                starttls=config.SMTP_STARTTLS if starttls is None else starttls,
+                timeout=config.NOTIFY_TIMEOUT, idle_timeout=config.SMTP_IDLE_SECONDS)
+
+        self.http = http_session
+        if self.http is None and self.webhook_urls:
+            self.http = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(self.webhook_urls), pool_maxsize=2)
+            self.http.mount('http://', adapter)
+            self.http.mount('https://', adapter)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size or config.NOTIFY_QUEUE_SIZE)
+        self._digests: Dict[str, Tuple[float, List[Any]]] = {}  # recipient -> (due, alerts)
+        self._retries: List[Tuple[float, int, Delivery]] = []   # heap of (due, seq, delivery)
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self._sent = metrics.counter('pm25_notifications_sent_total', 'Delivered notifications', ('channel',))
+        self._failed = metrics.counter('pm25_notifications_failed_total',
+                                       'Notifications given up after all attempts', ('channel',))
+        self._retried = metrics.counter('pm25_notifications_retried_total',
+                                        'Notification delivery retries', ('channel',))
+        self._dropped = metrics.counter('pm25_notifications_dropped_total',
+                                        'Alerts not notified because the queue was full')
+
+    @property
+    def enabled(self) -> bool:
+        """True if any channel is configured"""
+        return self.smtp is not None or bool(self.webhook_urls)
+
+    def submit(self, alert: Any) -> bool:
+        """
+        Queue an alert for delivery without blocking
+
+        Args:
+            alert: Alert to notify about
+
+        Returns:
+            False if the alert was dropped because the queue is full
+        """
+        if not self.enabled:
+            return False
+
+        self.start()
+        try:
+            self._queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            self._dropped.inc()
+            self.logger.warning(f"Notification queue full, dropped alert for device {alert.device_id}")
+            return False
+
+    def start(self) -> None:
+        """Start the worker thread if it is not running"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Send pending digests and queued alerts once, then stop the worker"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self._next_wakeup())
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._shutdown()
+                return
+
+            now = time.monotonic()
+            try:
+                if item is not None:
+                    self._accept(item, now)
+                self._flush_digests(now)
+                self._run_retries(now)
+                if self.smtp:
+                    self.smtp.close_if_idle(now)
+            except Exception as e:
+                self.logger.error(f"Notification dispatcher error: {e}")
+
+    def _next_wakeup(self) -> Optional[float]:
+        """Seconds until the next digest or retry is due, None if nothing is pending"""
+        due = [d for d, _ in self._digests.values()]
+        if self._retries:
+            due.append(self._retries[0][0])
+        if self.smtp and self.smtp.idle_deadline() is not None:
+            due.append(self.smtp.idle_deadline())
+        if not due:
+            return None
+        return max(0.0, min(due) - time.monotonic())
+
+    def _accept(self, alert: Any, now: float) -> None:
+        if self.smtp:
+            for recipient in self.recipients:
+                due, alerts = self._digests.setdefault(recipient, (now + self.digest_seconds, []))
+                alerts.append(alert)
+
+        for url in self.webhook_urls:
+            self._deliver(Delivery('webhook', url, [alert]), now)
+
+    def _flush_digests(self, now: float, force: bool = False) -> None:
+        for recipient in [r for r, (due, _) in self._digests.items() if force or due <= now]:
+            _, alerts = self._digests.pop(recipient)
+            self._deliver(Delivery('email', recipient, alerts), now)
+
+    def _run_retries(self, now: float) -> None:
+        while self._retries and self._retries[0][0] <= now:
+            _, _, delivery = heapq.heappop(self._retries)
+            self._retried.inc(delivery.channel)
+            self._deliver(delivery, now)
+
+    def _deliver(self, delivery: Delivery, now: float, retry: bool = True) -> None:
+        """Attempt a delivery, scheduling a retry on failure"""
+        delivery.attempts += 1
+        try:
+            if delivery.channel == 'email':
+                self.smtp.send(self._build_email(delivery.target, delivery.alerts))
+            else:
+                self._post_webhook(delivery.target, delivery.alerts[0])
+            self._sent.inc(delivery.channel)
+            return
+
+        except _PermanentError as e:
+            error, retry = e, False
+        except (smtplib.SMTPException, OSError, requests.RequestException) as e:
+            error = e
+
+        if retry and delivery.attempts < self.max_attempts:
+            delay = min(self.retry_backoff * 2 ** (delivery.attempts - 1), MAX_RETRY_DELAY)
+            heapq.heappush(self._retries, (now + delay, next(self._seq), delivery))
+            self.logger.warning(f"{delivery.channel} notification to {delivery.target} failed "
+                                f"(attempt {delivery.attempts}), retrying in {delay:g}s: {error}")
+        else:
+            self._failed.inc(delivery.channel)
+            self.logger.error(f"Giving up {delivery.channel} notification to {delivery.target} "
+                              f"after {delivery.attempts} attempts: {error}")
+
+    def _post_webhook(self, url: str, alert: Any) -> None:
+        response = self.http.post(url, data=json_codec.dumps_bytes(alert.to_dict()),
+                                  headers={'Content-Type': 'application/json'},
+                                  timeout=config.NOTIFY_TIMEOUT)
+        # Client errors other than rate limiting will not succeed on retry
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            raise _PermanentError(f"HTTP {response.status_code}")
+        response.raise_for_status()
+
+    def _shutdown(self) -> None:
+        """Deliver everything pending once, without waiting for retries"""
+        now = time.monotonic()
+        try:
+            while True:
+                item = self._queue.get_nowait()
+                if item is not _STOP:
+                    self._accept(item, now)
+        except queue.Empty:
+            pass
+
+        try:
+            self._flush_digests(now, force=True)
+            for _, _, delivery in sorted(self._retries):
+                self._deliver(delivery, now, retry=False)
+            self._retries = []
+        finally:
+            if self.smtp:
+                self.smtp.close()
+
+    @staticmethod
+    def _format_alert(alert: Any) -> str:
+        return f"""Device: {alert.device_id}
+Alert Level: {alert.level.value.upper()}
+PM2.5 Value: {alert.pm25_value} μg/m³
+Location: {alert.location['latitude']:.6f}, {alert.location['longitude']:.6f}
+Time: {tz_manager.format_local_time(alert.timestamp)}
+
+Message: {alert.message}
+"""
+
+    def _build_email(self, recipient: str, alerts: List[Any]) -> MIMEMultipart:
+        """Alert email, or a digest when several alerts were collected"""
+        msg = MIMEMultipart()
+        msg['From'] = config.SMTP_FROM
+        msg['To'] = recipient
+
+        if len(alerts) == 1:
+            alert = alerts[0]
+            msg['Subject'] = f"PM2.5 Alert: {alert.level.value.upper()} - Device {alert.device_id}"
+            header = "PM2.5 Ghostbuster Alert"
+        else:
+            devices = len({alert.device_id for alert in alerts})
+            worst = max(alerts, key=lambda alert: alert.pm25_value)
+            msg['Subject'] = (f"PM2.5 Alerts: {len(alerts)} alerts on {devices} devices, "
+                              f"up to {worst.level.value.upper()}")
+            header = f"PM2.5 Ghostbuster Alert Digest ({len(alerts)} alerts)"
+
+        sections = '\n---\n\n'.join(self._format_alert(alert) for alert in alerts)
+        body = f"""
+{header}
+
+{sections}
+View live data: {config.MAP_URL}
+
+---
+PM2.5 Ghostbuster Alert System
+"PM2.5 is like ghost. It exists even if it is invisible."
+            """
+
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
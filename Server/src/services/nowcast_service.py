@@ -0,0 +1,248 @@
+"""
+PM2.5 Ghostbuster - NowCast Service
+Per-device hourly averages with the EPA NowCast and AQI
+"""
+
+import calendar
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import config
+from src.utils.logger import get_logger
+from src.utils.aqi import (NOWCAST_HOURS, nowcast, nowcast_series, nowcast_windows, pm25_to_aqi,
+                           pm25_to_aqi_array, hourly_sums)
+from src.models.air_quality import AirQualityMeasurement
+
+
+def utc_seconds(utc_times: Sequence[str]) -> np.ndarray:
+    """UNIX seconds of RFC3339 UTC time strings (fractions are dropped)"""
+    return np.array([t[:19] for t in utc_times], dtype='datetime64[s]').astype(np.int64)
+
+
+def nowcast_for_readings(device_ids: Sequence[str], timestamps: np.ndarray,
+                         values: np.ndarray) -> np.ndarray:
+    """
+    NowCast of each reading's device as of the reading, from the readings alone
+
+    Used to recompute NowCast over history, e.g. after a backfill. As in the
+    live NowCastService, the reading's own hour counts with the average of
+    its readings up to and including this one.
+
+    Args:
+        device_ids: Device of each reading
+        timestamps: UNIX time of each reading
+        values: PM2.5 value of each reading
+
+    Returns:
+        NowCast per reading, NaN where it is not defined
+    """
+    count = len(values)
+    if not count:
+        return np.empty(0)
+    values = np.asarray(values, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    devices, codes = np.unique(np.asarray(device_ids), return_inverse=True)
+    codes = codes.reshape(-1)
+    hours = (timestamps // 3600).astype(np.int64)
+    first_hour = int(hours.min())
+    hour_count = int(hours.max()) - first_hour + 1
+    columns = hours - first_hour
+
+    sums, counts = hourly_sums(codes, hours, values, len(devices), first_hour, hour_count)
+    with np.errstate(invalid='ignore'):
+        averages = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    padded = np.concatenate([np.full((len(devices), NOWCAST_HOURS - 1), np.nan), averages], axis=1)
+
+    # Running average of each reading's device hour, in time order
+    order = np.lexsort((timestamps, codes))
+    cells = (codes * hour_count + columns)[order]
+    totals = np.cumsum(values[order])
+    positions = np.arange(count)
+    starts = np.maximum.accumulate(np.where(np.r_[True, cells[1:] != cells[:-1]], positions, 0))
+    running = np.empty(count)
+    running[order] = (totals - np.where(starts > 0, totals[starts - 1], 0.0)) / (positions - starts + 1)
+
+    # Window of each reading: its running hour, then the 11 complete hours before
+    windows = np.empty((count, NOWCAST_HOURS))
+    windows[:, 0] = running
+    for lag in range(1, NOWCAST_HOURS):
+        windows[:, lag] = padded[codes, columns + NOWCAST_HOURS - 1 - lag]
+    return nowcast_windows(windows)
+
+
+class NowCastService:
+    """
+    EPA NowCast and AQI per device
+
+    Keeps hourly sums and counts of each device's readings, updated in
+    constant time per reading. The current (partial) hour counts as the most
+    recent hour, so the NowCast follows readings as they arrive. History for
+    NOWCAST_HISTORY_HOURS is kept so that the NowCast of past points can be
+    recomputed in one vectorized pass.
+    """
+
+    def __init__(self, history_hours: Optional[int] = None):
+        """
+        Initialize empty hourly averages
+
+        Args:
+            history_hours: Hours of hourly averages kept (defaults to config value)
+        """
+        self.logger = get_logger('nowcast_service')
+        self.history_hours = max(history_hours or config.NOWCAST_HISTORY_HOURS, NOWCAST_HOURS)
+        self._lock = threading.Lock()
+        # device -> hour number (UNIX time // 3600) -> [sum, count]
+        self._hours: Dict[str, Dict[int, List[float]]] = {}
+        self._next_prune = 0.0
+
+    def add(self, device_id: str, pm25: float, timestamp: float) -> None:
+        """
+        Add a reading to the device's hourly average
+
+        Args:
+            device_id: Device identifier
+            pm25: PM2.5 value
+            timestamp: UNIX time of the reading (future times count as now)
+        """
+        if not math.isfinite(pm25) or pm25 < 0:
+            return
+        now = time.time()
+        hour = int(min(timestamp, now) // 3600)
+        if hour <= now // 3600 - self.history_hours:
+            return
+
+        with self._lock:
+            device_hours = self._hours.get(device_id)
+            if device_hours is None:
+                device_hours = self._hours[device_id] = {}
+            cell = device_hours.get(hour)
+            if cell is None:
+                device_hours[hour] = [pm25, 1]
+            else:
+                cell[0] += pm25
+                cell[1] += 1
+
+            if now >= self._next_prune:
+                self._prune(now)
+
+    def add_measurement(self, measurement: AirQualityMeasurement) -> None:
+        """Add an ingested measurement (naive UTC timestamp)"""
+        self.add(measurement.device_id, float(measurement.pm25),
+                 calendar.timegm(measurement.timestamp.utctimetuple()) + measurement.timestamp.microsecond / 1e6)
+
+    def load_history(self, device_ids: Sequence[str], timestamps: np.ndarray, values: np.ndarray) -> None:
+        """
+        Add many readings at once, e.g. when warming up
+
+        Hourly sums are aggregated with NumPy and merged into the existing
+        averages.
+
+        Args:
+            device_ids: Device of each reading
+            timestamps: UNIX time of each reading
+            values: PM2.5 value of each reading
+        """
+        now = time.time()
+        timestamps = np.minimum(np.asarray(timestamps, dtype=np.float64), now)
+        values = np.asarray(values, dtype=np.float64)
+        keep = np.isfinite(values) & (values >= 0)
+        if not keep.any():
+            return
+
+        devices, codes = np.unique(np.asarray(device_ids)[keep], return_inverse=True)
+        hours = (timestamps[keep] // 3600).astype(np.int64)
+        first_hour = max(int(hours.min()), int(now // 3600) - self.history_hours + 1)
+        hour_count = int(hours.max()) - first_hour + 1
+        if hour_count <= 0:
+            return
+        sums, counts = hourly_sums(codes.reshape(-1), hours, values[keep], len(devices),
+                                   first_hour, hour_count)
+
+        rows, columns = np.nonzero(counts)
+        with self._lock:
+            for row, column, total, count in zip(rows.tolist(), columns.tolist(),
+                                                 sums[rows, columns].tolist(), counts[rows, columns].tolist()):
+                device_hours = self._hours.setdefault(str(devices[row]), {})
+                cell = device_hours.get(first_hour + column)
+                if cell is None:
+                    device_hours[first_hour + column] = [total, count]
+                else:
+                    cell[0] += total
+                    cell[1] += count
+
+    def _prune(self, now: float) -> None:
+        """Drop hours past the history (lock held)"""
+        self._next_prune = now + 3600
+        cutoff = int(now // 3600) - self.history_hours
+        for device_id in list(self._hours):
+            device_hours = self._hours[device_id]
+            for hour in [hour for hour in device_hours if hour <= cutoff]:
+                del device_hours[hour]
+            if not device_hours:
+                del self._hours[device_id]
+
+    def current(self, device_id: str) -> Dict[str, Any]:
+        """
+        Current NowCast and AQI of a device
+
+        Returns:
+            Dictionary with nowcast, aqi and aqi_category (None values when
+            the NowCast is not defined)
+        """
+        current_hour = int(time.time() // 3600)
+        with self._lock:
+            device_hours = self._hours.get(device_id, {})
+            hourly = []
+            for hour in range(current_hour, current_hour - NOWCAST_HOURS, -1):
+                cell = device_hours.get(hour)
+                hourly.append(cell[0] / cell[1] if cell else None)
+
+        value = nowcast(hourly)
+        aqi, category = pm25_to_aqi(value)
+        return {'nowcast': value, 'aqi': aqi, 'aqi_category': category}
+
+    def current_nowcast(self, device_id: str) -> Optional[float]:
+        """Current NowCast of a device, None if not defined"""
+        return self.current(device_id)['nowcast']
+
+    def point_values(self, device_ids: Sequence[str],
+                     utc_times: Sequence[str]) -> Tuple[List[Optional[float]], List[Optional[int]]]:
+        """
+        NowCast and AQI of each data point's device at the point's hour
+
+        Computed for the whole batch at once from the kept hourly averages.
+
+        Args:
+            device_ids: Device of each point
+            utc_times: RFC3339 UTC time of each point
+
+        Returns:
+            Tuple of (NowCast list, AQI list), None where not defined or
+            outside the kept history
+        """
+        if not len(device_ids):
+            return [], []
+
+        devices, codes = np.unique(np.asarray(device_ids), return_inverse=True)
+        codes = codes.reshape(-1)
+        hours = utc_seconds(utc_times) // 3600
+        first_hour = int(hours.min()) - NOWCAST_HOURS + 1
+        hour_count = int(hours.max()) - first_hour + 1
+
+        averages = np.full((len(devices), hour_count), np.nan)
+        with self._lock:
+            for row, device_id in enumerate(devices.tolist()):
+                for hour, (total, count) in self._hours.get(device_id, {}).items():
+                    column = hour - first_hour
+                    if 0 <= column < hour_count:
+                        averages[row, column] = total / count
+
+        values = nowcast_series(averages)[codes, hours - first_hour]
+        aqi = pm25_to_aqi_array(values)
+        missing = np.isnan(values)
+        return ([None if flag else value for value, flag in zip(values.tolist(), missing.tolist())],
+                [None if flag else int(value) for value, flag in zip(aqi.tolist(), missing.tolist())])
@@ -0,0 +1,181 @@
+"""
+PM2.5 Ghostbuster - Push Service
+Fans out live measurements and alerts to subscribed clients
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config.settings import config
+from src.utils.logger import get_logger
+
+# (min_lon, min_lat, max_lon, max_lat)
+BoundingBox = Tuple[float, float, float, float]
+
+
+class PushSubscriber:
+    """Client subscription with a bounded, coalescing event buffer"""
+
+    def __init__(self, bbox: Optional[BoundingBox] = None,
+                 device_ids: Optional[Set[str]] = None,
+                 max_buffer: Optional[int] = None):
+        """
+        Initialize subscriber
+
+        Args:
+            bbox: Only receive measurements inside this bounding box
+            device_ids: Only receive events for these devices
+            max_buffer: Maximum pending events (defaults to config value)
+        """
+        self.bbox = bbox
+        self.device_ids = device_ids
+        self.max_buffer = max(1, max_buffer or config.PUSH_BUFFER_SIZE)
+        self.coalesced = 0
+        self.dropped = 0
+
+        self._cond = threading.Condition()
+        self._pending: 'OrderedDict[int, Tuple[str, Dict[str, Any]]]' = OrderedDict()
+        self._latest: Dict[Tuple[str, str], int] = {}
+        self._seq = 0
+
+    def matches(self, device_id: str, longitude: Optional[float] = None,
+                latitude: Optional[float] = None) -> bool:
+        """Check whether an event passes this subscriber's filters"""
+        if self.device_ids and device_id not in self.device_ids:
+            return False
+
+        if self.bbox and longitude is not None and latitude is not None:
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            return min_lon <= longitude <= max_lon and min_lat <= latitude <= max_lat
+
+        return True
+
+    def offer(self, event_type: str, device_id: str, data: Dict[str, Any]) -> None:
+        """
+        Queue an event without ever blocking the publisher
+
+        When the buffer is full, the newest event replaces a pending event of
+        the same type for the same device; otherwise the oldest event is dropped.
+        """
+        key = (event_type, device_id)
+
+        with self._cond:
+            if len(self._pending) >= self.max_buffer:
+                pending_seq = self._latest.get(key)
+                if pending_seq in self._pending:
+                    self._pending[pending_seq] = (event_type, data)
+                    self.coalesced += 1
+                    return
+
+                self._pending.popitem(last=False)
+                self.dropped += 1
+
+            self._seq += 1
+            self._pending[self._seq] = (event_type, data)
+            self._latest[key] = self._seq
+            self._cond.notify()
+
+    def drain(self, timeout: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Wait for and take all pending events
+
+        Args:
+            timeout: Seconds to wait for an event
+
+        Returns:
+            List of (event type, data) tuples, empty on timeout
+        """
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+
+            events = list(self._pending.values())
+            self._pending.clear()
+            self._latest.clear()
+            return events
+
+
+class PushService:
+    """Publish/subscribe hub for live measurement and alert events"""
+
+    def __init__(self, max_subscribers: Optional[int] = None):
+        """
+        Initialize push service
+
+        Args:
+            max_subscribers: Maximum concurrent subscribers (defaults to config value)
+        """
+        self.logger = get_logger('push_service')
+        self.max_subscribers = max_subscribers or config.PUSH_MAX_SUBSCRIBERS
+        self._subscribers: List[PushSubscriber] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, bbox: Optional[BoundingBox] = None,
+                  device_ids: Optional[Set[str]] = None) -> Optional[PushSubscriber]:
+        """
+        Register a new subscriber
+
+        Returns:
+            PushSubscriber or None if the subscriber limit is reached
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                self.logger.warning("Push subscriber limit reached")
+                return None
+
+            subscriber = PushSubscriber(bbox, device_ids)
+            # Copy-on-write keeps publishing lock-free
+            self._subscribers = self._subscribers + [subscriber]
+
+        self.logger.info(f"Push subscriber added ({len(self._subscribers)} active)")
+        return subscriber
+
+    def unsubscribe(self, subscriber: PushSubscriber) -> None:
+        """Remove a subscriber"""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+
+        if subscriber.coalesced or subscriber.dropped:
+            self.logger.info(f"Push subscriber removed (coalesced: {subscriber.coalesced}, "
+                             f"dropped: {subscriber.dropped})")
+
+    def subscriber_count(self) -> int:
+        """Get number of active subscribers"""
+        return len(self._subscribers)
+
+    def publish_measurement(self, feature: Dict[str, Any]) -> None:
+        """
+        Fan out a measurement to matching subscribers
+
+        Args:
+            feature: GeoJSON feature for the measurement
+        """
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+
+        device_id = feature['properties'].get('device_id', 'unknown')
+        longitude, latitude = feature['geometry']['coordinates']
+
+        for subscriber in subscribers:
+            if subscriber.matches(device_id, longitude, latitude):
+                subscriber.offer('measurement', device_id, feature)
+
+    def publish_alert(self, alert_data: Dict[str, Any]) -> None:
+        """
+        Fan out an alert to matching subscribers
+
+        Args:
+            alert_data: Serialized alert
+        """
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+
+        device_id = alert_data['device_id']
+        location = alert_data.get('location') or {}
+
+        for subscriber in subscribers:
+            if subscriber.matches(device_id, location.get('longitude'), location.get('latitude')):
+                subscriber.offer('alert', device_id, alert_data)
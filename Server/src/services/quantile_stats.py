@@ -0,0 +1,255 @@
+"""
+PM2.5 Ghostbuster - Quantile Statistics
+Per-device PM2.5 quantile sketches per time bucket, merged on query
+"""
+
+import calendar
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import config
+from src.utils.logger import get_logger
+from src.utils.quantile_sketch import DDSketch
+from src.models.air_quality import AirQualityMeasurement
+
+# Bucket tiers, coarse to fine: (bucket seconds, seconds kept); the first
+# tier is kept for QUANTILE_RETENTION_HOURS. Recent readings are bucketed
+# finely so short windows stay accurate.
+FINE_TIERS = ((300, 25 * 3600), (60, 2 * 3600))
+COARSE_BUCKET_SECONDS = 3600
+
+# Reported quantiles -> response field
+PERCENTILES = {0.5: 'p50_pm25', 0.9: 'p90_pm25', 0.99: 'p99_pm25'}
+
+
+class QuantileStats:
+    """
+    PM2.5 distribution per device for any window of the retention period
+
+    Every reading is added to a DDSketch of its device's 1-hour, 5-minute and
+    1-minute bucket. A window query merges the hourly sketches it covers and
+    fills its partial first hour from finer buckets, so windows are resolved
+    to 1 minute over the last 2 hours, 5 minutes over the last day and 1 hour
+    beyond. Sketches keep exact count, sum, minimum and maximum, and
+    percentiles within QUANTILE_ACCURACY relative error, without reading raw
+    data. Standalone API workers query a copy made with from_state from the
+    sketches the collector publishes.
+    """
+
+    def __init__(self, retention_hours: Optional[int] = None,
+                 relative_accuracy: Optional[float] = None):
+        """
+        Initialize empty sketches
+
+        Args:
+            retention_hours: Hours of sketches kept (defaults to config value)
+            relative_accuracy: Relative error of percentiles (defaults to config value)
+        """
+        self.logger = get_logger('quantile_stats')
+        self.retention_hours = retention_hours or config.QUANTILE_RETENTION_HOURS
+        self.relative_accuracy = relative_accuracy or config.QUANTILE_ACCURACY
+        self._lock = threading.Lock()
+        # (bucket seconds, seconds kept, device -> bucket start (UNIX time) -> sketch), coarse to fine
+        self._tiers: List[Tuple[int, int, Dict[str, Dict[int, DDSketch]]]] = [
+            (width, kept, {}) for width, kept in
+            ((COARSE_BUCKET_SECONDS, self.retention_hours * 3600),) + FINE_TIERS
+        ]
+        self._next_prune = 0.0
+        self.ready = False
+
+    def _bucket_sketch(self, buckets: Dict[str, Dict[int, DDSketch]], device_id: str,
+                       bucket: int) -> DDSketch:
+        device_buckets = buckets.get(device_id)
+        if device_buckets is None:
+            device_buckets = buckets[device_id] = {}
+        sketch = device_buckets.get(bucket)
+        if sketch is None:
+            sketch = device_buckets[bucket] = DDSketch(self.relative_accuracy)
+        return sketch
+
+    def add(self, device_id: str, pm25: float, timestamp: float) -> None:
+        """
+        Add a reading to the device's sketches
+
+        Args:
+            device_id: Device identifier
+            pm25: PM2.5 value
+            timestamp: UNIX time of the reading (future times count as now)
+        """
+        if not math.isfinite(pm25) or pm25 < 0:
+            return
+
+        now = time.time()
+        timestamp = min(timestamp, now)
+        if timestamp < now - self.retention_hours * 3600:
+            return
+
+        with self._lock:
+            for width, kept, buckets in self._tiers:
+                if timestamp >= now - kept:
+                    self._bucket_sketch(buckets, device_id, int(timestamp // width) * width).add(pm25)
+
+            if now >= self._next_prune:
+                self._prune(now)
+
+    def add_measurement(self, measurement: AirQualityMeasurement) -> None:
+        """Add an ingested measurement (naive UTC timestamp)"""
+        self.add(measurement.device_id, float(measurement.pm25),
+                 calendar.timegm(measurement.timestamp.utctimetuple()) + measurement.timestamp.microsecond / 1e6)
+
+    def _prune(self, now: float) -> None:
+        """Drop buckets past their retention (lock held)"""
+        self._next_prune = now + FINE_TIERS[-1][0]
+        for width, kept, buckets in self._tiers:
+            cutoff = now - kept - width
+            for device_id in list(buckets):
+                device_buckets = buckets[device_id]
+                for bucket in [bucket for bucket in device_buckets if bucket < cutoff]:
+                    del device_buckets[bucket]
+                if not device_buckets:
+                    del buckets[device_id]
+
+    def _window_sketches(self, device_id: str, seconds: float, now: float) -> List[DDSketch]:
+        """Bucket sketches of a device covering the window ending now (lock held)"""
+        start = now - seconds
+        sketches = []
+        edge = math.inf  # Readings from edge on are covered
+
+        for i, (width, kept, buckets) in enumerate(self._tiers):
+            device_buckets = buckets.get(device_id, {})
+            finer = self._tiers[i + 1] if i + 1 < len(self._tiers) else None
+            if finer is None or start < now - finer[1] + finer[0]:
+                # No finer tier reaches the window start; include its bucket whole
+                sketches.extend(sketch for bucket, sketch in device_buckets.items()
+                                if bucket + width > start and bucket < edge)
+                return sketches
+
+            tier_edge = math.ceil(start / width) * width
+            if tier_edge < edge:
+                sketches.extend(sketch for bucket, sketch in device_buckets.items()
+                                if tier_edge <= bucket < edge)
+                edge = tier_edge
+        return sketches
+
+    def window_sketch(self, device_ids: Optional[Iterable[str]], seconds: float) -> DDSketch:
+        """
+        Merged sketch of a window ending now
+
+        Args:
+            device_ids: Devices to include, None for all devices
+            seconds: Window length
+
+        Returns:
+            Sketch of the readings in the window
+        """
+        now = time.time()
+        with self._lock:
+            if device_ids is None:
+                device_ids = list(self._tiers[0][2])
+            sketches = [sketch for device_id in device_ids
+                        for sketch in self._window_sketches(device_id, seconds, now)]
+            return DDSketch.merged(sketches, self.relative_accuracy)
+
+    def percentiles(self, device_id: Optional[str], seconds: float) -> Dict[str, Optional[float]]:
+        """p50/p90/p99 of a device (None for all devices) over the window ending now"""
+        return self.format_percentiles(self.window_sketch(None if device_id is None else [device_id], seconds))
+
+    @staticmethod
+    def format_percentiles(sketch: DDSketch) -> Dict[str, Optional[float]]:
+        """Percentile fields of a sketch, rounded like the other statistics"""
+        return {PERCENTILES[q]: round(value, 2) if value is not None else None
+                for q, value in sketch.quantiles(PERCENTILES).items()}
+
+    def device_stats(self, device_id: str, hours: int) -> Optional[Dict[str, Any]]:
+        """
+        Statistics of a device over the last hours, in the layout of
+        InfluxService.get_device_stats
+
+        Returns:
+            Device statistics or None without readings in the window
+        """
+        sketch = self.window_sketch([device_id], hours * 3600)
+        if not sketch.count:
+            return None
+
+        stats = {
+            'count': sketch.count,
+            'avg_pm25': round(sketch.sum / sketch.count, 2),
+            'min_pm25': round(sketch.min, 2),
+            'max_pm25': round(sketch.max, 2)
+        }
+        stats.update(self.format_percentiles(sketch))
+        return stats
+
+    def summary(self, hours: int = 24) -> Optional[Dict[str, Any]]:
+        """
+        Fleet-wide statistics over the last hours, in the layout of
+        GeoJSONService.get_summary_stats
+
+        Returns:
+            Summary statistics or None without readings in the window
+        """
+        now = time.time()
+        fleet = DDSketch(self.relative_accuracy)
+        device_list = []
+        with self._lock:
+            for device_id in self._tiers[0][2]:
+                sketches = self._window_sketches(device_id, hours * 3600, now)
+                if any(sketch.count for sketch in sketches):
+                    device_list.append(device_id)
+                    for sketch in sketches:
+                        fleet.merge(sketch)
+
+        if not fleet.count:
+            return None
+
+        summary = {
+            'total_measurements': fleet.count,
+            'active_devices': len(device_list),
+            'avg_pm25': round(fleet.sum / fleet.count, 2),
+            'min_pm25': round(fleet.min, 2),
+            'max_pm25': round(fleet.max, 2),
+        }
+        summary.update(self.format_percentiles(fleet))
+        summary['device_list'] = device_list
+        return summary
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        Sketches of every tier as JSON-serializable state, for API workers
+
+        Returns:
+            Dictionary with the retention, accuracy and per tier the bucket
+            width and device -> [[bucket start, sketch state], ...]
+        """
+        with self._lock:
+            return {
+                'retention_hours': self.retention_hours,
+                'relative_accuracy': self.relative_accuracy,
+                'tiers': [{'width': width,
+                           'devices': {device_id: [[bucket, sketch.to_state()]
+                                                   for bucket, sketch in device_buckets.items()]
+                                       for device_id, device_buckets in buckets.items()}}
+                          for width, _, buckets in self._tiers]
+            }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'QuantileStats':
+        """
+        Read-only copy of the sketches published by another process
+
+        Raises:
+            ValueError: If the state's tiers do not match this version's
+        """
+        stats = cls(state['retention_hours'], state['relative_accuracy'])
+        if [tier['width'] for tier in state['tiers']] != [width for width, _, _ in stats._tiers]:
+            raise ValueError('Quantile sketch tiers do not match')
+
+        for (_, _, buckets), tier in zip(stats._tiers, state['tiers']):
+            for device_id, device_buckets in tier['devices'].items():
+                buckets[device_id] = {bucket: DDSketch.from_state(sketch, stats.relative_accuracy)
+                                      for bucket, sketch in device_buckets}
+        stats.ready = True
+        return stats
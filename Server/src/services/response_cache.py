@@ -0,0 +1,170 @@
+"""
+PM2.5 Ghostbuster - Response Cache
+Route-level cache of serialized API responses with stampede protection
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from config.settings import config
+from src.utils.logger import get_logger
+
+
+@dataclass
+class CachedResponse:
+    """Serialized response body with the headers needed to replay it"""
+    body: bytes
+    status: int
+    headers: Dict[str, str]
+    # Data version (entity tag, last modified) read before the body was computed
+    version: Optional[Tuple[str, float]] = None
+    # Streamed response passed through once and never stored
+    streamed: Optional[Any] = None
+    created: float = field(default_factory=time.monotonic)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created
+
+
+class ResponseCache:
+    """
+    Memory-bounded LRU cache of serialized responses
+
+    Concurrent misses for the same key are coalesced into a single
+    computation (single flight). Entries past their TTL are still served
+    for a stale window while one background refresh recomputes them.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, stale_ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Initialize response cache
+
+        Args:
+            ttl: Seconds an entry is fresh (defaults to config value)
+            stale_ttl: Extra seconds a stale entry may be served while refreshing
+            max_bytes: Maximum total size of cached bodies
+        """
+        self.logger = get_logger('response_cache')
+        self.ttl = ttl if ttl is not None else config.RESPONSE_CACHE_TTL
+        self.stale_ttl = stale_ttl if stale_ttl is not None else config.RESPONSE_CACHE_STALE_TTL
+        self.max_bytes = max_bytes or config.RESPONSE_CACHE_MAX_BYTES
+
+        self._entries: 'OrderedDict[Hashable, CachedResponse]' = OrderedDict()
+        self._size = 0
+        self._in_flight: Dict[Hashable, threading.Event] = {}
+        # Advanced by invalidations, so computations started before one are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _store(self, key: Hashable, entry: CachedResponse) -> None:
+        """Store an entry and evict least recently used ones (lock held)"""
+        old = self._entries.pop(key, None)
+        if old:
+            self._size -= len(old.body)
+
+        # Never let one response take over most of the cache
+        if len(entry.body) > self.max_bytes // 4:
+            return
+
+        self._entries[key] = entry
+        self._size += len(entry.body)
+
+        while self._size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.body)
+
+    def _compute(self, key: Hashable, compute: Callable[[], CachedResponse],
+                 done: threading.Event) -> Optional[CachedResponse]:
+        """Run a computation as the single flight for a key"""
+        generation = self._generation
+        try:
+            entry = compute()
+            if entry.status == 200 and entry.streamed is None:
+                with self._lock:
+                    if generation == self._generation:
+                        self._store(key, entry)
+            return entry
+        except Exception as e:
+            self.logger.error(f"Response computation failed for {key}: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            done.set()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], CachedResponse],
+                       refresh: Optional[Callable[[], CachedResponse]] = None) -> Tuple[CachedResponse, str]:
+        """
+        Get a cached response or compute it once
+
+        Args:
+            key: Cache key
+            compute: Computes the response in the calling thread
+            refresh: Computes the response in a background thread (defaults to compute)
+
+        Returns:
+            Tuple of (response, cache status: HIT, STALE or MISS)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                age = entry.age
+
+                if age < self.ttl:
+                    return entry, 'HIT'
+
+                if age < self.ttl + self.stale_ttl:
+                    if key not in self._in_flight:
+                        done = threading.Event()
+                        self._in_flight[key] = done
+                        threading.Thread(target=self._refresh, args=(key, refresh or compute, done),
+                                         daemon=True).start()
+                    return entry, 'STALE'
+
+            done = self._in_flight.get(key)
+            leader = done is None
+            if leader:
+                done = threading.Event()
+                self._in_flight[key] = done
+
+        if leader:
+            return self._compute(key, compute, done), 'MISS'
+
+        # Another request is computing this key; wait for its result
+        done.wait(timeout=max(self.ttl, 30))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry:
+            return entry, 'HIT'
+
+        # The leader failed or produced an uncacheable response
+        return compute(), 'MISS'
+
+    def _refresh(self, key: Hashable, refresh: Callable[[], CachedResponse],
+                 done: threading.Event) -> None:
+        """Background revalidation of a stale entry"""
+        try:
+            self._compute(key, refresh, done)
+        except Exception:
+            pass  # Already logged; the stale entry keeps being served
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop an entry whose data has changed, e.g. after a write"""
+        with self._lock:
+            self._generation += 1
+            old = self._entries.pop(key, None)
+            if old:
+                self._size -= len(old.body)
+
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,146 @@
+"""
+PM2.5 Ghostbuster - Rolling Statistics
+Per-device rolling PM2.5 aggregates maintained at ingest
+"""
+
+import calendar
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.utils.logger import get_logger
+from src.utils.rolling_window import RollingWindow
+from src.services.quantile_stats import QuantileStats
+from src.models.air_quality import AirQualityMeasurement
+
+# Window name -> (span seconds, bucket seconds)
+WINDOWS = {
+    '5m': (300, 10),
+    '1h': (3600, 60),
+    '24h': (86400, 900),
+}
+
+# Window answering stats requests for a number of hours
+HOURS_WINDOWS = {1: '1h', 24: '24h'}
+
+
+def format_window_stats(count: int, mean: Optional[float], minimum: Optional[float],
+                        maximum: Optional[float]) -> Dict[str, Any]:
+    """Window aggregates in the layout of InfluxService.get_device_stats"""
+    return {
+        'count': count,
+        'avg_pm25': round(mean, 2) if count else None,
+        'min_pm25': round(minimum, 2) if count else None,
+        'max_pm25': round(maximum, 2) if count else None
+    }
+
+
+class RollingStats:
+    """
+    Rolling 5-minute, 1-hour and 24-hour PM2.5 aggregates per device
+
+    Updated with every ingested measurement in constant time and queried
+    without touching InfluxDB. The collector warms the windows up from the
+    last 24 hours of stored data at startup; until then ready is False and
+    callers fall back to InfluxDB.
+    """
+
+    def __init__(self, quantiles: Optional[QuantileStats] = None):
+        """
+        Initialize empty aggregates
+
+        Args:
+            quantiles: Quantile sketches adding percentiles to each window's stats
+        """
+        self.logger = get_logger('rolling_stats')
+        self._lock = threading.Lock()
+        self._devices: Dict[str, Dict[str, RollingWindow]] = {}
+        self.quantiles = quantiles
+        self.ready = False
+        self._next_prune = 0.0
+
+    def _windows(self, device_id: str) -> Dict[str, RollingWindow]:
+        windows = self._devices.get(device_id)
+        if windows is None:
+            windows = {name: RollingWindow(span, bucket) for name, (span, bucket) in WINDOWS.items()}
+            self._devices[device_id] = windows
+        return windows
+
+    def add(self, device_id: str, pm25: float, timestamp: float) -> None:
+        """
+        Add a reading to the device's windows
+
+        Args:
+            device_id: Device identifier
+            pm25: PM2.5 value
+            timestamp: UNIX time of the reading (future times count as now)
+        """
+        if not math.isfinite(pm25):
+            return
+        now = time.time()
+        timestamp = min(timestamp, now)
+        with self._lock:
+            for window in self._windows(device_id).values():
+                window.add(pm25, timestamp)
+
+            if now >= self._next_prune:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Forget devices that have been silent for a whole day (lock held)"""
+        self._next_prune = now + WINDOWS['24h'][1]
+        for device_id in [device_id for device_id, windows in self._devices.items()
+                          if not windows['24h'].stats(now)[0]]:
+            del self._devices[device_id]
+
+    def add_measurement(self, measurement: AirQualityMeasurement) -> None:
+        """Add an ingested measurement (naive UTC timestamp)"""
+        self.add(measurement.device_id, float(measurement.pm25),
+                 calendar.timegm(measurement.timestamp.utctimetuple()) + measurement.timestamp.microsecond / 1e6)
+
+    def device_stats(self, device_id: str, now: Optional[float] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Aggregates of every window of a device
+
+        Returns:
+            Dictionary of window name -> stats, None for devices without readings
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            windows = self._devices.get(device_id)
+            if windows is None:
+                return None
+            stats = {name: format_window_stats(*window.stats(now)) for name, window in windows.items()}
+        self._add_percentiles(device_id, stats)
+        return stats
+
+    def _add_percentiles(self, device_id: str, stats: Dict[str, Dict[str, Any]]) -> None:
+        """Add the percentiles of each window from the quantile sketches"""
+        if self.quantiles is None:
+            return
+        for name, window_stats in stats.items():
+            if window_stats['count']:
+                window_stats.update(self.quantiles.percentiles(device_id, WINDOWS[name][0]))
+
+    def window_mean(self, device_id: str, window: str) -> Optional[float]:
+        """Mean PM2.5 of a device over a window, None without readings"""
+        with self._lock:
+            windows = self._devices.get(device_id)
+            if windows is None:
+                return None
+            count, mean, _, _ = windows[window].stats(time.time())
+        return mean if count else None
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Aggregates of every device with readings in the last 24 hours, for API workers"""
+        now = time.time()
+        with self._lock:
+            stats = {device_id: {name: format_window_stats(*window.stats(now))
+                                 for name, window in windows.items()}
+                     for device_id, windows in self._devices.items()}
+        stats = {device_id: device_stats for device_id, device_stats in stats.items()
+                 if device_stats['24h']['count']}
+        for device_id, device_stats in stats.items():
+            self._add_percentiles(device_id, device_stats)
+        return stats
@@ -0,0 +1,132 @@
+"""
+PM2.5 Ghostbuster - Snapshot Service
+File-backed snapshots of the latest data products shared between processes
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import config
+from src.utils.logger import get_logger
+from src.utils.file_utils import atomic_write
+from src.utils.json_codec import json_codec
+
+
+def _json_default(value: Any) -> str:
+    """Serialize datetimes as ISO strings and anything else via str()"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class SnapshotService:
+    """
+    Publishes and reads JSON snapshots of data products
+
+    The data collector publishes snapshots; API worker processes read them.
+    Readers keep a per-process copy that is reloaded only when the file
+    changes, so a cache hit costs a single stat call.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None):
+        """
+        Initialize snapshot service
+
+        Args:
+            snapshot_path: Directory holding snapshot files (defaults to config value)
+        """
+        self.logger = get_logger('snapshot_service')
+        self.snapshot_path = Path(snapshot_path or config.SNAPSHOT_PATH)
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _file_path(self, name: str) -> Path:
+        return self.snapshot_path / f"{name}.json"
+
+    def publish(self, name: str, payload: Any, version: Optional[Tuple[str, float]] = None) -> bool:
+        """
+        Atomically publish a snapshot
+
+        Args:
+            name: Snapshot name
+            payload: JSON-serializable data
+            version: Data version (entity tag, last modified) the payload
+                     was computed from, for conditional requests
+
+        Returns:
+            True if successful
+        """
+        try:
+            snapshot = {'published_at': time.time(), 'payload': payload}
+            if version is not None:
+                snapshot['version'] = list(version)
+            data = json_codec.dumps_bytes(snapshot, default=_json_default)
+            with atomic_write(self._file_path(name), 'wb') as f:
+                f.write(data)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to publish snapshot {name}: {e}")
+            return False
+
+    def load(self, name: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """
+        Read the latest snapshot
+
+        Args:
+            name: Snapshot name
+            max_age: Ignore snapshots older than this many seconds
+
+        Returns:
+            Snapshot payload or None if missing or too old
+        """
+        snapshot = self._read(name, max_age)
+        return snapshot['payload'] if snapshot is not None else None
+
+    def load_version(self, name: str, max_age: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """
+        Read the data version a snapshot was computed from
+
+        Args:
+            name: Snapshot name
+            max_age: Ignore snapshots older than this many seconds
+
+        Returns:
+            Tuple of (entity tag, last modified UNIX time) or None if the
+            snapshot is missing, too old or published without a version
+        """
+        snapshot = self._read(name, max_age)
+        if snapshot is None or 'version' not in snapshot:
+            return None
+        etag, last_modified = snapshot['version']
+        return etag, last_modified
+
+    def _read(self, name: str, max_age: Optional[float]) -> Optional[Dict[str, Any]]:
+        """Read a whole snapshot through the per-process cache"""
+        file_path = self._file_path(name)
+
+        try:
+            mtime = os.stat(file_path).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and cached[0] == mtime:
+                snapshot = cached[1]
+            else:
+                try:
+                    with open(file_path, 'rb') as f:
+                        snapshot = json_codec.loads(f.read())
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Failed to read snapshot {name}: {e}")
+                    return None
+                self._cache[name] = (mtime, snapshot)
+
+        if max_age is not None and time.time() - snapshot['published_at'] > max_age:
+            return None
+
+        return snapshot
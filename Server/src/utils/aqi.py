@@ -0,0 +1,167 @@
+"""
+EPA NowCast and AQI for PM2.5 Ghostbuster
+Scalar functions for live readings and vectorized ones for history
+"""
+
+import math
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+# Hours of hourly averages weighed by the NowCast
+NOWCAST_HOURS = 12
+
+# EPA PM2.5 AQI breakpoints: (C low, C high, AQI low, AQI high, category).
+# Concentration bands match AlertService.THRESHOLDS.
+AQI_BREAKPOINTS = (
+    (0.0, 12.0, 0, 50, 'good'),
+    (12.1, 35.4, 51, 100, 'moderate'),
+    (35.5, 55.4, 101, 150, 'unhealthy_for_sensitive'),
+    (55.5, 150.4, 151, 200, 'unhealthy'),
+    (150.5, 250.4, 201, 300, 'very_unhealthy'),
+    (250.5, 350.4, 301, 400, 'hazardous'),
+    (350.5, 500.4, 401, 500, 'hazardous'),
+)
+
+_C_LOW = np.array([b[0] for b in AQI_BREAKPOINTS])
+_C_HIGH = np.array([b[1] for b in AQI_BREAKPOINTS])
+_I_LOW = np.array([b[2] for b in AQI_BREAKPOINTS], dtype=np.float64)
+_I_HIGH = np.array([b[3] for b in AQI_BREAKPOINTS], dtype=np.float64)
+
+
+def truncate(concentration: float) -> float:
+    """Truncate a concentration to 0.1 μg/m³ as the EPA does before computing the AQI"""
+    return math.floor(concentration * 10 + 1e-9) / 10
+
+
+def pm25_to_aqi(concentration: Optional[float]) -> Tuple[Optional[int], Optional[str]]:
+    """
+    AQI and category of a PM2.5 concentration (NowCast or 24-hour mean)
+
+    Concentrations above the table are reported as AQI 500.
+
+    Returns:
+        Tuple of (AQI, category), (None, None) for missing or negative values
+    """
+    if concentration is None or not concentration >= 0:
+        return None, None
+
+    concentration = truncate(concentration)
+    for c_low, c_high, i_low, i_high, category in AQI_BREAKPOINTS:
+        if concentration <= c_high:
+            aqi = (i_high - i_low) / (c_high - c_low) * (concentration - c_low) + i_low
+            return math.floor(aqi + 0.5), category  # Halves round up
+    return 500, AQI_BREAKPOINTS[-1][4]
+
+
+def pm25_to_aqi_array(concentrations: np.ndarray) -> np.ndarray:
+    """
+    Vectorized pm25_to_aqi
+
+    Returns:
+        AQI per value as float64, NaN for missing or negative values
+    """
+    concentrations = np.floor(np.asarray(concentrations, dtype=np.float64) * 10 + 1e-9) / 10
+    band = np.clip(np.searchsorted(_C_HIGH, concentrations, side='left'), 0, len(AQI_BREAKPOINTS) - 1)
+    aqi = ((_I_HIGH[band] - _I_LOW[band]) / (_C_HIGH[band] - _C_LOW[band])
+           * (concentrations - _C_LOW[band]) + _I_LOW[band])
+    aqi = np.where(concentrations > _C_HIGH[-1], 500.0, np.floor(aqi + 0.5))
+    return np.where(concentrations >= 0, aqi, np.nan)
+
+
+def nowcast(hourly: Sequence[Optional[float]]) -> Optional[float]:
+    """
+    EPA NowCast of up to 12 hourly averages
+
+    Args:
+        hourly: Hourly PM2.5 averages, most recent hour first, None for hours
+                without data
+
+    Returns:
+        NowCast truncated to 0.1 μg/m³, None unless two of the three most
+        recent hours have data
+    """
+    hourly = list(hourly[:NOWCAST_HOURS])
+    if sum(value is not None for value in hourly[:3]) < 2:
+        return None
+
+    values = [value for value in hourly if value is not None]
+    c_max = max(values)
+    weight = max(min(values) / c_max, 0.5) if c_max > 0 else 1.0
+
+    numerator = denominator = 0.0
+    factor = 1.0
+    for value in hourly:
+        if value is not None:
+            numerator += factor * value
+            denominator += factor
+        factor *= weight
+    return truncate(numerator / denominator)
+
+
+def nowcast_windows(windows: np.ndarray) -> np.ndarray:
+    """
+    Vectorized nowcast over the last axis
+
+    Args:
+        windows: Array of shape (..., 12) of hourly averages, most recent
+                 hour first, NaN for hours without data
+
+    Returns:
+        NowCast per window, NaN where it is not defined
+    """
+    valid = ~np.isnan(windows)
+    c_min = np.where(valid, windows, np.inf).min(axis=-1)
+    c_max = np.where(valid, windows, -np.inf).max(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(c_max > 0, np.maximum(c_min / c_max, 0.5), 1.0)
+        weights = np.where(valid, weight[..., None] ** np.arange(NOWCAST_HOURS), 0.0)
+        result = (weights * np.where(valid, windows, 0.0)).sum(axis=-1) / weights.sum(axis=-1)
+
+    defined = valid[..., :3].sum(axis=-1) >= 2
+    return np.where(defined, np.floor(result * 10 + 1e-9) / 10, np.nan)
+
+
+def nowcast_series(hourly: np.ndarray) -> np.ndarray:
+    """
+    NowCast at every hour of hourly average series
+
+    Args:
+        hourly: Array of shape (series, hours) of consecutive hourly averages,
+                oldest first, NaN for hours without data
+
+    Returns:
+        Array of the same shape with the NowCast at each hour, NaN where the
+        NowCast is not defined
+    """
+    series, hours = hourly.shape
+    padded = np.concatenate([np.full((series, NOWCAST_HOURS - 1), np.nan), hourly], axis=1)
+    # windows[s, t, i] is the average i hours before hour t
+    windows = np.lib.stride_tricks.sliding_window_view(padded, NOWCAST_HOURS, axis=1)[..., ::-1]
+    return nowcast_windows(windows)
+
+
+def hourly_sums(codes: np.ndarray, hours: np.ndarray, values: np.ndarray,
+                 series: int, first_hour: int, hour_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hourly sums and counts of readings per series (e.g. device)
+
+    Args:
+        codes: Series index of each reading (0 to series - 1)
+        hours: Hour number (UNIX time // 3600) of each reading
+        values: Reading values
+        series: Number of series
+        first_hour: Hour number of the first column
+        hour_count: Number of hour columns
+
+    Returns:
+        Tuple of (sums, counts) arrays of shape (series, hour_count); readings
+        outside the hour range are ignored
+    """
+    columns = hours - first_hour
+    inside = (columns >= 0) & (columns < hour_count)
+    cells = codes[inside] * hour_count + columns[inside]
+    size = series * hour_count
+    sums = np.bincount(cells, weights=values[inside], minlength=size).reshape(series, hour_count)
+    counts = np.bincount(cells, minlength=size).reshape(series, hour_count)
+    return sums, counts
@@ -0,0 +1,55 @@
+"""
+Data version tracking for PM2.5 Ghostbuster
+Monotonic version counter used for HTTP conditional requests
+"""
+
+import threading
+import time
+from typing import Tuple
+
+
+class DataVersion:
+    """Monotonically increasing version of the served data"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # The epoch keeps versions unique across process restarts
+        self.epoch = int(time.time())
+        self.value = 0
+        self.last_modified = time.time()
+        self.tracking = False
+
+    def start_tracking(self) -> None:
+        """
+        Mark this process as the owner of data changes
+
+        Versions are only meaningful in a process that sees every ingest and
+        alert change; elsewhere conditional requests must not be answered.
+        """
+        self.tracking = True
+
+    def bump(self) -> int:
+        """
+        Advance the version after a data change
+
+        Returns:
+            New version value
+        """
+        with self._lock:
+            self.value += 1
+            self.last_modified = time.time()
+            return self.value
+
+    def current(self) -> Tuple[str, float]:
+        """
+        Get the current version
+
+        Returns:
+            Tuple of (entity tag, last modified UNIX time)
+        """
+        with self._lock:
+            return f"{self.epoch:x}-{self.value}", self.last_modified
+
+
+# Global data version instance
+data_version = DataVersion()
@@ -0,0 +1,85 @@
+"""
+Time-series downsampling for PM2.5 Ghostbuster
+Reduces raw readings to a fixed number of points for charting
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample with Largest-Triangle-Three-Buckets
+
+    Keeps the first and last points and, per bucket, the point forming the
+    largest triangle with the previously selected point and the mean of the
+    next bucket. Bucket means are computed for all buckets at once from
+    cumulative sums; each bucket then needs a single vectorized argmax.
+
+    Args:
+        x: Sorted x values (e.g. epoch milliseconds)
+        y: Y values
+        n_out: Maximum number of output points
+
+    Returns:
+        Tuple of downsampled (x, y) arrays
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    xf = x.astype(np.float64) - float(x[0])  # Relative x keeps products well conditioned
+    yf = y.astype(np.float64)
+
+    # n_out - 2 buckets over the points between the fixed first and last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+
+    cum_x = np.concatenate(([0.0], np.cumsum(xf)))
+    cum_y = np.concatenate(([0.0], np.cumsum(yf)))
+    mean_x = (cum_x[edges[1:]] - cum_x[edges[:-1]]) / counts
+    mean_y = (cum_y[edges[1:]] - cum_y[edges[:-1]]) / counts
+
+    # Third vertex for bucket i is the mean of bucket i + 1 (last point for the final bucket)
+    next_x = np.append(mean_x[1:], xf[-1])
+    next_y = np.append(mean_y[1:], yf[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = xf[a], yf[a]
+        area = np.abs((ax - next_x[i]) * (yf[lo:hi] - ay) - (ax - xf[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return x[selected], y[selected]
+
+
+def bucket_means(x: np.ndarray, y: np.ndarray, n_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample by averaging equal-count buckets
+
+    Args:
+        x: Sorted x values (e.g. epoch milliseconds)
+        y: Y values
+        n_out: Maximum number of output points
+
+    Returns:
+        Tuple of (mean x, mean y) arrays, one entry per bucket
+    """
+    n = len(x)
+    if n_out >= n or n_out < 1:
+        return x, y
+
+    starts = np.unique(np.linspace(0, n, n_out + 1).astype(np.int64)[:-1])
+    counts = np.diff(np.append(starts, n))
+
+    mean_x = np.add.reduceat(x.astype(np.float64), starts) / counts
+    mean_y = np.add.reduceat(y.astype(np.float64), starts) / counts
+
+    return mean_x.astype(x.dtype), mean_y
@@ -0,0 +1,50 @@
+"""
+File utilities for PM2.5 Ghostbuster
+Atomic publishing of files served to web clients
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Union
+
+
+@contextmanager
+def atomic_write(file_path: Union[str, Path], mode: str = 'w',
+                 encoding: Optional[str] = None) -> Iterator[IO]:
+    """
+    Write a file atomically via a temporary sibling and os.replace
+
+    Readers either see the previous complete file or the new complete file,
+    never a partially written one. The temporary file is removed on error.
+
+    Args:
+        file_path: Final path of the file
+        mode: File mode ('w' or 'wb')
+        encoding: Text encoding for text mode
+
+    Yields:
+        Writable file object for the temporary file
+    """
+    path = Path(file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+        # mkstemp creates files readable by owner only; published files must
+        # stay readable by the web server
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
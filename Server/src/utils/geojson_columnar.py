@@ -0,0 +1,192 @@
+"""
+Columnar GeoJSON feature encoder for PM2.5 Ghostbuster
+Encodes batches of InfluxDB data points to feature JSON text column by column
+"""
+
+import json
+import re
+from json.encoder import encode_basestring
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Columns with a fixed place in the feature; everything else is an extra property
+CORE_FIELDS = ('device_id', 'pm25', 'latitude', 'longitude', 'time', 'speed')
+
+
+def encode_json_value(value: Any) -> str:
+    """Encode a scalar exactly as json.dumps(ensure_ascii=False) would"""
+    if value is None:
+        return 'null'
+
+    value_type = type(value)
+    if value_type is str:
+        return encode_basestring(value)
+    if value_type is float and value == value and value not in (float('inf'), float('-inf')):
+        return repr(value)
+    if value_type is int:
+        return int.__repr__(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _round_floats(values: List[float], ndigits: int) -> List[str]:
+    """
+    repr(round(value, ndigits)) of each value
+
+    '%.Nf' rounds correctly like round() does, and repr() of a number with
+    at most 15 significant digits is that number without trailing zeros,
+    so the values are formatted in one %-operation and the zeros stripped
+    with one regex pass. Values whose repr() uses exponent notation or
+    that have more significant digits take round() and repr() instead.
+    """
+    if not values:
+        return []
+    text = '\n'.join([f'%.{ndigits}f'] * len(values)) % tuple(values)
+    parts = _TRAILING_ZEROS.sub(_keep_one_zero, text).split('\n')
+
+    array = np.abs(np.array(values, dtype=np.float64))
+    with np.errstate(invalid='ignore'):
+        unusual = ((array < 1e-4) & (array != 0)) | ~(array < 10.0 ** (15 - ndigits))
+    for index in np.flatnonzero(unusual).tolist():
+        parts[index] = repr(round(values[index], ndigits))
+    return parts
+
+
+# Trailing zeros of each line of '%.Nf' output; one zero stays after the point
+_TRAILING_ZEROS = re.compile(r'(\.\d*?)0+$', re.MULTILINE)
+
+
+def _keep_one_zero(match: 're.Match') -> str:
+    digits = match.group(1)
+    return digits if len(digits) > 1 else digits + '0'
+
+
+def _format_floats(values: np.ndarray, ndigits: Optional[int] = None) -> List[str]:
+    """
+    repr() of each value, rounded like round() if ndigits is given,
+    formatting repeated values only once
+
+    Python's round() is correctly rounded while np.round scales and rounds
+    in binary (281.745 gives 281.75 and 281.74), so values are rounded here
+    like the per-point features do. Sensor readings repeat and
+    fixed-location devices repeat their coordinates, so most columns hold
+    few distinct values.
+    """
+    def format_values(numbers: List[float]) -> List[str]:
+        if ndigits is None:
+            return list(map(repr, numbers))
+        return _round_floats(numbers, ndigits)
+
+    unique, inverse = np.unique(values, return_inverse=True)
+    if len(unique) * 2 > len(values):
+        return format_values(values.tolist())
+
+    formatted = np.array(format_values(unique.tolist()), dtype=object)
+    return formatted[inverse.reshape(-1)].tolist()
+
+
+def _encode_column(values: List[Any]) -> List[str]:
+    """Encode a column of scalars, specialised for columns of a single type"""
+    types = set(map(type, values))
+    types.discard(type(None))
+
+    if types == {float}:
+        array = np.array(values, dtype=np.float64)
+        missing = values.count(None)
+        if int(np.count_nonzero(~np.isfinite(array))) == missing:
+            if not missing:
+                return _format_floats(array)
+            return ['null' if value is None else repr(value) for value in values]
+    elif types == {str}:
+        return ['null' if value is None else encode_basestring(value) for value in values]
+    elif types == {int}:
+        return ['null' if value is None else int.__repr__(value) for value in values]
+    elif not types:
+        return ['null'] * len(values)
+
+    return [encode_json_value(value) for value in values]
+
+
+def encode_features(points: Sequence[Dict[str, Any]], times: Sequence[str],
+                    ids: Optional[Sequence[Optional[str]]] = None) -> List[Optional[str]]:
+    """
+    Encode data points as GeoJSON feature JSON text
+
+    The output matches json.dumps of the per-point feature dictionaries:
+    coordinates rounded to 6 decimals, pm25 to 2, speed to 1 and only when
+    non-zero, then extra fields in column order. Points are transposed into
+    columns once, numeric columns are converted with NumPy and rounded once
+    per distinct value, and the extra-field
+    schema is taken from the first point since all points of a query share
+    the same columns.
+
+    Args:
+        points: InfluxDB data points of one query
+        times: Local display time of each point
+        ids: Feature ID of each point (None entries and None omit the id)
+
+    Returns:
+        Feature JSON string per point, None for points that cannot be encoded
+        columnar (rows with a different schema or without coordinates)
+    """
+    count = len(points)
+    if not count:
+        return []
+
+    schema = list(points[0].keys())
+    gathered = [key for key in schema if key != 'time']  # Times arrive already converted
+    try:
+        columns = {key: [point[key] for point in points] for key in gathered}
+        valid = np.ones(count, dtype=bool)
+    except KeyError:
+        # Mixed schemas; rows that differ from the first are encoded per point
+        columns = {key: [point.get(key) for point in points] for key in gathered}
+        valid = np.array([len(point) == len(schema) and all(key in point for key in schema)
+                          for point in points], dtype=bool)
+
+    def numeric(key: str) -> np.ndarray:
+        if key not in columns:
+            return np.zeros(count)
+        return np.array(columns[key], dtype=np.float64)  # None becomes NaN
+
+    try:
+        lon = numeric('longitude')
+        lat = numeric('latitude')
+        pm25 = numeric('pm25')
+        speed = numeric('speed')
+    except (TypeError, ValueError):
+        # Non-numeric values somewhere in the batch
+        return [None] * count
+
+    valid &= ~(np.isnan(lon) | np.isnan(lat) | np.isnan(pm25))
+    speed_parts = [''] * count
+    has_speed = np.flatnonzero(~np.isnan(speed) & (speed != 0)).tolist()
+    for index, value in zip(has_speed, _format_floats(speed[has_speed], 1)):
+        speed_parts[index] = ',"speed":' + value
+
+    lon_parts = _format_floats(lon, 6)
+    lat_parts = _format_floats(lat, 6)
+    pm25_parts = _format_floats(pm25, 2)
+    time_parts = list(map(encode_basestring, times))
+    id_parts = ([''] * count if ids is None else
+                ['' if feature_id is None else ',"id":' + encode_basestring(feature_id) for feature_id in ids])
+
+    devices = columns.get('device_id', ['unknown'] * count)
+    device_memo = {device_id: encode_json_value(device_id) for device_id in set(devices)}
+    device_parts = [device_memo[device_id] for device_id in devices]
+
+    extra_keys = [key for key in schema if key not in CORE_FIELDS]
+    if extra_keys:
+        extra_template = ''.join(f',{encode_basestring(key)}:%s' for key in extra_keys)
+        extra_parts = [extra_template % row for row in zip(*(_encode_column(columns[key]) for key in extra_keys))]
+    else:
+        extra_parts = [''] * count
+
+    # One f-string per feature; braces are doubled for the literal JSON ones
+    return [
+        f'{{"type":"Feature"{i},"geometry":{{"type":"Point","coordinates":[{x},{y}]}},'
+        f'"properties":{{"device_id":{d},"pm25":{p},"time":{t}{s}{e}}}}}'
+        if ok else None
+        for i, x, y, d, p, t, s, e, ok in zip(id_parts, lon_parts, lat_parts, device_parts, pm25_parts,
+                                             time_parts, speed_parts, extra_parts, valid.tolist())
+    ]
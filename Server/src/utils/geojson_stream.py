@@ -0,0 +1,87 @@
+"""
+Streaming GeoJSON encoder for PM2.5 Ghostbuster
+Writes FeatureCollections incrementally instead of building them in memory
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Union
+
+from config.settings import config
+from src.utils.json_codec import json_codec
+
+# A feature is either a GeoJSON feature dictionary or its pre-encoded JSON text
+Feature = Union[Dict[str, Any], str]
+
+
+class GeoJSONStreamEncoder:
+    """Incrementally encodes a GeoJSON FeatureCollection from a feature iterator"""
+
+    def __init__(self, chunk_features: Optional[int] = None,
+                 foreign_members: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the encoder
+
+        Args:
+            chunk_features: Number of features per emitted chunk (defaults to config value)
+            foreign_members: Extra top-level members appended after the features
+        """
+        self.chunk_features = max(1, chunk_features or config.GEOJSON_STREAM_CHUNK_FEATURES)
+        self.foreign_members = foreign_members or {}
+        self.feature_count = 0
+
+    @staticmethod
+    def _encode_feature(feature: Feature) -> str:
+        """Encode a single feature unless it is already JSON text"""
+        if isinstance(feature, str):
+            return feature
+        return json_codec.dumps(feature)
+
+    def _encode_tail(self) -> str:
+        """Encode the closing part of the FeatureCollection"""
+        tail = ']'
+        for key, value in self.foreign_members.items():
+            tail += f',{json_codec.dumps(key)}:{json_codec.dumps(value)}'
+        return tail + '}'
+
+    def iter_encode(self, features: Iterable[Feature]) -> Iterator[str]:
+        """
+        Encode features as a sequence of JSON text chunks
+
+        Args:
+            features: Iterable of feature dictionaries or pre-encoded feature strings
+
+        Yields:
+            JSON text chunks that concatenate to a complete FeatureCollection
+        """
+        self.feature_count = 0
+        yield '{"type":"FeatureCollection","features":['
+
+        buffer = []
+        separator = ''
+        for feature in features:
+            buffer.append(self._encode_feature(feature))
+            self.feature_count += 1
+
+            if len(buffer) >= self.chunk_features:
+                yield separator + ','.join(buffer)
+                separator = ','
+                buffer = []
+
+        if buffer:
+            yield separator + ','.join(buffer)
+
+        yield self._encode_tail()
+
+    def write(self, features: Iterable[Feature], fp: TextIO) -> int:
+        """
+        Encode features directly into a text file object
+
+        Args:
+            features: Iterable of feature dictionaries or pre-encoded feature strings
+            fp: Writable text file object
+
+        Returns:
+            Number of features written
+        """
+        for chunk in self.iter_encode(features):
+            fp.write(chunk)
+        return self.feature_count
@@ -0,0 +1,167 @@
+"""
+Ingest pipeline timing for PM2.5 Ghostbuster
+Sampled per-stage latency of MQTT measurements from receipt to alert evaluation
+"""
+
+import calendar
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import config
+from src.utils.metrics import metrics
+
+# Pipeline stages in processing order
+STAGES = ('receive', 'parse', 'write', 'publish', 'alerts', 'total')
+
+# Stages are mostly sub-millisecond; database writes and lag are not
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+class IngestTrace:
+    """Stage timings of one sampled measurement"""
+
+    __slots__ = ('started', 'last', 'stages')
+
+    def __init__(self, received: Optional[float] = None):
+        now = time.monotonic()
+        self.started = received if received and received <= now else now
+        self.last = self.started
+        self.stages: List[Tuple[str, float]] = []
+
+    def mark(self, stage: str) -> None:
+        """Record the time since the previous mark as a stage"""
+        now = time.monotonic()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+
+class IngestTiming:
+    """
+    Sampled stage timer for the ingest pipeline
+
+    The MQTT client processes a message and its callback on one thread, so
+    the trace for the message in flight is kept thread-local. Unsampled
+    messages only pay for a thread-local lookup returning None.
+    """
+
+    def __init__(self, sample_rate: Optional[float] = None):
+        """
+        Initialize ingest timing
+
+        Args:
+            sample_rate: Fraction of measurements to time, 0 disables (defaults to config value)
+        """
+        self.sample_rate = sample_rate if sample_rate is not None else config.INGEST_TIMING_SAMPLE_RATE
+        self._local = threading.local()
+
+        self._stage_histogram = metrics.histogram(
+            'pm25_ingest_stage_duration_seconds', 'Ingest pipeline stage latency (sampled)',
+            ('stage',), buckets=STAGE_BUCKETS)
+        self._lag_histogram = metrics.histogram(
+            'pm25_ingest_lag_seconds', 'Delay from device timestamp to processed measurement (sampled)',
+            buckets=LAG_BUCKETS)
+
+    def begin(self, received: Optional[float] = None) -> Optional[IngestTrace]:
+        """
+        Start timing a message if it is sampled
+
+        Args:
+            received: Monotonic time the MQTT client received the message
+
+        Returns:
+            IngestTrace for sampled messages, otherwise None
+        """
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            self._local.trace = None
+            return None
+
+        trace = IngestTrace(received)
+        if received:
+            trace.mark('receive')
+        self._local.trace = trace
+        return trace
+
+    def current(self) -> Optional[IngestTrace]:
+        """Trace of the message being processed on this thread, if sampled"""
+        return getattr(self._local, 'trace', None)
+
+    def finish(self, device_time: Optional[datetime] = None) -> None:
+        """
+        Record the current trace
+
+        Args:
+            device_time: Measurement timestamp reported by the device (naive UTC)
+        """
+        trace = self.current()
+        if trace is None:
+            return
+        self._local.trace = None
+
+        for stage, duration in trace.stages:
+            self._stage_histogram.observe(duration, stage)
+        self._stage_histogram.observe(time.monotonic() - trace.started, 'total')
+
+        if device_time is not None:
+            lag = time.time() - calendar.timegm(device_time.utctimetuple()) - device_time.microsecond / 1e6
+            self._lag_histogram.observe(max(lag, 0.0))
+
+    @staticmethod
+    def _summarize(counts: List[int], total: float, buckets: Tuple[float, ...]) -> Dict[str, Any]:
+        """Count, mean and bucket-bound percentiles from histogram counts"""
+        count = sum(counts)
+        summary = {'count': count, 'mean_ms': round(total / count * 1000, 3) if count else None}
+
+        for name, q in (('p50_ms', 0.5), ('p95_ms', 0.95), ('p99_ms', 0.99)):
+            value = None
+            if count:
+                rank, cumulative = q * count, 0
+                for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    if cumulative >= rank:
+                        value = bound * 1000 if bound != float('inf') else None
+                        break
+            summary[name] = value
+
+        return summary
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Summarize sampled timings since startup
+
+        Percentiles are the upper bound of the histogram bucket they fall in
+        (None when beyond the last bucket).
+        """
+        stages = {}
+        for stage in STAGES:
+            counts, total = self._stage_histogram.snapshot(stage)
+            stages[stage] = self._summarize(counts, total, STAGE_BUCKETS)
+
+        lag_counts, lag_total = self._lag_histogram.snapshot()
+
+        return {
+            'sample_rate': self.sample_rate,
+            'stages': stages,
+            'lag': self._summarize(lag_counts, lag_total, LAG_BUCKETS)
+        }
+
+    def format_summary(self) -> str:
+        """One-line summary for the statistics log"""
+        summary = self.get_summary()
+        parts = [f"{stage}={stats['mean_ms']}ms/p95<={stats['p95_ms']}ms"
+                 for stage, stats in summary['stages'].items() if stats['count']]
+        lag = summary['lag']
+        if lag['count']:
+            if lag['p50_ms'] is None:
+                parts.append(f"lag p50>{LAG_BUCKETS[-1]:g}s")
+            else:
+                parts.append(f"lag p50<={lag['p50_ms'] / 1000:g}s")
+        return ', '.join(parts)
+
+
+# Global ingest timing
+ingest_timing = IngestTiming()
@@ -0,0 +1,128 @@
+"""
+JSON codec for PM2.5 Ghostbuster
+Uses orjson or ujson when installed, with the standard library as fallback
+"""
+
+import json
+from datetime import date
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+
+from config.settings import config
+
+try:
+    import orjson
+except ImportError:  # Fast JSON is optional
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Backends in order of preference for JSON_CODEC=auto
+BACKENDS = ('orjson', 'ujson', 'json')
+
+
+def _available(backend: str) -> bool:
+    return {'orjson': orjson, 'ujson': ujson, 'json': json}.get(backend) is not None
+
+
+def default_encoder(value: Any) -> Any:
+    """Convert NumPy scalars and arrays, datetimes as ISO strings, anything else via str()"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+class JSONCodec:
+    """
+    JSON encoder/decoder backed by the fastest available library
+
+    All backends produce compact JSON with non-ASCII characters left
+    unescaped, and decode both str and UTF-8 bytes. Decoding errors are
+    raised as ValueError by every backend.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Initialize codec
+
+        Args:
+            backend: orjson, ujson, json or auto (defaults to config value)
+
+        Raises:
+            ValueError: If the requested backend is not installed
+        """
+        backend = (backend or config.JSON_CODEC).lower()
+        if backend == 'auto':
+            backend = next(name for name in BACKENDS if _available(name))
+        elif backend not in BACKENDS or not _available(backend):
+            raise ValueError(f"JSON codec not available: {backend}")
+        self.backend = backend
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """
+        Decode JSON text or UTF-8 bytes
+
+        Raises:
+            ValueError: If the data is not valid JSON
+        """
+        if self.backend == 'orjson':
+            return orjson.loads(data)
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        if self.backend == 'ujson':
+            return ujson.loads(data)
+        return json.loads(data)
+
+    def dumps_bytes(self, value: Any, sort_keys: bool = False,
+                    default: Callable[[Any], Any] = default_encoder) -> bytes:
+        """
+        Encode a value as compact UTF-8 JSON
+
+        Args:
+            value: Value to encode
+            sort_keys: Sort dictionary keys
+            default: Converts values the backend cannot encode natively
+
+        Returns:
+            Encoded JSON bytes
+        """
+        if self.backend == 'orjson':
+            # Dates go through default, so every backend formats them alike
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(value, default=default, option=option)
+        return self.dumps(value, sort_keys, default).encode('utf-8')
+
+    def dumps(self, value: Any, sort_keys: bool = False,
+              default: Callable[[Any], Any] = default_encoder) -> str:
+        """
+        Encode a value as compact JSON text
+
+        Args:
+            value: Value to encode
+            sort_keys: Sort dictionary keys
+            default: Converts values the backend cannot encode natively
+
+        Returns:
+            Encoded JSON string
+        """
+        if self.backend == 'orjson':
+            return self.dumps_bytes(value, sort_keys, default).decode('utf-8')
+        if self.backend == 'ujson':
+            return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False,
+                               sort_keys=sort_keys, default=default)
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'),
+                          sort_keys=sort_keys, default=default)
+
+
+# Global JSON codec
+json_codec = JSONCodec()
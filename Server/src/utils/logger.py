@@ -3,14 +3,23 @@ Logging utilities for PM2.5 Ghostbuster
 Provides structured logging with timezone awareness
 """
 
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 import pytz
 
 from config.settings import config
+from src.utils.metrics import metrics
 
 
 class TimezoneFormatter(logging.Formatter):
@@ -19,19 +28,123 @@ class TimezoneFormatter(logging.Formatter):
     def __init__(self, fmt: Optional[str] = None, datefmt: Optional[str] = None):
         super().__init__(fmt, datefmt)
         self.timezone = pytz.timezone(config.DEFAULT_TIMEZONE)
+        self._cached_time = (None, None, '')  # (second, datefmt, formatted)
 
     def formatTime(self, record, datefmt=None):
         """Format timestamp in Bangkok timezone"""
-        dt = datetime.fromtimestamp(record.created, tz=self.timezone)
-        if datefmt:
-            return dt.strftime(datefmt)
-        return dt.strftime('%Y-%m-%d %H:%M:%S %Z')
+        # Formats have one-second resolution, so reuse the string within a second
+        second = int(record.created)
+        cached_second, cached_datefmt, formatted = self._cached_time
+        if second == cached_second and datefmt == cached_datefmt:
+            return formatted
+
+        dt = datetime.fromtimestamp(second, tz=self.timezone)
+        formatted = dt.strftime(datefmt or '%Y-%m-%d %H:%M:%S %Z')
+        self._cached_time = (second, datefmt, formatted)
+        return formatted
+
+
+class JsonFormatter(TimezoneFormatter):
+    """Formatter writing one JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S%z'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _RoutingHandler(logging.Handler):
+    """Dispatches records from the shared queue to the handlers of their logger"""
+
+    def __init__(self):
+        super().__init__()
+        self.routes: Dict[str, List[logging.Handler]] = {}
+
+    def handle(self, record):
+        for handler in self.routes.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def prepare(self, record):
+        # Merge arguments now (they may change later), but leave formatting
+        # to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped_records.inc()
+
+
+_dropped_records = metrics.counter('pm25_log_records_dropped_total',
+                                   'Log records dropped because the log queue was full')
+_suppressed_records = metrics.counter('pm25_log_records_suppressed_total',
+                                      'Log records suppressed by rate limiting', ('site',))
+
+_router: Optional[_RoutingHandler] = None
+_log_queue: Optional[queue.Queue] = None
+_listener: Optional[QueueListener] = None
+_queue_handlers: List[_DroppingQueueHandler] = []
+_router_lock = threading.Lock()
+
+
+def _start_listener() -> None:
+    """Create the log queue and start its listener thread (lock held)"""
+    global _log_queue, _listener
+    _log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    _listener = QueueListener(_log_queue, _router)
+    _listener.start()
+
+    for handler in _queue_handlers:
+        handler.queue = _log_queue
+
+
+def _get_log_queue() -> queue.Queue:
+    """Start the shared log queue and its listener thread on first use"""
+    global _router
+
+    with _router_lock:
+        if _log_queue is None:
+            _router = _RoutingHandler()
+            _start_listener()
+            atexit.register(lambda: _listener.stop())  # Flush queued records on exit
+        return _log_queue
+
+
+def _restart_after_fork() -> None:
+    """Give a forked child (e.g. a gunicorn worker) its own listener thread"""
+    global _router_lock
+    _router_lock = threading.Lock()
+    if _log_queue is not None:
+        _start_listener()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
 
 
 def setup_logger(name: str, log_file: Optional[str] = None) -> logging.Logger:
     """
     Set up logger with file and console handlers
 
+    With LOG_ASYNC enabled the logger only enqueues records; a listener
+    thread formats them and writes to the console and file handlers.
+
     Args:
         name: Logger name
         log_file: Optional log file path
@@ -48,16 +161,21 @@ def setup_logger(name: str, log_file: Optional[str] = None) -> logging.Logger:
     logger.setLevel(getattr(logging, config.LOG_LEVEL))
 
     # Create formatters
-    formatter = TimezoneFormatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S %Z'
-    )
+    if config.LOG_FORMAT == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = TimezoneFormatter(
+            fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S %Z'
+        )
+
+    handlers = []
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
 
     # File handler (if specified)
     if log_file:
@@ -68,7 +186,17 @@ def setup_logger(name: str, log_file: Optional[str] = None) -> logging.Logger:
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if config.LOG_ASYNC:
+        log_queue = _get_log_queue()
+        _router.routes[name] = handlers
+        queue_handler = _DroppingQueueHandler(log_queue)
+        _queue_handlers.append(queue_handler)
+        logger.addHandler(queue_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
 
     return logger
 
@@ -76,4 +204,57 @@ def setup_logger(name: str, log_file: Optional[str] = None) -> logging.Logger:
 def get_logger(name: str) -> logging.Logger:
     """Get logger for a module"""
     log_file = Path(config.LOG_PATH) / f"{name}.log" if config.LOG_PATH else None
-    return setup_logger(name, str(log_file) if log_file else None)
\ No newline at end of file
+    return setup_logger(name, str(log_file) if log_file else None)
+
+
+class SampledLog:
+    """
+    Rate-limited log call site for per-measurement messages
+
+    Logs at most one line per interval. The next line logged after a quiet
+    period reports how many similar lines were suppressed in between.
+    """
+
+    def __init__(self, logger: logging.Logger, site: str, interval: Optional[float] = None,
+                 level: int = logging.INFO):
+        """
+        Initialize sampled log site
+
+        Args:
+            logger: Logger to write to
+            site: Call site name for the suppressed-lines counter
+            interval: Minimum seconds between lines, 0 logs every line (defaults to config value)
+            level: Log level of the lines
+        """
+        self.logger = logger
+        self.site = site
+        self.interval = interval if interval is not None else config.LOG_SAMPLE_INTERVAL
+        self.level = level
+        self._next_time = 0.0
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def log(self, msg: str, *args) -> None:
+        """Log a line unless one was logged within the interval (lazy %-style arguments)"""
+        if not self.logger.isEnabledFor(self.level):
+            return
+
+        if self.interval <= 0:
+            self.logger.log(self.level, msg, *args)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_time:
+                self._suppressed += 1
+                _suppressed_records.inc(self.site)
+                return
+
+            suppressed = self._suppressed
+            self._suppressed = 0
+            self._next_time = now + self.interval
+
+        if suppressed:
+            self.logger.log(self.level, msg + " (%d similar lines suppressed)", *args, suppressed)
+        else:
+            self.logger.log(self.level, msg, *args)
@@ -0,0 +1,208 @@
+"""
+Profiling utilities for PM2.5 Ghostbuster
+On-demand sampling profiles and tracemalloc snapshots written to LOG_PATH
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.settings import config
+from src.utils.logger import get_logger
+
+logger = get_logger('profiling')
+
+
+def profile_dir() -> Path:
+    """Directory for profile output, created on first use"""
+    path = Path(config.LOG_PATH) / 'profiles'
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _output_path(name: str, suffix: str) -> Path:
+    safe_name = re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_') or 'profile'
+    timestamp = time.strftime('%Y%m%dT%H%M%S')
+    return profile_dir() / f"{safe_name}-{timestamp}-{os.getpid()}{suffix}"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread
+
+    A background thread samples the target thread's stack at a fixed
+    interval and counts identical stacks. Output is in the folded format
+    read by flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: Optional[float] = None):
+        """
+        Initialize profiler
+
+        Args:
+            thread_id: Thread to sample (defaults to the calling thread)
+            interval: Seconds between samples (defaults to config value)
+        """
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval or config.PROFILE_SAMPLE_INTERVAL
+        self.stacks: Counter = Counter()
+        self.started: Optional[float] = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling"""
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self.started is not None:
+            self.duration = time.perf_counter() - self.started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return  # Target thread has exited
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.stacks.values())
+
+    def write(self, name: str) -> Path:
+        """
+        Write collected stacks in folded format
+
+        Args:
+            name: Profile name used in the file name
+
+        Returns:
+            Path of the written file
+        """
+        path = _output_path(name, '.folded')
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+@contextmanager
+def profile_block(name: str, enabled: bool = True):
+    """
+    Profile the calling thread for the duration of the block
+
+    Args:
+        name: Profile name used in the file name
+        enabled: Run the block unprofiled when False
+
+    Yields:
+        SamplingProfiler, or None when disabled
+    """
+    if not enabled:
+        yield None
+        return
+
+    profiler = SamplingProfiler()
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        try:
+            path = profiler.write(name)
+            logger.info(f"Profiled {name}: {profiler.sample_count} samples "
+                        f"over {profiler.duration:.2f}s written to {path}")
+        except OSError as e:
+            logger.error(f"Failed to write profile for {name}: {e}")
+
+
+class MemoryTracker:
+    """tracemalloc snapshots compared against the previous snapshot"""
+
+    def __init__(self):
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _format_stat(stat) -> Dict[str, Any]:
+        frame = stat.traceback[0]
+        entry = {'location': f"{frame.filename}:{frame.lineno}", 'size_bytes': stat.size, 'count': stat.count}
+        if hasattr(stat, 'size_diff'):
+            entry['size_diff_bytes'] = stat.size_diff
+            entry['count_diff'] = stat.count_diff
+        return entry
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Take a snapshot, starting tracing first if needed
+
+        The first call only starts tracing, since allocations made before
+        tracing began are invisible. Each later call returns the top
+        allocation sites and the growth since the previous snapshot, and
+        dumps the snapshot to the profile directory for offline analysis.
+
+        Args:
+            limit: Number of allocation sites to return
+
+        Returns:
+            Snapshot summary dictionary
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._previous = None
+                return {'tracing': True, 'started': True}
+
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+
+            path = _output_path('memory', '.tracemalloc')
+            snapshot.dump(str(path))
+
+            growth = []
+            if self._previous is not None:
+                growth = [self._format_stat(stat)
+                          for stat in snapshot.compare_to(self._previous, 'lineno')[:limit]]
+            self._previous = snapshot
+
+            return {
+                'tracing': True,
+                'started': False,
+                'traced_current_bytes': current,
+                'traced_peak_bytes': peak,
+                'top': [self._format_stat(stat) for stat in snapshot.statistics('lineno')[:limit]],
+                'growth_since_previous': growth,
+                'snapshot_file': str(path)
+            }
+
+    def stop(self) -> None:
+        """Stop tracing and drop the previous snapshot"""
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+
+# Global memory tracker
+memory_tracker = MemoryTracker()
@@ -0,0 +1,142 @@
+"""
+Mergeable quantile sketch for PM2.5 Ghostbuster
+DDSketch with relative-error guarantees and exact count/sum/min/max
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# Values at or below this are counted as zero (PM2.5 is never negative)
+MIN_INDEXABLE = 1e-3
+
+
+class DDSketch:
+    """
+    Quantile sketch with relative accuracy (DDSketch, Masson et al. 2019)
+
+    Values are counted in logarithmic bins, so any quantile is returned
+    within relative_accuracy of the true value. Two sketches of the same
+    accuracy merge by adding bin counts, which makes sketches of time buckets
+    combinable into sketches of any window. Readings span a few orders of
+    magnitude, so a sketch holds at most a few hundred bins.
+    """
+
+    __slots__ = ('relative_accuracy', '_log_gamma', '_gamma', 'bins', 'zero_count',
+                 'count', 'sum', 'min', 'max')
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """
+        Initialize an empty sketch
+
+        Args:
+            relative_accuracy: Maximum relative error of quantiles (0 < a < 1)
+        """
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """Add a non-negative value"""
+        if value > MIN_INDEXABLE:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'DDSketch') -> None:
+        """
+        Add the values of another sketch
+
+        Raises:
+            ValueError: If the sketches have different accuracies
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge sketches of different accuracy')
+        bins = self.bins
+        for key, count in other.bins.items():
+            bins[key] = bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @classmethod
+    def merged(cls, sketches: Iterable['DDSketch'], relative_accuracy: float = 0.01) -> 'DDSketch':
+        """New sketch holding the values of all given sketches"""
+        result = cls(relative_accuracy)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Approximate value at quantile q (0 to 1)
+
+        Returns:
+            Value within relative_accuracy of the true quantile, None if empty
+        """
+        return self.quantiles([q])[q]
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, Optional[float]]:
+        """Several quantiles with a single pass over the bins"""
+        qs = sorted(qs)
+        if not self.count:
+            return {q: None for q in qs}
+
+        results = {}
+        keys = sorted(self.bins)
+        seen = self.zero_count
+        position = 0
+        for q in qs:
+            rank = q * (self.count - 1)
+            if rank < self.zero_count:
+                results[q] = max(self.min, 0.0)
+                continue
+            while position < len(keys) and seen <= rank:
+                seen += self.bins[keys[position]]
+                position += 1
+            if seen > rank:
+                value = 2 * self._gamma ** keys[position - 1] / (self._gamma + 1)
+                results[q] = min(max(value, self.min), self.max)
+            else:
+                results[q] = self.max
+        return results
+
+    def to_state(self) -> List[Any]:
+        """
+        Compact JSON-serializable state, e.g. to share sketches between processes
+
+        Bins are stored as dense counts from the lowest key, since readings
+        of a bucket fill a narrow contiguous range of bins.
+        """
+        state = [self.count, self.sum, self.min, self.max, self.zero_count]
+        if self.bins:
+            low = min(self.bins)
+            counts = [0] * (max(self.bins) - low + 1)
+            for key, count in self.bins.items():
+                counts[key - low] = count
+            state += [low, counts]
+        return state
+
+    @classmethod
+    def from_state(cls, state: Sequence[Any], relative_accuracy: float = 0.01) -> 'DDSketch':
+        """Create a sketch from a state made by to_state"""
+        sketch = cls(relative_accuracy)
+        sketch.count, sketch.sum, sketch.min, sketch.max, sketch.zero_count = state[:5]
+        if len(state) > 5:
+            low, counts = state[5], state[6]
+            sketch.bins = {low + offset: count for offset, count in enumerate(counts) if count}
+        return sketch
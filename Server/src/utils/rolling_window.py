@@ -0,0 +1,168 @@
+"""
+Rolling window aggregates for PM2.5 Ghostbuster
+Constant-time mean/min/max/count over a sliding time window
+"""
+
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+
+class RollingWindow:
+    """
+    Count, mean, minimum and maximum of the values of the last span seconds
+
+    Values are summed into fixed-width time buckets held in a ring buffer,
+    and the window total is kept as a running sum, so adding a value and
+    expiring a bucket are O(1). Minimum and maximum come from monotonic
+    deques of per-bucket extremes. Readings that arrive late for an older
+    bucket still inside the window are added to that bucket; the deques are
+    then rebuilt from the buckets on the next query.
+
+    The window covers whole buckets, so it spans between span - bucket_seconds
+    and span seconds. Not thread-safe; callers hold their own lock.
+    """
+
+    __slots__ = ('bucket_seconds', 'size', 'count', 'total', '_buckets', '_sums', '_counts',
+                 '_mins', '_maxs', '_head', '_min_deque', '_max_deque', '_dirty')
+
+    def __init__(self, span_seconds: int, bucket_seconds: int):
+        """
+        Initialize an empty window
+
+        Args:
+            span_seconds: Window length in seconds
+            bucket_seconds: Bucket width in seconds (time resolution of the window)
+        """
+        self.bucket_seconds = bucket_seconds
+        self.size = max(1, span_seconds // bucket_seconds)
+        self.count = 0
+        self.total = 0.0
+
+        # Bucket number held by each ring slot, None for empty slots
+        self._buckets: List[Optional[int]] = [None] * self.size
+        self._sums = [0.0] * self.size
+        self._counts = [0] * self.size
+        self._mins = [0.0] * self.size
+        self._maxs = [0.0] * self.size
+        self._head: Optional[int] = None  # Newest bucket number
+
+        # (bucket, value) pairs with increasing values (min) / decreasing values (max)
+        self._min_deque: Deque[Tuple[int, float]] = deque()
+        self._max_deque: Deque[Tuple[int, float]] = deque()
+        self._dirty = False
+
+    def _advance(self, bucket: int) -> None:
+        """Move the window forward to end at a bucket, expiring older buckets"""
+        head = self._head
+        if head is not None and bucket <= head:
+            return
+
+        if head is None or bucket - head >= self.size:
+            self._reset()
+        else:
+            for expired in range(head + 1, bucket + 1):
+                slot = expired % self.size
+                if self._buckets[slot] is not None:
+                    self.count -= self._counts[slot]
+                    self.total -= self._sums[slot]
+                    self._buckets[slot] = None
+            if not self.count:
+                self.total = 0.0  # No rounding residue from the running sum
+
+            cutoff = bucket - self.size
+            while self._min_deque and self._min_deque[0][0] <= cutoff:
+                self._min_deque.popleft()
+            while self._max_deque and self._max_deque[0][0] <= cutoff:
+                self._max_deque.popleft()
+
+        self._head = bucket
+
+    def _reset(self) -> None:
+        self._buckets = [None] * self.size
+        self.count = 0
+        self.total = 0.0
+        self._min_deque.clear()
+        self._max_deque.clear()
+        self._dirty = False
+
+    def add(self, value: float, timestamp: float) -> bool:
+        """
+        Add a value
+
+        Args:
+            value: Value to add
+            timestamp: UNIX time of the value
+
+        Returns:
+            False if the value is older than the window and was ignored
+        """
+        bucket = int(timestamp // self.bucket_seconds)
+        self._advance(bucket)
+        if bucket <= self._head - self.size:
+            return False
+
+        slot = bucket % self.size
+        if self._buckets[slot] != bucket:
+            self._buckets[slot] = bucket
+            self._sums[slot] = value
+            self._counts[slot] = 1
+            self._mins[slot] = value
+            self._maxs[slot] = value
+        else:
+            self._sums[slot] += value
+            self._counts[slot] += 1
+            if value < self._mins[slot]:
+                self._mins[slot] = value
+            if value > self._maxs[slot]:
+                self._maxs[slot] = value
+        self.count += 1
+        self.total += value
+
+        if bucket != self._head:
+            self._dirty = True
+            return True
+
+        min_deque = self._min_deque
+        while min_deque and min_deque[-1][1] >= value:
+            min_deque.pop()
+        min_deque.append((bucket, value))
+
+        max_deque = self._max_deque
+        while max_deque and max_deque[-1][1] <= value:
+            max_deque.pop()
+        max_deque.append((bucket, value))
+        return True
+
+    def _rebuild_extremes(self) -> None:
+        """Rebuild the monotonic deques from the buckets after a late reading"""
+        self._min_deque.clear()
+        self._max_deque.clear()
+        for bucket in range(self._head - self.size + 1, self._head + 1):
+            slot = bucket % self.size
+            if self._buckets[slot] != bucket:
+                continue
+            low, high = self._mins[slot], self._maxs[slot]
+            while self._min_deque and self._min_deque[-1][1] >= low:
+                self._min_deque.pop()
+            self._min_deque.append((bucket, low))
+            while self._max_deque and self._max_deque[-1][1] <= high:
+                self._max_deque.pop()
+            self._max_deque.append((bucket, high))
+        self._dirty = False
+
+    def stats(self, now: float) -> Tuple[int, Optional[float], Optional[float], Optional[float]]:
+        """
+        Aggregates of the window ending now
+
+        Args:
+            now: Current UNIX time
+
+        Returns:
+            Tuple of (count, mean, minimum, maximum), None values when empty
+        """
+        self._advance(int(now // self.bucket_seconds))
+        if not self.count:
+            return 0, None, None, None
+        if self._dirty:
+            self._rebuild_extremes()
+        return self.count, self.total / self.count, self._min_deque[0][1], self._max_deque[0][1]
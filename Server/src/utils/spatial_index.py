@@ -0,0 +1,221 @@
+"""
+Polygon spatial index for PM2.5 Ghostbuster
+Grid index over GeoJSON polygons for point-in-polygon lookups at ingest rate
+"""
+
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.json_codec import json_codec
+
+# Rings of a shape: exterior rings and holes of all its polygons, as (lon, lat)
+Ring = List[Tuple[float, float]]
+
+# Grid cells along the longer side of the indexed extent
+GRID_CELLS = 256
+
+
+class PolygonFeature(NamedTuple):
+    """Polygon or MultiPolygon feature of a GeoJSON file"""
+    feature_id: Any
+    properties: Dict[str, Any]
+    rings: List[Ring]
+    geometry: Dict[str, Any]
+
+
+def read_polygon_features(path: str) -> List[PolygonFeature]:
+    """
+    Read the Polygon and MultiPolygon features of a GeoJSON file
+
+    Args:
+        path: GeoJSON FeatureCollection file
+
+    Returns:
+        Features in file order; features of other geometry types are skipped
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not valid JSON
+    """
+    with open(path, 'rb') as f:
+        collection = json_codec.loads(f.read())
+
+    features = []
+    for feature in collection.get('features', []):
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+        rings = [[(float(x), float(y)) for x, y, *_ in ring]
+                 for polygon in polygons for ring in polygon if len(ring) >= 3]
+        if rings:
+            features.append(PolygonFeature(feature.get('id'), feature.get('properties') or {}, rings, geometry))
+    return features
+
+
+def ring_centroid(ring: Ring) -> Tuple[float, float]:
+    """Area centroid (lon, lat) of a ring, the vertex mean for degenerate rings"""
+    area = cx = cy = 0.0
+    for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+        cross = x0 * y1 - x1 * y0
+        area += cross
+        cx += (x0 + x1) * cross
+        cy += (y0 + y1) * cross
+    if abs(area) < 1e-18:
+        return sum(x for x, _ in ring) / len(ring), sum(y for _, y in ring) / len(ring)
+    return cx / (3 * area), cy / (3 * area)
+
+
+def contains(rings: Sequence[Ring], x: float, y: float) -> bool:
+    """Even-odd point-in-polygon test of a point against all rings of a shape"""
+    inside = False
+    for ring in rings:
+        x0, y0 = ring[-1]
+        for x1, y1 in ring:
+            if (y0 > y) != (y1 > y) and x < (x1 - x0) * (y - y0) / (y1 - y0) + x0:
+                inside = not inside
+            x0, y0 = x1, y1
+    return inside
+
+
+def contains_array(rings: Sequence[Ring], xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Vectorized contains for many points, looping over edges only"""
+    inside = np.zeros(len(xs), dtype=bool)
+    for ring in rings:
+        vertices = np.asarray(ring, dtype=np.float64)
+        previous = np.roll(vertices, 1, axis=0)
+        for (x0, y0), (x1, y1) in zip(previous.tolist(), vertices.tolist()):
+            if y0 == y1:
+                continue
+            crosses = (y0 > ys) != (y1 > ys)
+            inside ^= crosses & (xs < (x1 - x0) * (ys - y0) / (y1 - y0) + x0)
+    return inside
+
+
+class PolygonIndex:
+    """
+    Uniform grid over polygon shapes for fast point-in-polygon lookups
+
+    Each grid cell lists the shapes whose boundary passes through it, which
+    need an exact point-in-polygon test, and the shapes that cover it
+    entirely, which match without one. Most points fall into covered cells
+    or cells without any shape, so a lookup is a dictionary access and
+    rarely more than one ring test. Shapes may overlap.
+    """
+
+    def __init__(self, shapes: Sequence[Sequence[Ring]], cell_degrees: Optional[float] = None):
+        """
+        Build the index
+
+        Args:
+            shapes: Rings of each shape (exterior rings and holes, (lon, lat))
+            cell_degrees: Grid cell size (defaults to the extent / GRID_CELLS)
+        """
+        self.shapes = [list(rings) for rings in shapes]
+        self.bboxes = []
+        for rings in self.shapes:
+            xs = [x for ring in rings for x, _ in ring]
+            ys = [y for ring in rings for _, y in ring]
+            self.bboxes.append((min(xs), min(ys), max(xs), max(ys)))
+
+        # cell key -> [(shape index, covered), ...]
+        self._cells: Dict[int, List[Tuple[int, bool]]] = {}
+        # Sorted cell keys of each shape: (covered cells, boundary cells)
+        self._shape_cells: List[Tuple[np.ndarray, np.ndarray]] = []
+        if not self.shapes:
+            self.origin, self.cell_degrees, self.columns = (0.0, 0.0), 1.0, 1
+            return
+
+        west = min(b[0] for b in self.bboxes)
+        south = min(b[1] for b in self.bboxes)
+        east = max(b[2] for b in self.bboxes)
+        north = max(b[3] for b in self.bboxes)
+        self.origin = (west, south)
+        self.cell_degrees = cell_degrees or max(east - west, north - south, 1e-6) / GRID_CELLS
+        self.columns = int((east - west) // self.cell_degrees) + 1
+
+        for i, rings in enumerate(self.shapes):
+            self._index_shape(i, rings)
+
+    def _cell_range(self, low: float, high: float, origin: float) -> range:
+        return range(int((low - origin) // self.cell_degrees), int((high - origin) // self.cell_degrees) + 1)
+
+    def _index_shape(self, shape: int, rings: Sequence[Ring]) -> None:
+        """Add a shape to the cells of its bounding box"""
+        west, south = self.origin
+        boundary = set()
+        for ring in rings:
+            for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+                for column in self._cell_range(min(x0, x1), max(x0, x1), west):
+                    for row in self._cell_range(min(y0, y1), max(y0, y1), south):
+                        boundary.add((column, row))
+
+        x_min, y_min, x_max, y_max = self.bboxes[shape]
+        cells = [(column, row) for column in self._cell_range(x_min, x_max, west)
+                 for row in self._cell_range(y_min, y_max, south)]
+        interior = [cell for cell in cells if cell not in boundary]
+
+        # A cell no edge passes through is covered iff its center is inside
+        covered = set()
+        if interior:
+            centers = np.array(interior, dtype=np.float64)
+            xs = west + (centers[:, 0] + 0.5) * self.cell_degrees
+            ys = south + (centers[:, 1] + 0.5) * self.cell_degrees
+            covered = {cell for cell, inside in zip(interior, contains_array(rings, xs, ys)) if inside}
+
+        for column, row in boundary | covered:
+            self._cells.setdefault(row * self.columns + column, []).append((shape, (column, row) in covered))
+        covered_keys = np.array([row * self.columns + column for column, row in covered], dtype=np.int64)
+        boundary_keys = np.array([row * self.columns + column for column, row in boundary], dtype=np.int64)
+        self._shape_cells.append((np.sort(covered_keys), np.sort(boundary_keys)))
+
+    def locate(self, lon: float, lat: float) -> List[int]:
+        """
+        Shapes containing a point
+
+        Returns:
+            Indexes of the shapes containing the point, in shape order
+        """
+        column = (lon - self.origin[0]) // self.cell_degrees
+        row = (lat - self.origin[1]) // self.cell_degrees
+        if not 0 <= column < self.columns or not math.isfinite(row):
+            return []
+        entries = self._cells.get(int(row) * self.columns + int(column))
+        if not entries:
+            return []
+        return [shape for shape, covered in entries
+                if covered or contains(self.shapes[shape], lon, lat)]
+
+    def locate_first_array(self, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """
+        Vectorized lookup of the first shape containing each point, e.g. to
+        assign stored readings to non-overlapping districts when warming up
+
+        Returns:
+            Shape index per point, -1 for points outside every shape
+        """
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        result = np.full(len(lons), -1, dtype=np.int64)
+        if not self.shapes or not len(lons):
+            return result
+
+        with np.errstate(invalid='ignore'):
+            columns = np.floor((lons - self.origin[0]) / self.cell_degrees)
+            rows = np.floor((lats - self.origin[1]) / self.cell_degrees)
+        valid = (columns >= 0) & (columns < self.columns) & np.isfinite(rows)
+        keys = np.where(valid, rows * self.columns + columns, -1).astype(np.int64)
+
+        for shape, (covered, boundary) in enumerate(self._shape_cells):
+            pending = result < 0
+            result[pending & np.isin(keys, covered)] = shape
+            candidates = np.flatnonzero(pending & np.isin(keys, boundary))
+            if len(candidates):
+                inside = contains_array(self.shapes[shape], lons[candidates], lats[candidates])
+                result[candidates[inside]] = shape
+        return result
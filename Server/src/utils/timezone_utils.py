@@ -3,12 +3,22 @@ Timezone utilities for PM2.5 Ghostbuster
 Handles timezone conversions between UTC and Bangkok time
 """
 
+from bisect import bisect_right
 from datetime import datetime
-from typing import Union
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
 import pytz
 
 from config.settings import config
 
+DISPLAY_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Bound on memoized per-second conversions before the memo is reset
+_MEMO_MAX_ENTRIES = 100000
+
+# Smaller batches are cheaper to convert one by one than through NumPy
+_VECTORIZE_MIN_BATCH = 32
+
 
 class TimezoneManager:
     """Manages timezone conversions for the application"""
@@ -16,6 +26,7 @@ class TimezoneManager:
     def __init__(self):
         self.utc_tz = pytz.UTC
         self.local_tz = pytz.timezone(config.DEFAULT_TIMEZONE)
+        self._format_memo: Dict[tuple, str] = {}
 
     def utc_to_local(self, utc_time: Union[datetime, str]) -> datetime:
         """
@@ -75,6 +86,88 @@ class TimezoneManager:
         local_dt = dt.astimezone(self.local_tz)
         return local_dt.strftime(format_str)
 
+    def _fixed_offset_seconds(self, start: datetime, end: datetime) -> Optional[int]:
+        """
+        UTC offset of the local timezone if it is constant between two UTC times
+
+        Args:
+            start: Earliest naive UTC time
+            end: Latest naive UTC time
+
+        Returns:
+            Offset in seconds, or None if a transition (e.g. DST) falls in between
+        """
+        transitions = getattr(self.local_tz, '_utc_transition_times', None)
+        if transitions is None:
+            # Static zone such as UTC
+            return int(self.utc_tz.localize(start).astimezone(self.local_tz).utcoffset().total_seconds())
+
+        index = bisect_right(transitions, start)
+        if index != bisect_right(transitions, end) or index == 0:
+            return None
+        return int(self.local_tz._transition_info[index - 1][0].total_seconds())
+
+    def _format_utc_memo(self, utc_time: Optional[str], format_str: str) -> Optional[str]:
+        """Format one timestamp, memoized per second for RFC3339 UTC strings"""
+        if not utc_time:
+            return None
+
+        memo_key = None
+        if isinstance(utc_time, str) and utc_time.endswith('Z') and '%f' not in format_str:
+            memo_key = (utc_time[:19], format_str)
+            formatted = self._format_memo.get(memo_key)
+            if formatted is not None:
+                return formatted
+
+        try:
+            formatted = self.utc_to_local(utc_time).strftime(format_str)
+        except (TypeError, ValueError):
+            return None
+
+        if memo_key is not None:
+            if len(self._format_memo) >= _MEMO_MAX_ENTRIES:
+                self._format_memo.clear()
+            self._format_memo[memo_key] = formatted
+        return formatted
+
+    def format_utc_batch(self, utc_times: Sequence[Optional[str]],
+                         format_str: str = DISPLAY_FORMAT) -> List[Optional[str]]:
+        """
+        Convert UTC timestamps to formatted local time strings in one pass
+
+        RFC3339 UTC strings as returned by InfluxDB ('...Z') are parsed with
+        NumPy at second resolution and shifted by the zone offset when the
+        offset is constant over the batch, which holds for fixed-offset zones
+        like Asia/Bangkok. Other input falls back to per-timestamp conversion
+        memoized per second.
+
+        Args:
+            utc_times: UTC ISO strings (None for missing values)
+            format_str: Format string
+
+        Returns:
+            Formatted local times, None where a timestamp is missing or invalid
+        """
+        if not utc_times:
+            return []
+
+        if format_str == DISPLAY_FORMAT and len(utc_times) >= _VECTORIZE_MIN_BATCH:
+            try:
+                if all(t[-1] == 'Z' and t[10] == 'T' for t in utc_times):
+                    seconds = np.array([t[:19] for t in utc_times], dtype='datetime64[s]')
+                else:
+                    seconds = None
+            except (TypeError, IndexError, ValueError):
+                seconds = None
+
+            if seconds is not None:
+                offset = self._fixed_offset_seconds(seconds.min().item(), seconds.max().item())
+                if offset is not None:
+                    local = np.datetime_as_string(seconds + np.timedelta64(offset, 's'), unit='s')
+                    return [t.replace('T', ' ') for t in local.tolist()]
+
+        return [self._format_utc_memo(t, format_str) for t in utc_times]
+
 
 # Global timezone manager instance
 tz_manager = TimezoneManager()
\ No newline at end of file